@@ -0,0 +1,125 @@
+"""
+Adaptive per-domain timeouts derived from observed latency percentiles.
+Each domain keeps a bounded log-bucketed histogram; cold domains get the caller's default.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+
+class LatencySketch:
+    """Fixed-size log-bucketed histogram of latencies in seconds"""
+
+    def __init__(self, min_latency=0.01, max_latency=600.0, growth=1.25, max_samples=1000):
+        self.min_latency = min_latency
+        self.growth = growth
+        self.max_samples = max_samples
+        self._log_growth = math.log(growth)
+        bucket_count = int(math.ceil(math.log(max_latency / min_latency) / self._log_growth)) + 1
+        self.counts = [0.0] * bucket_count
+        self.count = 0.0
+
+    def _bucket(self, seconds):
+        if seconds <= self.min_latency:
+            return 0
+        index = int(math.log(seconds / self.min_latency) / self._log_growth) + 1
+        return min(index, len(self.counts) - 1)
+
+    def _upper_bound(self, index):
+        return self.min_latency * (self.growth ** index)
+
+    def add(self, seconds):
+        """Record one latency sample"""
+        self.counts[self._bucket(seconds)] += 1
+        self.count += 1
+
+        # Halve all counts once the window is full so recent samples dominate
+        if self.count > self.max_samples:
+            self.counts = [c / 2 for c in self.counts]
+            self.count /= 2
+
+    def quantile(self, q):
+        """Return the upper bound of the bucket holding quantile q, or None when empty"""
+        if self.count <= 0:
+            return None
+
+        target = q * self.count
+        running = 0.0
+        for index, bucket_count in enumerate(self.counts):
+            running += bucket_count
+            if running >= target and bucket_count:
+                return self._upper_bound(index)
+        return self._upper_bound(len(self.counts) - 1)
+
+
+class AdaptiveTimeouts:
+    """Per-domain connect/read timeouts learned from observed latencies"""
+
+    def __init__(self, connect_floor=2.0, connect_ceiling=10.0, read_floor=5.0, read_ceiling=90.0,
+                 connect_multiplier=2.0, read_multiplier=3.0, min_samples=5, max_domains=512):
+        self.connect_floor = connect_floor
+        self.connect_ceiling = connect_ceiling
+        self.read_floor = read_floor
+        self.read_ceiling = read_ceiling
+        self.connect_multiplier = connect_multiplier
+        self.read_multiplier = read_multiplier
+        self.min_samples = min_samples
+        self.max_domains = max_domains
+        self._sketches = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def domain_of(url):
+        """Return the lower-cased host of a URL (the sketch key)"""
+        return (urlparse(url).hostname or '').lower()
+
+    def _sketch(self, domain, create=False):
+        sketch = self._sketches.get(domain)
+        if sketch is not None:
+            self._sketches.move_to_end(domain)
+        elif create:
+            sketch = self._sketches[domain] = LatencySketch()
+            # Evict the least recently used domain to keep memory bounded
+            if len(self._sketches) > self.max_domains:
+                self._sketches.popitem(last=False)
+        return sketch
+
+    def record(self, url, seconds):
+        """Record a successful request's latency for the URL's domain"""
+        with self._lock:
+            self._sketch(self.domain_of(url), create=True).add(max(seconds, 0.0))
+
+    def record_timeout(self, url, timeout):
+        """Record a timed-out request so the domain's percentiles drift upward"""
+        self.record(url, timeout)
+
+    def get(self, url, default=30.0, override=None):
+        """Return (connect, read) timeouts for a URL: the override, else learned, else the default"""
+        if override:
+            return float(override), float(override)
+
+        with self._lock:
+            sketch = self._sketch(self.domain_of(url))
+            if sketch is None or sketch.count < self.min_samples:
+                return float(default), float(default)
+            p90 = sketch.quantile(0.90)
+            p99 = sketch.quantile(0.99)
+
+        connect = min(max(p90 * self.connect_multiplier, self.connect_floor), self.connect_ceiling)
+        read = min(max(p99 * self.read_multiplier, self.read_floor), self.read_ceiling)
+        return round(connect, 3), round(read, 3)
+
+    def snapshot(self):
+        """Return current percentiles per domain, for diagnostics"""
+        with self._lock:
+            return {
+                domain: {
+                    'samples': round(sketch.count),
+                    'p50': sketch.quantile(0.50),
+                    'p90': sketch.quantile(0.90),
+                    'p99': sketch.quantile(0.99),
+                }
+                for domain, sketch in self._sketches.items()
+            }
@@ -0,0 +1,163 @@
+"""
+Record-and-replay of the JSON APIs behind JavaScript-rendered pages.
+API calls captured during a render are stored per origin as templates, which
+later pages on that origin fill in and call over plain HTTP.
+"""
+
+import json
+import os
+import re
+import threading
+from urllib.parse import urlparse
+
+from embedded_data import extract_from_payloads
+
+NUMERIC_ID_RE = re.compile(r'\d{4,}')
+
+# Request headers worth replaying; cookies and auth are deliberately left out
+REPLAY_HEADERS = {'accept', 'content-type', 'x-requested-with', 'x-api-key', 'x-app-version'}
+
+MIN_CAPTURE_TEXT_CHARS = 200
+MAX_TEMPLATES_PER_ORIGIN = 3
+MAX_FAILURES = 3
+
+
+def origin_of(url):
+    """Scheme, host and port of a URL; profiles and captures never cross origins"""
+    parsed = urlparse(url)
+    origin = f"{parsed.scheme.lower()}://{(parsed.hostname or '').lower()}"
+    return f"{origin}:{parsed.port}" if parsed.port else origin
+
+
+def page_tokens(page_url):
+    """Page-specific values of a URL: path, slug, slug_stem and numeric IDs id0 (last), id1, ..."""
+    path = urlparse(page_url).path
+    tokens = {}
+    if len(path) > 1:
+        tokens['path'] = path
+
+    segments = [segment for segment in path.split('/') if segment]
+    if segments:
+        slug = segments[-1]
+        tokens['slug'] = slug
+        stem = slug.rsplit('.', 1)[0]
+        if stem != slug:
+            tokens['slug_stem'] = stem
+
+    for index, number in enumerate(reversed(NUMERIC_ID_RE.findall(path))):
+        tokens.setdefault(f'id{index}', number)
+    return tokens
+
+
+def templatize(text, tokens):
+    """Replace token values in text with {name} placeholders
+
+    Returns the template and whether any placeholder was inserted.
+    """
+    template = text.replace('{', '{{').replace('}', '}}')
+    used = False
+    # Longest values first so the full path wins over the slug inside it
+    for name, value in sorted(tokens.items(), key=lambda item: len(item[1]), reverse=True):
+        if len(value) >= 3 and value in template:
+            template = template.replace(value, '{' + name + '}')
+            used = True
+    return template, used
+
+
+class ApiProfileStore:
+    """Per-origin replayable API request templates, optionally persisted as JSON by save()"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.profiles = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.profiles = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Could not load API profiles from {path}: {e}")
+
+    def save(self):
+        """Write the profiles to the JSON file, if one is configured"""
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = json.dumps(self.profiles, indent=2)
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+        except OSError as e:
+            print(f"⚠️  Could not save API profiles to {self.path}: {e}")
+
+    def has_profile(self, page_url):
+        return bool(self.profiles.get(origin_of(page_url)))
+
+    def record(self, page_url, captures):
+        """Store templates for captured JSON responses that carry page content; returns how many"""
+        tokens = page_tokens(page_url)
+        templates = []
+        for capture in captures:
+            if origin_of(capture['url']) != origin_of(page_url):
+                continue
+
+            content = extract_from_payloads([('xhr', capture['payload'])], page_url)
+            text_chars = len(content['text']) if content else 0
+            if text_chars < MIN_CAPTURE_TEXT_CHARS:
+                continue
+
+            url_template, url_specific = templatize(capture['url'], tokens)
+            body_template, body_specific = templatize(capture.get('body') or '', tokens)
+            if not (url_specific or body_specific):
+                # Same request for every page: not the page's content
+                continue
+
+            templates.append({
+                'method': capture.get('method', 'GET'),
+                'url': url_template,
+                'body': body_template or None,
+                'headers': {k: v for k, v in (capture.get('headers') or {}).items() if k.lower() in REPLAY_HEADERS},
+                'text_chars': text_chars,
+                'failures': 0,
+            })
+
+        if not templates:
+            return 0
+
+        templates.sort(key=lambda t: t['text_chars'], reverse=True)
+        templates = templates[:MAX_TEMPLATES_PER_ORIGIN]
+        with self._lock:
+            self.profiles[origin_of(page_url)] = templates
+        print(f"  📼 Recorded {len(templates)} replayable API call(s) for {origin_of(page_url)}")
+        return len(templates)
+
+    def requests_for(self, page_url):
+        """Yield (template, method, url, headers, body) filled in for a page"""
+        tokens = page_tokens(page_url)
+        for template in list(self.profiles.get(origin_of(page_url), [])):
+            try:
+                url = template['url'].format(**tokens)
+                body = template['body'].format(**tokens) if template.get('body') else None
+            except (KeyError, IndexError, ValueError):
+                continue
+            yield template, template['method'], url, template['headers'], body
+
+    def mark(self, page_url, template, success):
+        """Track replay outcomes; templates that keep failing are dropped
+
+        Returns whether the profiles changed (and need saving).
+        """
+        with self._lock:
+            failures = 0 if success else template.get('failures', 0) + 1
+            if failures == template.get('failures', 0):
+                return False
+            template['failures'] = failures
+            if failures >= MAX_FAILURES:
+                origin = origin_of(page_url)
+                remaining = [t for t in self.profiles.get(origin, []) if t is not template]
+                if remaining:
+                    self.profiles[origin] = remaining
+                else:
+                    self.profiles.pop(origin, None)
+                print(f"  🗑️  Dropped failing API template for {origin}")
+            return True
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTML extraction backends on large pages
+
+Compares the legacy BeautifulSoup path (parse, decompose, get_text, then the
+separate image and meta-image scans) with the single-pass extractor for every
+installed backend. Pass HTML files as arguments, or run without arguments to
+use a generated article-style page.
+"""
+
+import contextlib
+import io
+import re
+import sys
+import time
+
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from benchmark_url_classifier import legacy_could_be_image, legacy_is_image_url
+from html_extract import BACKENDS, available_backends, extract_page
+from url_classifier import ImageURLClassifier
+
+PAGE_URL = "https://www.example.com/news/article.html"
+
+
+def generate_page(sections=400):
+    """Build a large page with nav, text blocks, images, inline styles and meta tags"""
+    parts = [
+        "<html><head><title>Benchmark Article</title>",
+        '<meta property="og:image" content="/images/og-card.jpg">',
+        '<meta name="twitter:image" content="https://cdn.example.com/twitter.png">',
+        '<meta name="description" content="A generated page">',
+        "<style>body { font-family: sans-serif; }</style>",
+        "<script>window.dataLayer = [];</script></head><body>",
+        "<nav>" + "".join(f'<a href="/section/{i}">Section {i}</a>' for i in range(50)) + "</nav>",
+    ]
+    for i in range(sections):
+        parts.append(
+            f'<div class="block" style="background-image: url(/bg/{i}.png)">'
+            f"<h2>Heading {i}</h2>"
+            f"<p>Paragraph {i} with <b>bold</b> and <a href='/link/{i}'>a link</a>. "
+            "Production achieved guidance for the financial year with strong margins.</p>"
+            f'<img src="/images/photo-{i}.jpg" data-src="/lazy/{i}.webp" '
+            f'srcset="/images/photo-{i}-480.jpg 480w, /images/photo-{i}-960.jpg 960w">'
+            f"<script>console.log({i});</script></div>"
+        )
+    parts.append("<footer>Copyright</footer></body></html>")
+    return "".join(parts)
+
+
+def legacy_find_images(soup, page_url):
+    """The original EnhancedWebScraper.find_images_on_page"""
+    images = []
+    
+    # Look for img tags with src
+    img_tags = soup.find_all('img')
+    print(f"  🔍 Found {len(img_tags)} <img> tags total")
+    
+    for i, img_tag in enumerate(img_tags, 1):
+        src = img_tag.get('src')
+        data_src = img_tag.get('data-src')  # Lazy loading
+        srcset = img_tag.get('srcset')  # Responsive images
+        
+        print(f"    Image {i}: src='{src}', data-src='{data_src}', srcset='{srcset}'")
+        
+        # Try different src attributes
+        potential_srcs = [src, data_src]
+        
+        # Parse srcset if available
+        if srcset:
+            srcset_urls = [url.strip().split()[0] for url in srcset.split(',')]
+            potential_srcs.extend(srcset_urls)
+        
+        for potential_src in potential_srcs:
+            if potential_src:
+                # Convert relative URLs to absolute
+                full_url = urljoin(page_url, potential_src)
+                
+                # Check if it's a valid image URL (more permissive)
+                if legacy_is_image_url(full_url) or legacy_could_be_image(full_url):
+                    images.append(full_url)
+                    print(f"      ✅ Added: {full_url}")
+                else:
+                    print(f"      ❌ Skipped (not image): {full_url}")
+    
+    # Also look for CSS background images
+    for element in soup.find_all(style=True):
+        style = element.get('style', '')
+        if 'background-image' in style:
+            matches = re.findall(r'background-image:\s*url\(["\']?([^"\')]+)["\']?\)', style)
+            for match in matches:
+                full_url = urljoin(page_url, match)
+                if legacy_is_image_url(full_url) or legacy_could_be_image(full_url):
+                    images.append(full_url)
+                    print(f"      ✅ Added CSS background: {full_url}")
+    
+    unique_images = list(set(images))  # Remove duplicates
+    print(f"  📷 Total unique images found: {len(unique_images)}")
+    return unique_images
+
+def legacy_find_meta_images(soup, page_url):
+    """The original EnhancedWebScraper.find_meta_images"""
+    images = []
+    
+    print(f"  🔍 Searching for meta images...")
+    
+    # OpenGraph image (multiple attribute styles)
+    og_selectors = [
+        ('meta', {'property': 'og:image'}),
+        ('meta', {'property': 'og:image:url'}),
+        ('meta', {'name': 'og:image'})
+    ]
+    
+    for tag, attrs in og_selectors:
+        og_image = soup.find(tag, attrs)
+        if og_image and og_image.get('content'):
+            img_url = urljoin(page_url, og_image['content'])
+            if legacy_is_image_url(img_url) or legacy_could_be_image(img_url):
+                images.append(img_url)
+                print(f"      ✅ Added OpenGraph image: {img_url}")
+    
+    # Twitter card images
+    twitter_selectors = [
+        ('meta', {'name': 'twitter:image'}),
+        ('meta', {'name': 'twitter:image:src'}),
+        ('meta', {'property': 'twitter:image'})
+    ]
+    
+    for tag, attrs in twitter_selectors:
+        twitter_image = soup.find(tag, attrs)
+        if twitter_image and twitter_image.get('content'):
+            img_url = urljoin(page_url, twitter_image['content'])
+            if legacy_is_image_url(img_url) or legacy_could_be_image(img_url):
+                images.append(img_url)
+                print(f"      ✅ Added Twitter image: {img_url}")
+    
+    # Generic meta images
+    meta_selectors = [
+        ('meta', {'name': 'image'}),
+        ('meta', {'name': 'thumbnail'}),
+        ('meta', {'property': 'image'})
+    ]
+    
+    for tag, attrs in meta_selectors:
+        meta_images = soup.find_all(tag, attrs)
+        for meta in meta_images:
+            if meta.get('content'):
+                img_url = urljoin(page_url, meta['content'])
+                if legacy_is_image_url(img_url) or legacy_could_be_image(img_url):
+                    images.append(img_url)
+                    print(f"      ✅ Added meta image: {img_url}")
+    
+    # Look for any meta tag with image-like content
+    all_metas = soup.find_all('meta')
+    for meta in all_metas:
+        content = meta.get('content', '')
+        if content and (legacy_is_image_url(content) or legacy_could_be_image(content)):
+            img_url = urljoin(page_url, content)
+            if img_url not in images:  # Avoid duplicates
+                images.append(img_url)
+                print(f"      ✅ Added discovered meta image: {img_url}")
+    
+    print(f"  📷 Meta images found: {len(images)}")
+    return images
+
+
+def legacy_extract(html):
+    """The original scrape_url extraction path"""
+    soup = BeautifulSoup(html, 'html.parser')
+    title = soup.find('title')
+    title_text = title.get_text().strip() if title else "No title"
+    images = legacy_find_images(soup, PAGE_URL)
+    meta_images = legacy_find_meta_images(soup, PAGE_URL)
+    for script in soup(['script', 'style', 'meta', 'link']):
+        script.decompose()
+    clean_text = re.sub(r'\s+', ' ', soup.get_text(separator=' ')).strip()
+    return title_text, clean_text, images, meta_images
+
+
+def time_call(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    pages = [(path, open(path, encoding='utf-8', errors='replace').read()) for path in sys.argv[1:]]
+    if not pages:
+        pages = [("generated", generate_page())]
+
+    repeat = 5
+
+    print("🚀 HTML extraction benchmark")
+    print(f"   Backends installed: {', '.join(available_backends())} (registered: {', '.join(BACKENDS)})")
+    print("=" * 80)
+
+    for name, html in pages:
+        print(f"\n📄 {name}: {len(html) / 1024:.0f} KB")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            legacy_time, legacy = time_call(lambda: legacy_extract(html), repeat)
+        print(f"   legacy bs4   {legacy_time * 1000:8.1f} ms  text={len(legacy[1])} chars  "
+              f"images={len(set(legacy[2]))}  meta={len(legacy[3])}")
+
+        for backend in available_backends():
+            elapsed, page = time_call(
+                lambda: extract_page(html, PAGE_URL, backend=backend, is_image=ImageURLClassifier().is_candidate),
+                repeat
+            )
+            print(f"   {backend:<12} {elapsed * 1000:8.1f} ms  text={len(page['text'])} chars  "
+                  f"images={len(page['images'])}  meta={len(page['meta_images'])}  "
+                  f"speedup={legacy_time / elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark OCR with and without preprocessing
+
+Runs Tesseract on each fixture image as is and after preprocess_image, and
+reports OCR time and word recall against the known text. Pass image files as
+arguments (time and output length only, no recall), or run without arguments
+to use a generated fixture set: a 4000px infographic, a small caption, light
+text on a dark banner and a tilted scan.
+"""
+
+import sys
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from ocr_engine import get_engine, psm_of, tesseract_available
+from ocr_pool import DEFAULT_OCR_CONFIG
+from ocr_preprocess import preprocess_image, preprocess_options
+
+LINES = [
+    "Tomingley production guidance FY2025",
+    "Gold ounces produced 120,000 to 135,000",
+    "All-in sustaining cost A$2,100 per ounce",
+    "Open pit and underground mining continue",
+]
+
+
+def _font(size):
+    try:
+        return ImageFont.truetype('DejaVuSans.ttf', size)
+    except OSError:
+        return ImageFont.load_default(size=size)
+
+
+def _text_image(size, font_size, background='white', ink='black'):
+    img = Image.new('RGB', size, background)
+    draw = ImageDraw.Draw(img)
+    for i, line in enumerate(LINES):
+        draw.text((font_size, font_size + i * font_size * 2), line, fill=ink, font=_font(font_size))
+    return img
+
+
+def generate_fixtures():
+    """(name, image, expected text) for each generated fixture"""
+    expected = ' '.join(LINES)
+    return [
+        ("infographic 4000px", _text_image((4000, 1600), 140), expected),
+        ("small caption", _text_image((640, 140), 12), expected),
+        ("dark banner", _text_image((1600, 500), 40, background=(20, 40, 90), ink=(235, 235, 235)), expected),
+        ("tilted scan", _text_image((1800, 700), 44).rotate(4, expand=True, fillcolor='white'), expected),
+    ]
+
+
+def word_recall(expected, text):
+    """Share of expected words found in the OCR output"""
+    expected_words = expected.lower().split()
+    found = set(text.lower().split())
+    return sum(word in found for word in expected_words) / len(expected_words)
+
+
+def run(img):
+    start = time.perf_counter()
+    text, _ = get_engine().recognize(img, psm_of(DEFAULT_OCR_CONFIG))
+    return time.perf_counter() - start, ' '.join(text.split())
+
+
+def main():
+    if not tesseract_available():
+        print("❌ Tesseract is not installed; install it to run this benchmark")
+        sys.exit(1)
+    print(f"🔧 OCR engine: {get_engine().name}")
+
+    if sys.argv[1:]:
+        fixtures = [(path, Image.open(path), None) for path in sys.argv[1:]]
+    else:
+        fixtures = generate_fixtures()
+
+    options = preprocess_options({'deskew': True})
+    print("🚀 OCR preprocessing benchmark")
+    print("=" * 80)
+
+    totals = [0.0, 0.0]
+    for name, img, expected in fixtures:
+        raw_time, raw_text = run(img.convert('RGB'))
+
+        start = time.perf_counter()
+        prepared = preprocess_image(img, options)
+        prep_time = time.perf_counter() - start
+        ocr_time, prepared_text = run(prepared)
+
+        totals[0] += raw_time
+        totals[1] += prep_time + ocr_time
+        print(f"\n📷 {name}: {img.width}x{img.height} -> {prepared.width}x{prepared.height}")
+        for label, elapsed, text in (("raw", raw_time, raw_text),
+                                     ("preprocessed", prep_time + ocr_time, prepared_text)):
+            recall = f"  recall={word_recall(expected, text):.0%}" if expected else ""
+            print(f"   {label:<13} {elapsed * 1000:8.0f} ms  chars={len(text)}{recall}")
+
+    print(f"\n⏱️  Total: raw {totals[0]:.2f}s, preprocessed {totals[1]:.2f}s "
+          f"(speedup {totals[0] / totals[1]:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark tiled OCR against single-pass OCR on very large images
+
+Runs each fixture through ocr_image_bytes in one Tesseract pass and through
+ocr_tiled on the OCR process pool, and reports wall time and word recall
+against the known text. Pass image files as arguments (time and output length
+only, no recall), or run without arguments to use generated tall
+infographics (1200x8000 and 1600x12000).
+"""
+
+import sys
+import time
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont
+
+from benchmark_ocr_preprocess import word_recall
+from ocr_engine import get_engine, tesseract_available
+from ocr_pool import get_ocr_pool, ocr_image_bytes, ocr_tiled, pool_size, shutdown_ocr_pool, TILE_MIN_PIXELS
+from ocr_preprocess import preprocess_options
+
+ROWS = [
+    "Quarter {n} gold production {oz} ounces",
+    "Cash flow from operations A${cash} million",
+    "Drilling at site {n} intersected {grade} g/t gold",
+]
+
+
+def _font(size):
+    try:
+        return ImageFont.truetype('DejaVuSans.ttf', size)
+    except OSError:
+        return ImageFont.load_default(size=size)
+
+
+def infographic(width, height, font_size=36):
+    """PNG bytes of a tall image filled with numbered lines, and its text"""
+    img = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(img)
+    font = _font(font_size)
+    lines = []
+    y = font_size
+    n = 0
+    while y < height - font_size * 2:
+        line = ROWS[n % len(ROWS)].format(n=n + 1, oz=10_000 + n * 37, cash=40 + n, grade=1 + n % 9)
+        draw.text((font_size, y), line, fill='black', font=font)
+        lines.append(line)
+        y += font_size * 2
+        n += 1
+    buffer = BytesIO()
+    img.save(buffer, 'PNG')
+    return buffer.getvalue(), ' '.join(lines)
+
+
+def main():
+    if not tesseract_available():
+        print("❌ Tesseract is not installed; install it to run this benchmark")
+        sys.exit(1)
+    print(f"🔧 OCR engine: {get_engine().name}, {pool_size()} pool workers")
+
+    if sys.argv[1:]:
+        fixtures = [(path, open(path, 'rb').read(), None) for path in sys.argv[1:]]
+    else:
+        fixtures = [("infographic 1200x8000", *infographic(1200, 8000)),
+                    ("infographic 1600x12000", *infographic(1600, 12000))]
+
+    options = {'preprocess': preprocess_options()}
+    pool = get_ocr_pool()
+    print("🚀 Tiled OCR benchmark")
+    print("=" * 80)
+
+    try:
+        for name, image_bytes, expected in fixtures:
+            width, height = Image.open(BytesIO(image_bytes)).size
+            print(f"\n📷 {name}: {width}x{height}")
+
+            start = time.perf_counter()
+            single = pool.submit(ocr_image_bytes, image_bytes, **options).result()
+            single_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            tiled = ocr_tiled(image_bytes, pool, **options)
+            tiled_time = time.perf_counter() - start
+            if tiled is None:
+                print(f"   below the tiling threshold ({TILE_MIN_PIXELS:,} pixels), skipped")
+                continue
+
+            for label, elapsed, outcome in (("single pass", single_time, single),
+                                            (f"{tiled['tiles']} bands", tiled_time, tiled)):
+                text = outcome['text'] or ''
+                recall = f"  recall={word_recall(expected, text):.0%}" if expected else ""
+                print(f"   {label:<12} {elapsed:7.2f} s  chars={len(text)}{recall}")
+            print(f"   speedup {single_time / tiled_time:.1f}x")
+    finally:
+        shutdown_ocr_pool()
+
+
+if __name__ == "__main__":
+    main()
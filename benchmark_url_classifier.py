@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the image URL classifier
+
+Classifies 100k generated URLs with the legacy is_image_url/could_be_image
+checks and with the compiled classifier (uncached and memoised), and reports
+how often the accept/reject decisions agree.
+"""
+
+import random
+import time
+from urllib.parse import urlparse
+
+from url_classifier import ImageURLClassifier, classify_url, NOT_IMAGE
+
+URL_COUNT = 100_000
+
+
+def legacy_is_image_url(url):
+    """The original EnhancedWebScraper.is_image_url"""
+    image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', '.svg']
+    path = urlparse(url.lower()).path
+    for ext in image_extensions:
+        if path.endswith(ext):
+            return True
+    return any(url.lower().endswith(ext) for ext in image_extensions)
+
+
+def legacy_could_be_image(url):
+    """The original EnhancedWebScraper.could_be_image"""
+    url_lower = url.lower()
+    skip_patterns = ['javascript:', 'data:text', '.css', '.js', '.html', '.php']
+    if any(pattern in url_lower for pattern in skip_patterns):
+        return False
+    if url_lower.startswith('data:image/'):
+        return True
+    image_indicators = ['image', 'img', 'photo', 'picture', 'thumbnail', 'avatar', 'resizer', 'cdn']
+    if any(indicator in url_lower for indicator in image_indicators):
+        return True
+    image_service_patterns = ['/resizer/', '/resize/', '/thumb/', '/media/', '/assets/images/']
+    return any(pattern in url_lower for pattern in image_service_patterns)
+
+
+def generate_urls(count, seed=42):
+    """Mix of image, image-service, script, page and tracking URLs, with repeats as on real pages"""
+    rng = random.Random(seed)
+    hosts = ['www.example.com', 'cdn.example.net', 'static.news.com.au', 'images.listcorp.com']
+    templates = [
+        'https://{host}/uploads/{n}/chart-{n}.png',
+        'https://{host}/assets/images/banner-{n}.JPG?v={n}',
+        'https://{host}/resizer/{n}/photo.webp#crop',
+        'https://{host}/media/{n}',
+        'https://{host}/static/js/app.{n}.js',
+        'https://{host}/styles/site-{n}.css',
+        'https://{host}/news/article-{n}.html',
+        'https://{host}/track/pixel?id={n}',
+        'https://{host}/avatar/{n}?s=64',
+        'javascript:void({n})',
+        'data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP{n}',
+    ]
+    distinct = [
+        rng.choice(templates).format(host=rng.choice(hosts), n=rng.randint(1, 10_000))
+        for _ in range(count // 4)
+    ]
+    return [rng.choice(distinct) for _ in range(count)]
+
+
+def timed(label, func, urls, baseline=None):
+    start = time.perf_counter()
+    decisions = [func(url) for url in urls]
+    elapsed = time.perf_counter() - start
+    speedup = f"  speedup={baseline / elapsed:.1f}x" if baseline else ""
+    print(f"   {label:<22} {elapsed * 1000:8.1f} ms  ({elapsed / len(urls) * 1e9:6.0f} ns/url){speedup}")
+    return elapsed, decisions
+
+
+def main():
+    urls = generate_urls(URL_COUNT)
+    print(f"🚀 URL classifier benchmark: {len(urls):,} URLs ({len(set(urls)):,} distinct)")
+    print("=" * 80)
+
+    legacy_time, legacy = timed(
+        "legacy (both checks)", lambda url: legacy_is_image_url(url) or legacy_could_be_image(url), urls
+    )
+    _, compiled = timed("compiled", lambda url: classify_url(url) != NOT_IMAGE, urls, legacy_time)
+    classifier = ImageURLClassifier()
+    _, memoised = timed("compiled + memo", classifier.is_candidate, urls, legacy_time)
+
+    agreement = sum(a == b for a, b in zip(legacy, compiled)) / len(urls)
+    print(f"\n✅ Decisions agree with legacy checks on {agreement:.2%} of URLs")
+    assert compiled == memoised
+
+
+if __name__ == "__main__":
+    main()
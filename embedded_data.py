@@ -0,0 +1,151 @@
+"""
+Embedded JSON data extraction.
+Pulls text, title, date and image URLs from __NEXT_DATA__, ld+json, JSON script
+blocks and window.__STATE__ assignments, so the scraper can skip the browser.
+"""
+
+import html as html_lib
+import json
+import re
+from urllib.parse import urljoin
+
+from url_classifier import classify_url, DEFINITE_IMAGE, NOT_IMAGE
+
+SCRIPT_RE = re.compile(r'<script\b([^>]*)>(.*?)</script\s*>', re.I | re.S)
+SCRIPT_TYPE_RE = re.compile(r'type\s*=\s*["\']?([\w/+.-]+)', re.I)
+SCRIPT_ID_RE = re.compile(r'id\s*=\s*["\']?([\w-]+)', re.I)
+WINDOW_STATE_RE = re.compile(r'window\.(__[A-Za-z0-9_]+__|[A-Za-z_]*[Ss]tate)\s*=\s*(?=[{\[])')
+TAG_RE = re.compile(r'<[^>]+>')
+DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+# Keys, in order of preference, that name each field
+TITLE_KEYS = ('headline', 'title', 'name')
+DATE_KEYS = ('datePublished', 'publishedAt', 'published_at', 'publishDate', 'publishedDate',
+             'releaseDate', 'date', 'dateCreated', 'createdAt')
+TEXT_KEYS = {'articleBody', 'body', 'content', 'text', 'description', 'summary', 'abstract', 'html', 'bodyHtml'}
+IMAGE_KEYS = {'image', 'images', 'thumbnail', 'thumbnailUrl', 'contentUrl', 'src', 'imageUrl', 'ogImage'}
+
+MAX_DEPTH = 40
+MIN_LOOSE_TEXT_CHARS = 200
+MAX_TEXT_BLOCKS = 200
+
+
+def _payloads(html):
+    """Yield (source, parsed JSON) for every embedded payload in the page"""
+    decoder = json.JSONDecoder()
+
+    for match in SCRIPT_RE.finditer(html):
+        attrs, body = match.group(1), match.group(2).strip()
+        if not body:
+            continue
+
+        type_match = SCRIPT_TYPE_RE.search(attrs)
+        script_type = type_match.group(1).lower() if type_match else ''
+        id_match = SCRIPT_ID_RE.search(attrs)
+        script_id = id_match.group(1) if id_match else ''
+
+        if script_type in ('application/ld+json', 'application/json'):
+            source = script_id or script_type
+            try:
+                yield source, json.loads(body)
+            except ValueError:
+                continue
+        elif script_type in ('', 'text/javascript', 'application/javascript', 'module'):
+            # Inline state assignments: window.__STATE__ = {...};
+            for state in WINDOW_STATE_RE.finditer(body):
+                try:
+                    value, _ = decoder.raw_decode(body, state.end())
+                except ValueError:
+                    continue
+                yield f"window.{state.group(1)}", value
+
+
+def _clean_text(value):
+    if '<' in value and '>' in value:
+        value = TAG_RE.sub(' ', value)
+    return ' '.join(html_lib.unescape(value).split())
+
+
+class _Harvest:
+    """Fields gathered while walking the payloads"""
+
+    def __init__(self, page_url):
+        self.page_url = page_url
+        self.titles = {}
+        self.dates = {}
+        self.texts = {}
+        self.images = {}
+
+    def walk(self, value, key=None, depth=0):
+        if depth > MAX_DEPTH:
+            return
+        if isinstance(value, dict):
+            for child_key, child in value.items():
+                self.walk(child, child_key, depth + 1)
+        elif isinstance(value, list):
+            for child in value:
+                self.walk(child, key, depth + 1)
+        elif isinstance(value, str) and value.strip():
+            self._string(key, value.strip())
+
+    def _string(self, key, value):
+        if key in TITLE_KEYS and len(value) < 300:
+            self.titles.setdefault(key, value)
+        if key in DATE_KEYS and DATE_RE.match(value):
+            self.dates.setdefault(key, value)
+
+        looks_like_url = value.startswith(('http://', 'https://', '//', '/'))
+        if looks_like_url and ' ' not in value:
+            category = classify_url(value)
+            if category == DEFINITE_IMAGE or (key in IMAGE_KEYS and category != NOT_IMAGE):
+                self.images[urljoin(self.page_url, value)] = None
+            return
+
+        if key in TEXT_KEYS or (len(value) >= MIN_LOOSE_TEXT_CHARS and value.count(' ') >= 20):
+            text = _clean_text(value)
+            if len(text) >= 20:
+                self.texts[text] = None
+
+    def result(self, sources):
+        title = next((self.titles[k] for k in TITLE_KEYS if k in self.titles), None)
+        date = next((self.dates[k] for k in DATE_KEYS if k in self.dates), None)
+
+        # Drop text blocks wholly contained in a longer one (summary vs full body)
+        order = {text: index for index, text in enumerate(self.texts)}
+        kept = []
+        for text in sorted(self.texts, key=len, reverse=True)[:MAX_TEXT_BLOCKS]:
+            if not any(text in longer for longer in kept):
+                kept.append(text)
+        kept.sort(key=order.get)
+
+        return {
+            'title': _clean_text(title) if title else None,
+            'date': date,
+            'text': '\n\n'.join(kept),
+            'images': list(self.images),
+            'sources': sources,
+        }
+
+
+def extract_from_payloads(payloads, page_url):
+    """Extract title, date, text and image URLs from (source, parsed JSON) pairs
+
+    Returns None when there are no payloads.
+    """
+    harvest = _Harvest(page_url)
+    sources = []
+    for source, payload in payloads:
+        sources.append(source)
+        harvest.walk(payload)
+
+    if not sources:
+        return None
+    return harvest.result(sources)
+
+
+def extract_embedded_data(html, page_url):
+    """Extract title, date, text and image URLs from JSON embedded in the HTML
+
+    Returns None when the page carries no parseable payload.
+    """
+    return extract_from_payloads(_payloads(html or ''), page_url)
@@ -4,12 +4,15 @@ Example usage of the Enhanced Web Scraper with OCR
 """
 
 from web_scraper import EnhancedWebScraper
+import asyncio
 import json
 
 def scrape_single_url():
     """Example: Scrape a single URL with OCR"""
-    scraper = EnhancedWebScraper(delay=2)
-    
+    asyncio.run(scrape_urls())
+
+async def scrape_urls():
+    """Scrape several URLs with one scraper"""
     # Example URLs to test
     urls = [
         "https://www.listcorp.com/asx/alkane-researches-limited/news/tomingley-fy2025-production-achievements-guidance-3210664.html",
@@ -17,37 +20,44 @@ def scrape_single_url():
         # Add your own URLs here
     ]
     
-    for url in urls:
-        print(f"\n{'='*80}")
-        print(f"Testing URL: {url}")
-        print(f"{'='*80}")
-        
-        # Scrape with OCR enabled
-        result = scraper.scrape_url(url, extract_images=True)
-        
-        # Print summary
-        if 'error' not in result:
-            print(f"\n✅ Success!")
-            print(f"   Title: {result.get('title', 'No title')}")
-            print(f"   Text length: {len(result.get('page_text', ''))} chars")
-            print(f"   Images found: {result.get('images_found', 0)}")
-            print(f"   Images with text: {len(result.get('image_texts', []))}")
+    # One scraper (and connection pool) for all URLs, closed when done
+    async with EnhancedWebScraper(delay=2) as scraper:
+        for url in urls:
+            print(f"\n{'='*80}")
+            print(f"Testing URL: {url}")
+            print(f"{'='*80}")
             
-            # Show extracted image texts
-            for img_text in result.get('image_texts', []):
-                print(f"   📷 {img_text['image_url'][:60]}...")
-                print(f"      Text: {img_text['text'][:100]}...")
-        else:
-            print(f"\n❌ Error: {result.get('error', 'Unknown error')}")
+            # Scrape with OCR enabled
+            result = await scraper.scrape_url(url, extract_images=True)
+            print_summary(result)
+
+def print_summary(result):
+    """Print the outcome of one scrape"""
+    if 'error' not in result:
+        print(f"\n✅ Success!")
+        print(f"   Title: {result.get('title', 'No title')}")
+        print(f"   Text length: {len(result.get('page_text', ''))} chars")
+        print(f"   Images found: {result.get('images_found', 0)}")
+        print(f"   Images with text: {len(result.get('image_texts', []))}")
+        
+        # Show extracted image texts
+        for img_text in result.get('image_texts', []):
+            print(f"   📷 {img_text['image_url'][:60]}...")
+            print(f"      Text: {img_text['text'][:100]}...")
+    else:
+        print(f"\n❌ Error: {result.get('error', 'Unknown error')}")
+
+async def scrape(url, delay, **options):
+    """Scrape one URL with a scraper that is closed afterwards"""
+    async with EnhancedWebScraper(delay=delay) as scraper:
+        return await scraper.scrape_url(url, **options)
 
 def scrape_without_ocr():
     """Example: Scrape without OCR for faster processing"""
-    scraper = EnhancedWebScraper(delay=1)
-    
     url = "https://www.listcorp.com/asx/alkane-researches-limited/news/tomingley-fy2025-production-achievements-guidance-3210664.html"
     
     print(f"\n🚀 Fast scraping (no OCR): {url}")
-    result = scraper.scrape_url(url, extract_images=False)
+    result = asyncio.run(scrape(url, delay=1, extract_images=False))
     
     if 'error' not in result:
         print(f"✅ Page scraped successfully!")
@@ -55,9 +65,6 @@ def scrape_without_ocr():
 
 def custom_scraper_usage():
     """Example: Custom usage with different settings"""
-    # Create scraper with custom delay
-    scraper = EnhancedWebScraper(delay=3)
-    
     # Custom URL
     url = input("Enter URL to scrape (or press Enter for default): ").strip()
     if not url:
@@ -69,7 +76,8 @@ def custom_scraper_usage():
     print(f"\n🔍 Scraping: {url}")
     print(f"📷 OCR enabled: {use_ocr}")
     
-    result = scraper.scrape_url(url, extract_images=use_ocr)
+    # Scraper with custom delay
+    result = asyncio.run(scrape(url, delay=3, extract_images=use_ocr))
     
     # Save to file
     filename = f"scrape_result_{int(time.time())}.json"
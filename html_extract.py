@@ -0,0 +1,304 @@
+"""
+Single-pass HTML extraction with pluggable parser backends (lxml, selectolax,
+BeautifulSoup). Collects the title, visible text, image candidates (one variant
+per responsive image) and meta images.
+"""
+
+import re
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+# Elements whose text is never visible
+SKIP_TEXT_TAGS = {'script', 'style'}
+
+# Meta names/properties that are expected to hold an image URL
+META_IMAGE_KEYS = {
+    'og:image', 'og:image:url', 'twitter:image', 'twitter:image:src', 'image', 'thumbnail'
+}
+
+BACKGROUND_IMAGE_RE = re.compile(r'background-image:\s*url\(["\']?([^"\')]+)["\']?\)')
+
+# Width at which text in a typical infographic or scan is large enough for OCR
+TARGET_IMAGE_WIDTH = 1600
+
+# <source type="..."> formats Pillow cannot decode
+UNDECODABLE_TYPES = {'image/avif', 'image/jxl', 'image/heic', 'image/svg+xml'}
+
+SRCSET_URL_RE = re.compile(r'[\s,]*(\S+)')
+DESCRIPTOR_RE = re.compile(r'^(\d+(?:\.\d+)?)([wx])$', re.IGNORECASE)
+
+
+def normalize_whitespace(text):
+    """Collapse runs of whitespace into single spaces"""
+    return ' '.join(text.split())
+
+
+def parse_srcset(srcset):
+    """[(url, descriptor)] from a srcset attribute; descriptor is e.g. '480w', '2x' or ''
+
+    URLs may contain commas (image CDNs use them for resize options), so a URL
+    runs up to the next whitespace as in the HTML spec.
+    """
+    candidates = []
+    position = 0
+    while True:
+        match = SRCSET_URL_RE.match(srcset, position)
+        if not match:
+            return candidates
+        url = match.group(1)
+        position = match.end()
+        if url.endswith(','):
+            url, descriptor = url.rstrip(','), ''
+        else:
+            end = srcset.find(',', position)
+            end = len(srcset) if end == -1 else end
+            descriptor = srcset[position:end].strip()
+            position = end + 1
+        if url:
+            candidates.append((url, descriptor))
+
+
+def image_candidates(attrs, sources=()):
+    """(url, width, density) for every variant of one <img> and its <picture> <source>s
+
+    width is None when unknown; data-srcset and data-src win over srcset and src.
+    """
+    declared = attrs.get('width') or ''
+    declared_width = int(declared) if declared.isdigit() else None
+
+    srcsets = [source.get('srcset') for source in sources
+               if (source.get('type') or '').lower() not in UNDECODABLE_TYPES]
+    srcsets.append(attrs.get('data-srcset') or attrs.get('srcset'))
+
+    candidates = []
+    for srcset in srcsets:
+        for url, descriptor in parse_srcset(srcset or ''):
+            match = DESCRIPTOR_RE.match(descriptor)
+            value, unit = (float(match.group(1)), match.group(2).lower()) if match else (1.0, 'x')
+            if unit == 'w':
+                candidates.append((url, int(value), None))
+            else:
+                candidates.append((url, declared_width and int(declared_width * value), value))
+
+    fallback = attrs.get('data-src') or attrs.get('src')
+    if fallback and not (candidates and fallback.startswith('data:')):
+        candidates.append((fallback, declared_width, 1.0))
+    return candidates
+
+
+def best_candidate(candidates, target_width=TARGET_IMAGE_WIDTH):
+    """The URL of the smallest variant at least target_width wide, else the largest, or None"""
+    if not candidates:
+        return None
+    sized = [candidate for candidate in candidates if candidate[1]]
+    if sized:
+        large_enough = [candidate for candidate in sized if candidate[1] >= target_width]
+        if large_enough:
+            return min(large_enough, key=lambda candidate: candidate[1])[0]
+        return max(sized, key=lambda candidate: candidate[1])[0]
+    return max(candidates, key=lambda candidate: candidate[2] or 0)[0]
+
+
+class PageCollector:
+    """Accumulates extraction results while a backend walks the document"""
+
+    def __init__(self, page_url, is_image):
+        self.page_url = page_url
+        self.is_image = is_image or (lambda url: True)
+        self.title = None
+        self.text_parts = []
+        self.images = {}
+        self.meta_images = {}
+        self.sources = []  # <source> attributes of the enclosing <picture>
+
+    def start_picture(self):
+        self.sources = []
+
+    def add_source(self, attrs):
+        if attrs.get('srcset'):
+            self.sources.append(attrs)
+
+    def add_img(self, attrs):
+        candidates = []
+        for url, width, density in image_candidates(attrs, self.sources):
+            full_url = urljoin(self.page_url, url.strip())
+            if self.is_image(full_url):
+                candidates.append((full_url, width, density))
+        self.sources = []
+
+        full_url = best_candidate(candidates)
+        if full_url:
+            self.images[full_url] = None
+
+    def add_style(self, style):
+        if 'background-image' in style:
+            for match in BACKGROUND_IMAGE_RE.findall(style):
+                full_url = urljoin(self.page_url, match)
+                if self.is_image(full_url):
+                    self.images[full_url] = None
+
+    def add_meta(self, attrs):
+        content = attrs.get('content')
+        if not content:
+            return
+
+        key = (attrs.get('property') or attrs.get('name') or '').lower()
+        full_url = urljoin(self.page_url, content)
+        if key in META_IMAGE_KEYS:
+            if self.is_image(full_url):
+                self.meta_images[full_url] = None
+        elif self.is_image(content):
+            self.meta_images[full_url] = None
+
+    def result(self, backend):
+        return {
+            'title': self.title or "No title",
+            'text': normalize_whitespace(' '.join(self.text_parts)),
+            'images': list(self.images),
+            'meta_images': list(self.meta_images),
+            'backend': backend,
+        }
+
+
+def _visit_element(collector, tag, attrs):
+    if tag == 'img':
+        collector.add_img(attrs)
+    elif tag == 'picture':
+        collector.start_picture()
+    elif tag == 'source':
+        collector.add_source(attrs)
+    elif tag == 'meta':
+        collector.add_meta(attrs)
+
+    style = attrs.get('style')
+    if style:
+        collector.add_style(style)
+
+
+def parse_lxml(html):
+    """Parse HTML into an lxml element tree, dropping comments"""
+    import lxml.html
+
+    # Removing comments at parse time keeps their tail text in the tree
+    parser = lxml.html.HTMLParser(remove_comments=True, remove_pis=True)
+    try:
+        return lxml.html.fromstring(html, parser=parser)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        return lxml.html.fromstring(html.encode('utf-8'), parser=parser)
+
+
+def _extract_lxml(html, page_url, is_image):
+    from lxml import etree
+
+    collector = PageCollector(page_url, is_image)
+    root = parse_lxml(html)
+
+    for event, element in etree.iterwalk(root, events=('start', 'end')):
+        tag = element.tag
+        if not isinstance(tag, str):
+            continue
+
+        if event == 'start':
+            if tag not in SKIP_TEXT_TAGS and element.text:
+                collector.text_parts.append(element.text)
+            if tag == 'title' and collector.title is None:
+                collector.title = element.text_content().strip()
+            _visit_element(collector, tag, element.attrib)
+        elif element.tail:
+            collector.text_parts.append(element.tail)
+
+    return collector.result('lxml')
+
+
+def _extract_selectolax(html, page_url, is_image):
+    from selectolax.lexbor import LexborHTMLParser
+
+    collector = PageCollector(page_url, is_image)
+    tree = LexborHTMLParser(html)
+
+    for node in tree.root.traverse(include_text=True):
+        tag = node.tag
+        if tag == '-text':
+            parent = node.parent
+            if parent is None or parent.tag not in SKIP_TEXT_TAGS:
+                text = node.text_content
+                if text:
+                    collector.text_parts.append(text)
+                    if parent is not None and parent.tag == 'title' and collector.title is None:
+                        collector.title = text.strip()
+        elif not tag.startswith('-'):
+            _visit_element(collector, tag, node.attributes)
+
+    return collector.result('selectolax')
+
+
+def _extract_bs4(html, page_url, is_image):
+    collector = PageCollector(page_url, is_image)
+    soup = BeautifulSoup(html, 'html.parser')
+
+    title = soup.find('title')
+    if title:
+        collector.title = title.get_text().strip()
+
+    for element in soup.find_all(True):
+        _visit_element(collector, element.name, element.attrs)
+
+    for element in soup(['script', 'style', 'meta', 'link']):
+        element.decompose()
+    collector.text_parts.append(soup.get_text(separator=' '))
+
+    return collector.result('bs4')
+
+
+BACKENDS = {
+    'lxml': ('lxml', _extract_lxml),
+    'selectolax': ('selectolax', _extract_selectolax),
+    'bs4': ('bs4', _extract_bs4),
+}
+
+# Preference order for backend='auto'
+AUTO_ORDER = ['lxml', 'selectolax', 'bs4']
+
+
+def backend_available(name):
+    """Return True if the parser backend's module can be imported"""
+    if name not in BACKENDS:
+        return False
+    try:
+        __import__(BACKENDS[name][0])
+        return True
+    except ImportError:
+        return False
+
+
+def available_backends():
+    """List installed backends in auto-selection order"""
+    return [name for name in AUTO_ORDER if backend_available(name)]
+
+
+def resolve_backend(backend='auto'):
+    """Return the backend name to use, falling back to BeautifulSoup"""
+    if backend != 'auto' and backend_available(backend):
+        return backend
+    return next(name for name in AUTO_ORDER if backend_available(name))
+
+
+def extract_page(html, page_url, backend='auto', is_image=None):
+    """Extract title, visible text, image candidates and meta images in one pass
+
+    is_image is called with each absolute candidate URL and decides whether it
+    is kept. Returns a dict with title, text, images, meta_images and backend.
+    """
+    name = resolve_backend(backend)
+    if not html or not html.strip():
+        return PageCollector(page_url, is_image).result(name)
+
+    try:
+        return BACKENDS[name][1](html, page_url, is_image)
+    except Exception as e:
+        if name == 'bs4':
+            raise
+        print(f"  ⚠️  {name} extraction failed ({e}), falling back to BeautifulSoup")
+        return _extract_bs4(html, page_url, is_image)
@@ -0,0 +1,79 @@
+"""
+Header-only image pre-qualification.
+Format and dimensions come from the first few KB of each image, so tiny images
+and SVGs are dropped and the rest ranked before any full download.
+"""
+
+import base64
+import warnings
+from io import BytesIO
+
+from PIL import Image
+
+PROBE_CHUNK_BYTES = 4096
+PROBE_MAX_BYTES = 65536  # JPEGs with large EXIF blocks put the frame header late
+
+MIN_SIDE = 50  # Icons, avatars and spacers are smaller than this on one side
+MIN_AREA = 20000  # Roughly 140x140; smaller images rarely hold readable text
+
+
+def parse_image_header(data):
+    """Return (format, width, height) from the start of an image, or None if incomplete
+
+    SVG documents are reported as ('SVG', None, None).
+    """
+    head = data[:256].lstrip().lower()
+    if head.startswith((b'<svg', b'<?xml')) and b'<svg' in data[:1024].lower():
+        return 'SVG', None, None
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # Truncated TIFF headers warn
+            img = Image.open(BytesIO(data))
+        width, height = img.size
+        return img.format, width, height
+    except Exception:
+        return None
+
+
+def decode_data_url(url):
+    """Bytes of a base64 data:image/ URL, or None"""
+    header, _, payload = url.partition(',')
+    if not header.lower().startswith('data:image/') or ';base64' not in header.lower():
+        return None
+    try:
+        return base64.b64decode(payload)
+    except ValueError:
+        return None
+
+
+def qualifies(probe):
+    """Whether a probed image is worth OCR; unknown dimensions get the benefit of the doubt"""
+    if probe is None:
+        return True
+    image_format, width, height = probe
+    if image_format == 'SVG':
+        return False
+    if width is None or height is None:
+        return True
+    if width <= 1 or height <= 1:
+        return False
+    return min(width, height) >= MIN_SIDE and width * height >= MIN_AREA
+
+
+def rank_images(image_urls, probes):
+    """Qualifying images, largest known area first, then unknown sizes in page order
+
+    probes maps URL to parse_image_header output; URLs missing from it are dropped.
+    """
+    known = []
+    unknown = []
+    for index, image_url in enumerate(image_urls):
+        if image_url not in probes or not qualifies(probes[image_url]):
+            continue
+        probe = probes[image_url]
+        if probe is None or probe[1] is None:
+            unknown.append(image_url)
+        else:
+            known.append((-probe[1] * probe[2], index, image_url))
+    return [image_url for _, _, image_url in sorted(known)] + unknown
@@ -1,19 +1,45 @@
-from fastapi import FastAPI, Query, HTTPException
-from web_scraper import EnhancedWebScraper, check_tesseract_available
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, HTTPException, Request
+from web_scraper import EnhancedWebScraper, check_tesseract_available, ocr_cache
+from ocr_engine import get_engine
+from scraper_executors import shutdown_executors
+from ocr_pool import shutdown_ocr_pool
 from pydantic import BaseModel
 from typing import Optional
 import json
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """One scraper per worker process: its HTTP client, browser and OCR pool live as long as the worker"""
+    # Probe Tesseract once; health checks then read the cached result
+    if check_tesseract_available():
+        print(f"✅ Tesseract OCR is available ({get_engine().name} engine)")
+    else:
+        print("⚠️  Tesseract OCR not found - OCR features will be disabled")
+    app.state.scraper = EnhancedWebScraper()
+    try:
+        yield
+    finally:
+        await app.state.scraper.aclose()
+        shutdown_ocr_pool()
+        shutdown_executors()
+        ocr_cache.close()
+
 app = FastAPI(
     title="Smart Scraper with OCR",
     description="Web scraper that can extract text from web pages and images using OCR",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 class ScrapeRequest(BaseModel):
     url: str
     extract_images: bool = True
-    delay: int = 2
+    delay: int = 0
+    timeout: Optional[float] = None
+    content_mode: str = "full"
+    preprocess: bool = True
+    deskew: bool = False
 
 @app.get("/")
 async def root():
@@ -22,7 +48,7 @@ async def root():
         "endpoints": {
             "/smart-scrape": "GET - Scrape a URL with optional OCR",
             "/health": "GET - Health check",
-            "/ocr-status": "GET - Check OCR availability"
+            "/ocr-status": "GET - Check OCR availability and OCR cache hit rates"
         }
     }
 
@@ -35,21 +61,30 @@ async def health_check():
 
 @app.get("/ocr-status")
 async def ocr_status():
+    ocr_available = check_tesseract_available()
     return {
-        "ocr_available": check_tesseract_available(),
-        "message": "OCR is available" if check_tesseract_available() else "OCR not available"
+        "ocr_available": ocr_available,
+        "ocr_engine": get_engine().name if ocr_available else None,
+        "message": "OCR is available" if ocr_available else "OCR not available",
+        "ocr_cache": ocr_cache.stats()
     }
 
 @app.get("/smart-scrape")
 async def smart_scrape(
+    http_request: Request,
     url: str = Query(default="https://httpbin.org/html", description="URL to scrape"),
     extract_images: bool = Query(default=True, description="Whether to extract text from images"),
-    delay: int = Query(default=2, description="Delay between requests in seconds")
+    delay: int = Query(default=0, description="Minimum seconds between page requests to the same host (0: no pacing)"),
+    timeout: Optional[float] = Query(default=None, description="Per-request timeout override in seconds (adaptive per domain if omitted)"),
+    content_mode: str = Query(default="full", description="'full' for the whole page, 'main' for the article body and its images only"),
+    preprocess: bool = Query(default=True, description="Grayscale, resize and binarise images before OCR"),
+    deskew: bool = Query(default=False, description="Straighten tilted text before OCR (with preprocess)")
 ):
     """Scrape a URL and optionally extract text from images using OCR"""
     try:
-        scraper = EnhancedWebScraper(delay=delay)
-        result = scraper.scrape_url(url, extract_images=extract_images)
+        result = await http_request.app.state.scraper.scrape_url(
+            url, extract_images=extract_images, timeout=timeout, content_mode=content_mode,
+            preprocess={'deskew': deskew} if preprocess else False, delay=delay)
         
         if "error" in result:
             raise HTTPException(status_code=400, detail=result["error"])
@@ -59,6 +94,11 @@ async def smart_scrape(
             "url": result.get("url"),
             "title": result.get("title", "No title"),
             "text_length": len(result.get("page_text", "")),
+            "method": result.get("method"),
+            "published_date": result.get("published_date"),
+            "content_mode": result.get("content_mode", "full"),
+            "raw_text_length": result.get("raw_text_length"),
+            "main_text_length": result.get("main_text_length"),
             "page_text_preview": result.get("page_text", "")[:500],
             "images_found": result.get("images_found", 0),
             "images_with_text": len(result.get("image_texts", [])),
@@ -69,11 +109,13 @@ async def smart_scrape(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/smart-scrape")
-async def smart_scrape_post(request: ScrapeRequest):
+async def smart_scrape_post(request: ScrapeRequest, http_request: Request):
     """POST version of smart-scrape for complex requests"""
     try:
-        scraper = EnhancedWebScraper(delay=request.delay)
-        result = scraper.scrape_url(request.url, extract_images=request.extract_images)
+        result = await http_request.app.state.scraper.scrape_url(
+            request.url, extract_images=request.extract_images, timeout=request.timeout,
+            content_mode=request.content_mode,
+            preprocess={'deskew': request.deskew} if request.preprocess else False, delay=request.delay)
         
         if "error" in result:
             raise HTTPException(status_code=400, detail=result["error"])
@@ -83,6 +125,11 @@ async def smart_scrape_post(request: ScrapeRequest):
             "url": result.get("url"),
             "title": result.get("title", "No title"),
             "text_length": len(result.get("page_text", "")),
+            "method": result.get("method"),
+            "published_date": result.get("published_date"),
+            "content_mode": result.get("content_mode", "full"),
+            "raw_text_length": result.get("raw_text_length"),
+            "main_text_length": result.get("main_text_length"),
             "full_page_text": result.get("page_text", ""),
             "images_found": result.get("images_found", 0),
             "images_with_text": len(result.get("image_texts", [])),
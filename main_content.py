@@ -0,0 +1,154 @@
+"""
+Main-content extraction that strips page boilerplate.
+Blocks are scored by prose, class/id names and link density; the best
+container's text and images are returned.
+"""
+
+import re
+
+from html_extract import PageCollector, normalize_whitespace, parse_lxml
+
+# Removed before scoring: never part of readable content
+DROP_TAGS = ['script', 'style', 'noscript', 'template', 'iframe', 'form', 'button', 'select', 'svg']
+
+# Structural boilerplate containers
+BOILERPLATE_TAGS = {'nav', 'footer', 'aside'}
+
+# Blocks whose text counts toward their ancestors' scores
+PARAGRAPH_TAGS = {'p', 'pre', 'td', 'blockquote', 'li', 'h2', 'h3', 'h4', 'dd'}
+
+# Whole class/id tokens only (split on spaces, '-' and '_'): 'shareholder-update',
+# 'commentary' and 'subheader' are content, 'share-bar' and 'site-header' are not;
+# 'related-posts' is not 'post'
+POSITIVE_RE = re.compile(
+    r'(?<![a-z0-9])(?:article|body|content|entry|main|post|story|text|announcement|release)(?![a-z0-9])',
+    re.I
+)
+NEGATIVE_RE = re.compile(
+    r'(?<![a-z0-9])(?:nav(?:bar|igation)?|menus?|footer|header|sidebar|cookies?|consent|banners?|related|'
+    r'share(?:bar|s)?|social|comments?|subscribe|newsletter|promos?|advert(?:isement)?s?|ads?|'
+    r'breadcrumbs?|popup|modal|widgets?|sponsor(?:s|ed)?)(?![a-z0-9])',
+    re.I
+)
+
+MIN_PARAGRAPH_CHARS = 25
+SIBLING_SCORE_RATIO = 0.2
+
+
+def _text(element):
+    """Visible text of an element with block boundaries kept as spaces"""
+    return normalize_whitespace(' '.join(element.itertext()))
+
+
+def _names(element):
+    """(content-like, boilerplate-like) for an element's class and id names
+
+    A name that is both ('footer-content', 'cookie-banner__text') is a part
+    of the boilerplate and counts as boilerplate only.
+    """
+    names = f"{element.get('class', '')} {element.get('id', '')}".split()
+    negative = [bool(NEGATIVE_RE.search(name)) for name in names]
+    positive = any(POSITIVE_RE.search(name) and not bad for name, bad in zip(names, negative))
+    return positive, any(negative)
+
+
+def _class_weight(element):
+    """+25 for content-like class/id names, -25 for boilerplate-like ones"""
+    positive, negative = _names(element)
+    return 25 * positive - 25 * negative
+
+
+def _link_density(element, text_length):
+    if not text_length:
+        return 1.0
+    link_length = sum(len(_text(a)) for a in element.iter('a'))
+    return min(link_length / text_length, 1.0)
+
+
+def _strip_boilerplate(root):
+    for element in list(root.iter(*DROP_TAGS, *BOILERPLATE_TAGS)):
+        if element.getparent() is not None:
+            element.drop_tree()
+
+    # Boilerplate by name (cookie banners, share bars, related lists) unless it looks like content
+    for element in list(root.iter()):
+        if not isinstance(element.tag, str) or element.getparent() is None or element.tag in ('html', 'body'):
+            continue
+        positive, negative = _names(element)
+        if negative and not positive:
+            element.drop_tree()
+
+
+def _score_candidates(root):
+    scores = {}
+    for paragraph in root.iter(*PARAGRAPH_TAGS):
+        text = _text(paragraph)
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+
+        score = 1 + text.count(',') + min(len(text) / 100, 3)
+        parent = paragraph.getparent()
+        for ancestor, share in ((parent, 1.0), (parent.getparent() if parent is not None else None, 0.5)):
+            if ancestor is None or not isinstance(ancestor.tag, str):
+                continue
+            if ancestor not in scores:
+                scores[ancestor] = 1.0 + _class_weight(ancestor)
+            scores[ancestor] += score * share
+
+    for candidate in scores:
+        text_length = len(_text(candidate))
+        scores[candidate] *= 1 - _link_density(candidate, text_length)
+    return scores
+
+
+def extract_main_content(html, page_url, is_image=None):
+    """Return the main article text and the images inside it
+
+    Returns a dict with text, images and score, or None when no prose was found.
+    """
+    if not html or not html.strip():
+        return None
+
+    root = parse_lxml(html)
+    _strip_boilerplate(root)
+    scores = _score_candidates(root)
+    if not scores:
+        return None
+
+    best = max(scores, key=scores.get)
+    best_score = scores[best]
+    if best_score <= 0:
+        return None
+
+    # Articles split across sibling containers: keep strong siblings in document order
+    blocks = [best]
+    parent = best.getparent()
+    if parent is not None:
+        threshold = max(10.0, best_score * SIBLING_SCORE_RATIO)
+        blocks = [
+            sibling for sibling in parent
+            if sibling is best or scores.get(sibling, 0) >= threshold
+        ]
+
+    collector = PageCollector(page_url, is_image)
+    text_parts = []
+    for block in blocks:
+        text_parts.append(_text(block))
+        for element in block.iter():
+            if not isinstance(element.tag, str):
+                continue
+            if element.tag == 'img':
+                collector.add_img(element.attrib)
+            elif element.tag == 'picture':
+                collector.start_picture()
+            elif element.tag == 'source':
+                collector.add_source(element.attrib)
+            style = element.get('style')
+            if style:
+                collector.add_style(style)
+
+    return {
+        'text': normalize_whitespace(' '.join(text_parts)),
+        'images': list(collector.images),
+        'score': round(best_score, 1),
+    }
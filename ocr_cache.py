@@ -0,0 +1,259 @@
+"""
+Content-addressed OCR result cache.
+Results are stored in a local SQLite file keyed by the image's SHA-256 plus the
+OCR settings, optionally also by a perceptual hash (use_phash), under a size limit.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from io import BytesIO
+
+from PIL import Image
+
+ENTRY_OVERHEAD_BYTES = 200  # Key, hashes and row overhead, added to the text size
+EVICT_TO_RATIO = 0.9  # Evict down to 90% of the limit so eviction is not run on every insert
+PHASH_MAX_DISTANCE = 3  # Differing bits still treated as the same image
+PHASH_BANDS = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_results (
+    key TEXT PRIMARY KEY,
+    phash TEXT,
+    band0 TEXT,
+    band1 TEXT,
+    band2 TEXT,
+    band3 TEXT,
+    settings TEXT NOT NULL,
+    text TEXT,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ocr_results_band0 ON ocr_results (band0);
+CREATE INDEX IF NOT EXISTS ocr_results_band1 ON ocr_results (band1);
+CREATE INDEX IF NOT EXISTS ocr_results_band2 ON ocr_results (band2);
+CREATE INDEX IF NOT EXISTS ocr_results_band3 ON ocr_results (band3);
+CREATE INDEX IF NOT EXISTS ocr_results_last_used ON ocr_results (last_used);
+"""
+
+
+def content_key(image_bytes, settings):
+    """SHA-256 of the OCR settings and the image bytes"""
+    digest = hashlib.sha256(settings.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(image_bytes)
+    return digest.hexdigest()
+
+
+def perceptual_hash(image_bytes, size=8):
+    """64-bit difference hash: compares neighbouring pixels of a 9x8 grayscale thumbnail
+
+    Returns a hex string, or None when the bytes cannot be decoded.
+    """
+    try:
+        img = Image.open(BytesIO(image_bytes))
+        img.draft('L', (size * 4, size * 4))  # Cheap JPEG downscale while decoding
+        pixels = list(img.convert('L').resize((size + 1, size), Image.LANCZOS).getdata())
+    except Exception:
+        return None
+
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:0{size * size // 4}x}"
+
+
+def phash_bands(phash):
+    """Split a hex hash into PHASH_BANDS equal parts (None values without a hash)"""
+    if not phash:
+        return [None] * PHASH_BANDS
+    width = len(phash) // PHASH_BANDS
+    return [phash[i * width:(i + 1) * width] for i in range(PHASH_BANDS)]
+
+
+def hamming_distance(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count('1')
+
+
+class OCRCache:
+    """SQLite-backed OCR results with LRU eviction and hit-rate counters"""
+
+    def __init__(self, path='ocr_cache.db', max_mb=64, use_phash=False):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.use_phash = use_phash
+        self.hits = 0
+        self.perceptual_hits = 0
+        self.misses = 0
+        self._conn = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        """Open the database on first use; on failure the cache turns itself off"""
+        if self._conn is None and not self._disabled:
+            try:
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    # Lets eviction return freed pages to the filesystem; existing files need one VACUUM
+                    self._conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                    self._conn.execute("VACUUM")
+                self._conn.executescript(SCHEMA)
+            except sqlite3.Error as e:
+                print(f"⚠️  OCR cache disabled, could not open {self.path}: {e}")
+                self._conn = None
+                self._disabled = True
+        return self._conn
+
+    def get(self, image_bytes, settings):
+        """Look up an image's OCR result: (match, text, phash)
+
+        match is None, 'exact' or 'perceptual'; phash is computed on an exact miss
+        so put() need not decode the image again.
+        """
+        key = content_key(image_bytes, settings)
+        row = self._query("SELECT text, key FROM ocr_results WHERE key = ?", (key,))
+        match = 'exact'
+
+        phash = None
+        if row is None and self.use_phash:
+            # Decoding for the perceptual hash happens outside the lock
+            phash = perceptual_hash(image_bytes)
+            if phash:
+                row = self._nearest(phash, settings)
+                match = 'perceptual'
+
+        if row is None:
+            self._count(None)
+            return None, None, phash
+
+        self._count(match)
+        # Refresh the matched row, which for a perceptual hit is stored under another image's key
+        self._query("UPDATE ocr_results SET last_used = ? WHERE key = ?", (time.time(), row[1]), commit=True)
+        return match, row[0], phash
+
+    def _count(self, match):
+        with self._lock:
+            if match is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                if match == 'perceptual':
+                    self.perceptual_hits += 1
+
+    def _nearest(self, phash, settings):
+        """Closest stored result within PHASH_MAX_DISTANCE bits, as a (text, key) row"""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            try:
+                candidates = conn.execute(
+                    "SELECT text, key, phash FROM ocr_results WHERE settings = ? AND "
+                    "(band0 = ? OR band1 = ? OR band2 = ? OR band3 = ?)",
+                    (settings, *phash_bands(phash))
+                ).fetchall()
+            except sqlite3.Error as e:
+                print(f"⚠️  OCR cache query failed: {e}")
+                return None
+
+        best = min(candidates, key=lambda row: hamming_distance(phash, row[2]), default=None)
+        if best is None or hamming_distance(phash, best[2]) > PHASH_MAX_DISTANCE:
+            return None
+        return best[:2]
+
+    def _query(self, sql, params, commit=False):
+        """Run one statement and return its first row; errors are logged and treated as a miss"""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(sql, params).fetchone()
+                if commit:
+                    conn.commit()
+                return row
+            except sqlite3.Error as e:
+                print(f"⚠️  OCR cache query failed: {e}")
+                return None
+
+    def put(self, image_bytes, settings, text, phash=None):
+        """Store an OCR result (None for images without readable text)"""
+        if self.use_phash and phash is None:
+            phash = perceptual_hash(image_bytes)
+        size = len((text or '').encode('utf-8')) + ENTRY_OVERHEAD_BYTES
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr_results "
+                    "(key, phash, band0, band1, band2, band3, settings, text, size, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (content_key(image_bytes, settings), phash, *phash_bands(phash), settings, text, size,
+                     time.time())
+                )
+                self._evict(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️  OCR cache write failed: {e}")
+
+    @staticmethod
+    def _file_bytes(conn):
+        """Pages in use by the database (excluding free pages not yet vacuumed)"""
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        used = conn.execute("PRAGMA page_count").fetchone()[0] - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return used * page_size
+
+    def _evict(self, conn):
+        """Evict LRU entries until the file fits EVICT_TO_RATIO of the limit"""
+        file_bytes = self._file_bytes(conn)
+        if file_bytes <= self.max_bytes:
+            return
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_results").fetchone()[0]
+        target = self.max_bytes * EVICT_TO_RATIO * total / file_bytes
+        freed = 0
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM ocr_results ORDER BY last_used"):
+            if total - freed <= target:
+                break
+            stale.append((key,))
+            freed += size
+        conn.executemany("DELETE FROM ocr_results WHERE key = ?", stale)
+        conn.execute("PRAGMA incremental_vacuum")
+
+    def stats(self):
+        """Hit/miss counters since start-up plus the stored entry count and size"""
+        entries = size = 0
+        with self._lock:
+            hits, perceptual_hits, misses = self.hits, self.perceptual_hits, self.misses
+            conn = self._connection()
+            if conn is not None:
+                try:
+                    entries = conn.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+                    size = self._file_bytes(conn)
+                except sqlite3.Error:
+                    pass
+        return {
+            'enabled': not self._disabled,
+            'hits': hits,
+            'perceptual_hits': perceptual_hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+            'entries': entries,
+            'size_bytes': size,
+            'max_bytes': self.max_bytes,
+        }
+
+    def close(self):
+        """Close the database connection; the next lookup reopens it"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
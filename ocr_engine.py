@@ -0,0 +1,112 @@
+"""
+OCR engines: tesserocr's in-process C++ API when installed, else pytesseract.
+Engines return the text and the mean word confidence (0-100). Select with
+OCR_ENGINE ('auto', 'tesserocr' or 'pytesseract').
+"""
+
+import os
+import re
+import threading
+
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+PSM_RE = re.compile(r'--psm\s+(\d+)')
+OCR_LANG = os.getenv('OCR_LANG', 'eng')
+
+_engine = None
+_engine_lock = threading.Lock()
+_available = None
+
+
+def psm_of(config, default=6):
+    """Page segmentation mode from a pytesseract-style config string"""
+    match = PSM_RE.search(config or '')
+    return int(match.group(1)) if match else default
+
+
+def mean_confidence(confidences):
+    """Mean of the word confidences Tesseract reports (it uses -1 for non-words)"""
+    words = [float(conf) for conf in confidences if float(conf) >= 0]
+    return round(sum(words) / len(words), 1) if words else 0.0
+
+
+class PytesseractEngine:
+    """One tesseract subprocess per call"""
+
+    name = 'pytesseract'
+
+    def recognize(self, img, psm):
+        """(text, mean word confidence) for one page segmentation mode"""
+        data = pytesseract.image_to_data(img, lang=OCR_LANG, config=f'--psm {psm}',
+                                         output_type=pytesseract.Output.DICT)
+        lines = {}
+        confidences = []
+        for i, word in enumerate(data['text']):
+            if not word.strip():
+                continue
+            line = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(line, []).append(word)
+            confidences.append(data['conf'][i])
+        text = '\n'.join(' '.join(words) for words in lines.values())
+        return text, mean_confidence(confidences)
+
+
+class TesserocrEngine:
+    """In-process Tesseract API; language data is loaded once per process"""
+
+    name = 'tesserocr'
+
+    def __init__(self):
+        self.api = tesserocr.PyTessBaseAPI(lang=OCR_LANG)
+        # The API object is not thread-safe; pool workers are single-threaded
+        # but the scraper process may call it from several threads
+        self._lock = threading.Lock()
+
+    def recognize(self, img, psm):
+        """(text, mean word confidence) for one page segmentation mode"""
+        with self._lock:
+            self.api.SetPageSegMode(psm)
+            self.api.SetImage(img)
+            text = self.api.GetUTF8Text()
+            return text, mean_confidence(self.api.AllWordConfidences())
+
+
+def _create_engine():
+    choice = os.getenv('OCR_ENGINE', 'auto').lower()
+    if choice in ('auto', 'tesserocr') and tesserocr is not None:
+        try:
+            return TesserocrEngine()
+        except Exception as e:
+            print(f"⚠️  tesserocr unavailable ({e}), using pytesseract")
+    elif choice == 'tesserocr':
+        print("⚠️  tesserocr is not installed, using pytesseract")
+    return PytesseractEngine()
+
+
+def get_engine():
+    """The process's OCR engine, created on first use (also the pool worker initializer)"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = _create_engine()
+        return _engine
+
+
+def tesseract_available():
+    """Whether Tesseract can run in this process; probed once and cached"""
+    global _available
+    if _available is None:
+        try:
+            if isinstance(get_engine(), TesserocrEngine):
+                _available = True
+            else:
+                pytesseract.get_tesseract_version()
+                _available = True
+        except Exception:
+            _available = False
+    return _available
@@ -0,0 +1,228 @@
+"""
+Process pool for OCR (OCR_WORKERS, see scraper_executors.py).
+Workers receive downloaded image bytes, skip images that look like photos,
+preprocess the rest and try page segmentation modes until one is confident.
+Very large images are OCR'd as overlapping bands and stitched back together.
+"""
+
+import difflib
+import functools
+import json
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from PIL import Image
+
+from scraper_executors import LazyPool, ocr_workers, worker_error
+from ocr_engine import get_engine, psm_of
+from ocr_preprocess import preprocess_image
+from text_detect import text_score
+
+DEFAULT_OCR_CONFIG = '--psm 6'
+
+# Uniform block, automatic layout, single word, raw line (as in debug_image_scraper.py)
+DEFAULT_PSM_CANDIDATES = (6, 3, 8, 13)
+DEFAULT_MIN_CONFIDENCE = 80.0
+
+TILE_MIN_PIXELS = 6_000_000  # Smaller images are OCR'd in one pass
+TILE_BAND_HEIGHT = 1600
+TILE_OVERLAP = 160  # Taller than a line of text, so every line is whole in some band
+STITCH_WINDOW_WORDS = 60  # Words at each band edge searched for the duplicated overlap
+STITCH_MIN_MATCH_WORDS = 3
+STITCH_EDGE_WORDS = 20  # Fragment words allowed between a band edge and the matched overlap
+
+
+class PsmPriors:
+    """How often each page segmentation mode produced the accepted result (kept in the scraper process)"""
+
+    def __init__(self, candidates=DEFAULT_PSM_CANDIDATES):
+        self.candidates = tuple(candidates)
+        self.wins = {psm: 0 for psm in self.candidates}
+        self._lock = threading.Lock()
+
+    def order(self):
+        """Candidates by descending win count; ties keep the default order"""
+        with self._lock:
+            return tuple(sorted(self.candidates, key=lambda psm: -self.wins[psm]))
+
+    def record(self, psm):
+        if psm in self.wins:
+            with self._lock:
+                self.wins[psm] += 1
+
+
+def ocr_settings(config=DEFAULT_OCR_CONFIG, text_threshold=None, preprocess=None, psm_order=None,
+                 min_confidence=DEFAULT_MIN_CONFIDENCE):
+    """Everything that changes OCR output, as a cache-key string; takes ocr_image_bytes' keyword arguments"""
+    settings = config
+    if psm_order:
+        settings = f"multi-psm {','.join(str(psm) for psm in sorted(psm_order))} conf>={min_confidence}"
+    if text_threshold is not None:
+        settings += f" text>={text_threshold}"
+    if preprocess and preprocess.get('enabled'):
+        settings += " preprocess=" + json.dumps(preprocess, sort_keys=True)
+    return settings
+
+
+def recognize_multi_psm(img, psm_order, min_confidence=DEFAULT_MIN_CONFIDENCE):
+    """(text, confidence, psm) of the first mode reaching min_confidence, else of the most confident"""
+    engine = get_engine()
+    best = None
+    for psm in psm_order:
+        text, confidence = engine.recognize(img, psm)
+        if not text.strip():
+            confidence = 0.0
+        if best is None or confidence > best[1]:
+            best = (text, confidence, psm)
+        if confidence >= min_confidence:
+            break
+    return best
+
+
+def ocr_image_bytes(image_bytes, config=DEFAULT_OCR_CONFIG, text_threshold=None, preprocess=None,
+                    psm_order=None, min_confidence=DEFAULT_MIN_CONFIDENCE):
+    """Run Tesseract on an encoded image in a pool worker
+
+    Returns a dict with the cleaned text (None when nothing was read), text_score,
+    skipped, psm and confidence.
+    """
+    return ocr_image(Image.open(BytesIO(image_bytes)), config, text_threshold, preprocess,
+                     psm_order, min_confidence)
+
+
+def ocr_image(img, config=DEFAULT_OCR_CONFIG, text_threshold=None, preprocess=None,
+              psm_order=None, min_confidence=DEFAULT_MIN_CONFIDENCE):
+    """ocr_image_bytes for a decoded PIL image (image bands are sent to workers this way)"""
+    score = text_score(img) if text_threshold is not None else None
+    if score is not None and score < text_threshold:
+        return {'text': None, 'text_score': score, 'skipped': True, 'psm': None, 'confidence': None}
+
+    if preprocess and preprocess.get('enabled'):
+        img = preprocess_image(img, preprocess)
+    elif img.mode not in ['RGB', 'L']:
+        # Convert to RGB if necessary
+        img = img.convert('RGB')
+
+    try:
+        if psm_order:
+            text, confidence, psm = recognize_multi_psm(img, psm_order, min_confidence)
+        else:
+            psm = psm_of(config)
+            text, confidence = get_engine().recognize(img, psm)
+    except Exception as e:
+        raise worker_error(e) from None
+    cleaned_text = re.sub(r'\s+', ' ', text).strip()
+    return {
+        'text': cleaned_text if len(cleaned_text) > 3 else None,
+        'text_score': score,
+        'skipped': False,
+        'psm': psm,
+        'confidence': confidence,
+    }
+
+
+def needs_tiling(width, height):
+    """Whether an image is large enough to OCR in parallel bands"""
+    return width * height >= TILE_MIN_PIXELS and height >= 2 * TILE_BAND_HEIGHT
+
+
+def band_boxes(width, height, band_height=TILE_BAND_HEIGHT, overlap=TILE_OVERLAP):
+    """(left, top, right, bottom) crop boxes of overlapping horizontal bands"""
+    step = band_height - overlap
+    boxes = []
+    top = 0
+    while True:
+        bottom = min(top + band_height, height)
+        boxes.append((0, top, width, bottom))
+        if bottom >= height:
+            return boxes
+        top += step
+
+
+def split_bands(image_bytes):
+    """Decode an image once and crop it into bands, or None if it is too small to tile"""
+    img = Image.open(BytesIO(image_bytes))
+    if not needs_tiling(*img.size):
+        return None
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    img.load()
+    return [img.crop(box) for box in band_boxes(*img.size)]
+
+
+def _words(text):
+    return [re.sub(r'\W+', '', word).lower() for word in text.split()]
+
+
+def stitch_texts(texts):
+    """Join band texts in order, dropping the words repeated across each overlap
+
+    Each join is cut at the longest run of matching words near the band edges,
+    which also drops the line fragments cut by the edge.
+    """
+    stitched = []
+    for text in texts:
+        words = text.split() if text else []
+        if not stitched or not words:
+            stitched.extend(words)
+            continue
+        tail_start = max(0, len(stitched) - STITCH_WINDOW_WORDS)
+        tail = _words(' '.join(stitched[tail_start:]))
+        head = _words(' '.join(words[:STITCH_WINDOW_WORDS]))
+        match = difflib.SequenceMatcher(None, tail, head, autojunk=False).find_longest_match(
+            0, len(tail), 0, len(head))
+        at_edges = len(tail) - match.a - match.size <= STITCH_EDGE_WORDS and match.b <= STITCH_EDGE_WORDS
+        if match.size >= STITCH_MIN_MATCH_WORDS and at_edges:
+            del stitched[tail_start + match.a:]
+            stitched.extend(words[match.b:])
+        else:
+            stitched.extend(words)
+    return ' '.join(stitched)
+
+
+def combine_band_outcomes(outcomes):
+    """One ocr_image_bytes-style result from the results of an image's bands"""
+    read = [outcome for outcome in outcomes if outcome['text']]
+    scores = [outcome['text_score'] for outcome in outcomes if outcome['text_score'] is not None]
+    text = stitch_texts([outcome['text'] for outcome in outcomes]) if read else None
+    best = max(read, key=lambda outcome: len(outcome['text']), default=None)
+    confidence = None
+    if read:
+        total = sum(len(outcome['text']) for outcome in read)
+        confidence = round(sum(outcome['confidence'] * len(outcome['text']) for outcome in read) / total, 1)
+    return {
+        'text': text,
+        'text_score': max(scores) if scores else None,
+        'skipped': all(outcome['skipped'] for outcome in outcomes),
+        'psm': best['psm'] if best else None,
+        'confidence': confidence,
+        'tiles': len(outcomes),
+    }
+
+
+def ocr_tiled(image_bytes, pool, **options):
+    """OCR an image band by band on pool (blocking); None if it is too small to tile"""
+    bands = split_bands(image_bytes)
+    if bands is None:
+        return None
+    return combine_band_outcomes(list(pool.map(functools.partial(ocr_image, **options), bands)))
+
+
+def pool_size():
+    """Number of OCR worker processes"""
+    return ocr_workers()
+
+
+_pool = LazyPool(lambda: ProcessPoolExecutor(max_workers=pool_size(), initializer=get_engine))
+
+
+def get_ocr_pool():
+    """The process-wide OCR pool, created on first use"""
+    return _pool.get()
+
+
+def shutdown_ocr_pool():
+    """Stop the worker processes; a new pool is created on next use"""
+    _pool.shutdown()
@@ -0,0 +1,112 @@
+"""
+Image preprocessing before Tesseract: grayscale, resize to a readable text
+height, adaptive binarisation and optional deskew. Without OpenCV only
+grayscale conversion and resizing are applied.
+"""
+
+from PIL import Image
+
+from text_detect import estimate_char_height
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+    np = None
+
+PREPROCESS_DEFAULTS = {
+    'enabled': True,
+    'target_char_height': 32,  # Pixels per text line after resizing
+    'target_dpi': 300,  # Used when no text lines could be measured
+    'max_width': 3000,  # Upper bounds on the resized image; tall images keep their length
+    'max_pixels': 36_000_000,
+    'binarize': True,
+    'deskew': False,
+}
+
+MIN_SCALE = 0.2
+MAX_SCALE = 4.0
+ADAPTIVE_BLOCK_SIZE = 31
+ADAPTIVE_OFFSET = 10
+MAX_DESKEW_ANGLE = 15.0
+MIN_DESKEW_ANGLE = 0.3
+
+
+def preprocess_options(overrides=None):
+    """PREPROCESS_DEFAULTS updated with overrides; False disables preprocessing"""
+    if overrides is False:
+        return dict(PREPROCESS_DEFAULTS, enabled=False)
+    options = dict(PREPROCESS_DEFAULTS)
+    if isinstance(overrides, dict):
+        unknown = set(overrides) - set(PREPROCESS_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown preprocessing options: {', '.join(sorted(unknown))}")
+        options.update(overrides)
+    return options
+
+
+def resize_scale(img, options):
+    """Scale factor that brings text lines to the target height"""
+    char_height = estimate_char_height(img)
+    if char_height:
+        scale = options['target_char_height'] / char_height
+    else:
+        dpi = img.info.get('dpi', (0, 0))[0]
+        scale = options['target_dpi'] / float(dpi) if dpi and dpi > 1 else 1.0
+
+    scale = min(max(scale, MIN_SCALE), MAX_SCALE)
+    # Capping the width rather than the longer side keeps the text of tall
+    # infographics readable; images large enough to tile are split before
+    # preprocessing, so each band is capped on its own
+    scale = min(scale, options['max_width'] / float(img.width),
+                (options['max_pixels'] / float(img.width * img.height)) ** 0.5)
+    return scale
+
+
+def deskew(pixels):
+    """Rotate a binarised page so its text lines are horizontal"""
+    ink = np.column_stack(np.where(pixels < 128))
+    if len(ink) < 100:
+        return pixels
+
+    # minAreaRect takes (x, y); np.where gives (row, col)
+    angle = cv2.minAreaRect(ink[:, ::-1].astype(np.float32))[-1]
+    if angle > 45:
+        angle -= 90
+    elif angle < -45:
+        angle += 90
+    if abs(angle) < MIN_DESKEW_ANGLE or abs(angle) > MAX_DESKEW_ANGLE:
+        return pixels
+
+    height, width = pixels.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(pixels, matrix, (width, height), flags=cv2.INTER_CUBIC,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=255)
+
+
+def preprocess_image(img, options=None):
+    """Return a grayscale (or binarised) PIL image ready for Tesseract"""
+    options = options or PREPROCESS_DEFAULTS
+    if not options.get('enabled', True):
+        return img
+
+    scale = resize_scale(img, options)
+    gray = img.convert('L')
+    if abs(scale - 1.0) > 0.05:
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        gray = gray.resize(size, Image.LANCZOS if scale < 1 else Image.BICUBIC)
+
+    if cv2 is None:
+        return gray
+
+    pixels = np.asarray(gray, dtype=np.uint8)
+    if options['binarize']:
+        # Light text on dark backgrounds: invert first so the text ends up dark
+        if np.median(pixels) < 128:
+            pixels = 255 - pixels
+        pixels = cv2.adaptiveThreshold(pixels, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY,
+                                       ADAPTIVE_BLOCK_SIZE, ADAPTIVE_OFFSET)
+    if options['deskew']:
+        pixels = deskew(pixels)
+    return Image.fromarray(pixels)
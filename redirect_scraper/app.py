@@ -1,5 +1,6 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import requests
 import httpx
@@ -8,28 +9,41 @@ import time
 import asyncio
 import random
 import urllib3
-import io
+import contextlib
+import json
 from urllib.parse import urlparse
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from typing import Optional
-from playwright.async_api import async_playwright
-import PyPDF2
-import pdfplumber
-import pytesseract
-from PIL import Image
-import cv2
-import numpy as np
+from shared_modules import use_shared_modules
+use_shared_modules()
+from adaptive_timeouts import AdaptiveTimeouts
+from pdf_executors import run_blocking, shutdown_blocking_executor
+from image_ocr import ImageRejected, image_hash, probe_image, run_ocr, shutdown_ocr_pool, MAX_IMAGE_BYTES
+from pdf_extract import (PDFSpool, PDFTooLarge, check_max_pages, extract_pdf_file, iter_pdf_file,
+                         parse_page_spec, run_pdf_extraction, shutdown_pdf_pool, DOWNLOAD_CHUNK_BYTES)
+from pdf_range import fetch_pdf_range
 
 # Disable SSL warnings for stealth mode
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Stop the worker pools (created on first use) when the server shuts down."""
+    try:
+        yield
+    finally:
+        shutdown_pdf_pool()
+        shutdown_ocr_pool()
+        shutdown_blocking_executor()
+
 app = FastAPI(
     title="Redirect Scraper", 
     version="1.0.0",
     description="A comprehensive URL redirect scraper with HTTP integration",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Add CORS middleware for Make.com and other external integrations
@@ -96,6 +110,101 @@ def create_http_session() -> requests.Session:
     session.mount("https://", adapter)
     return session
 
+# create_http_session's retry policy for httpx clients
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 1.0  # Seconds before the first retry, doubled for each further one
+RETRY_MAX_WAIT = 30.0  # Cap on Retry-After
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE'}  # Idempotent, as urllib3 retries
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """httpx transport that retries connection failures and RETRY_STATUSES like create_http_session."""
+
+    def __init__(self, limits: Optional[httpx.Limits] = None):
+        self.transport = httpx.AsyncHTTPTransport(
+            retries=RETRY_TOTAL,
+            limits=limits or httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(RETRY_TOTAL + 1):
+            response = await self.transport.handle_async_request(request)
+            if (attempt == RETRY_TOTAL or response.status_code not in RETRY_STATUSES
+                    or request.method not in RETRY_METHODS):
+                return response
+            await response.aclose()
+            await asyncio.sleep(retry_wait(response, attempt))
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+def retry_wait(response: httpx.Response, attempt: int) -> float:
+    """Seconds before retrying: Retry-After (in seconds) if given, else exponential backoff."""
+    retry_after = response.headers.get('Retry-After', '')
+    if retry_after.isdigit():
+        return min(float(retry_after), RETRY_MAX_WAIT)
+    return RETRY_BACKOFF * 2 ** attempt
+
+def create_async_client(headers: dict, limits: Optional[httpx.Limits] = None) -> httpx.AsyncClient:
+    """httpx client that follows redirects and retries like create_http_session."""
+    return httpx.AsyncClient(follow_redirects=True, headers=headers, transport=RetryTransport(limits))
+
+# Per-domain timeouts learned from observed latencies, shared by all endpoints
+domain_timeouts = AdaptiveTimeouts()
+browser_timeouts = AdaptiveTimeouts(read_floor=10.0, read_ceiling=60.0, read_multiplier=2.0)
+
+def timed_request(session: requests.Session, method: str, url: str, default_timeout: float,
+                  timeout: Optional[float] = None, **kwargs) -> requests.Response:
+    """Issue a requests call with an adaptive per-domain timeout and record its latency."""
+    connect_timeout, read_timeout = domain_timeouts.get(url, default=default_timeout, override=timeout)
+    try:
+        response = session.request(method, url, timeout=(connect_timeout, read_timeout), **kwargs)
+    except requests.exceptions.ConnectTimeout:
+        domain_timeouts.record_timeout(url, connect_timeout)
+        raise
+    except requests.exceptions.ReadTimeout:
+        domain_timeouts.record_timeout(url, read_timeout)
+        raise
+    domain_timeouts.record(url, response.elapsed.total_seconds())
+    return response
+
+async def timed_httpx_get(client: httpx.AsyncClient, url: str, default_timeout: float,
+                          timeout: Optional[float] = None) -> httpx.Response:
+    """GET with httpx using an adaptive per-domain timeout and record its latency."""
+    return await timed_httpx_request(client, 'GET', url, default_timeout, timeout)
+
+async def timed_httpx_request(client: httpx.AsyncClient, method: str, url: str, default_timeout: float,
+                              timeout: Optional[float] = None) -> httpx.Response:
+    """Issue an httpx call with an adaptive per-domain timeout and record its latency."""
+    connect_timeout, read_timeout = domain_timeouts.get(url, default=default_timeout, override=timeout)
+    try:
+        response = await client.request(method, url, timeout=httpx.Timeout(read_timeout, connect=connect_timeout))
+    except httpx.ConnectTimeout:
+        domain_timeouts.record_timeout(url, connect_timeout)
+        raise
+    except httpx.ReadTimeout:
+        domain_timeouts.record_timeout(url, read_timeout)
+        raise
+    domain_timeouts.record(url, response.elapsed.total_seconds())
+    return response
+
+@contextlib.asynccontextmanager
+async def timed_httpx_stream(client: httpx.AsyncClient, url: str, default_timeout: float,
+                             timeout: Optional[float] = None):
+    """Streamed GET with httpx using an adaptive per-domain timeout; records the time to the response headers."""
+    connect_timeout, read_timeout = domain_timeouts.get(url, default=default_timeout, override=timeout)
+    start_time = time.time()
+    try:
+        async with client.stream('GET', url, timeout=httpx.Timeout(read_timeout, connect=connect_timeout)) as response:
+            domain_timeouts.record(url, time.time() - start_time)
+            yield response
+    except httpx.ConnectTimeout:
+        domain_timeouts.record_timeout(url, connect_timeout)
+        raise
+    except httpx.ReadTimeout:
+        domain_timeouts.record_timeout(url, read_timeout)
+        raise
+
 # HTTP middleware for request/response logging and metrics
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
@@ -117,7 +226,12 @@ class URLRequest(BaseModel):
     url: str
     user_agent: Optional[str] = None
     auth_token: Optional[str] = None
-    timeout: Optional[int] = 15
+    timeout: Optional[float] = None  # Adaptive per-domain timeout when omitted
+
+class PDFRequest(URLRequest):
+    pages: Optional[str] = None  # e.g. "1-3,7"; all pages when omitted
+    max_pages: Optional[int] = None
+    stream: bool = False  # NDJSON, one line per page
 
 class URLResponse(BaseModel):
     final_url: str
@@ -140,6 +254,8 @@ class PDFResponse(BaseModel):
     pdf_text: str
     page_count: int
     extraction_method: str
+    page_methods: list[dict] = []  # {'page', 'method'} per extracted page; OCR'd pages add 'confidence'
+    bytes_transferred: Optional[int] = None  # Less than content_length when only byte ranges were fetched
 
 class ImageResponse(BaseModel):
     final_url: str
@@ -153,64 +269,158 @@ class ImageResponse(BaseModel):
     image_dimensions: tuple[int, int]
     extraction_method: str
     confidence_score: Optional[float] = None
-    
-# PDF extraction functions
-def extract_pdf_text_pypdf2(pdf_content: bytes) -> tuple[str, int]:
-    """Extract text from PDF using PyPDF2."""
+    error: Optional[str] = None  # Download failed; status_code and headers are not from the server
+    ocr_error: Optional[str] = None  # Downloaded, but the image could not be decoded or OCR'd
+
+class BatchOCRRequest(BaseModel):
+    urls: list[str]
+    user_agent: Optional[str] = None
+    timeout: Optional[float] = None  # Adaptive per-domain timeout when omitted
+
+MAX_BATCH_IMAGES = 50
+BATCH_BUFFERED_IMAGES = 8  # Batch images downloaded and held in memory at once
+IMAGE_ACCEPT = 'image/avif,image/webp,image/apng,image/*,*/*;q=0.8'
+
+async def read_image_body(response: httpx.Response, chunks=None, first_chunk: bytes = b'') -> bytes:
+    """Read a streamed image body, abandoning it past MAX_IMAGE_BYTES.
+
+    chunks and first_chunk continue a body whose first chunk was already read.
+    """
+    declared_length = response.headers.get('Content-Length')
+    if declared_length and int(declared_length) > MAX_IMAGE_BYTES:
+        raise ImageRejected(f"Image is {int(declared_length)} bytes, limit is {MAX_IMAGE_BYTES}")
+
+    body = [first_chunk]
+    received = len(first_chunk)
+    async for chunk in (chunks if chunks is not None else response.aiter_bytes()):
+        received += len(chunk)
+        if received > MAX_IMAGE_BYTES:
+            raise ImageRejected(f"Image exceeds the {MAX_IMAGE_BYTES} byte limit")
+        body.append(chunk)
+    return b''.join(body)
+
+async def stream_image(client: httpx.AsyncClient, url: str, timeout: Optional[float] = None) -> tuple[httpx.Response, bytes]:
+    """Download an image, streaming the body and abandoning it past MAX_IMAGE_BYTES."""
+    connect_timeout, read_timeout = domain_timeouts.get(url, default=30, override=timeout)
+    start_time = time.time()
     try:
-        pdf_file = io.BytesIO(pdf_content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        
-        text_parts = []
-        for page in pdf_reader.pages:
-            text_parts.append(page.extract_text())
-        
-        full_text = '\n'.join(text_parts)
-        page_count = len(pdf_reader.pages)
-        
-        return full_text, page_count
-    except Exception as e:
-        logging.error(f"PyPDF2 extraction failed: {e}")
-        return "", 0
+        async with client.stream('GET', url, timeout=httpx.Timeout(read_timeout, connect=connect_timeout)) as response:
+            domain_timeouts.record(url, time.time() - start_time)
+            response.raise_for_status()
+            return response, await read_image_body(response)
+    except httpx.ConnectTimeout:
+        domain_timeouts.record_timeout(url, connect_timeout)
+        raise
+    except httpx.ReadTimeout:
+        domain_timeouts.record_timeout(url, read_timeout)
+        raise
 
-def extract_pdf_text_pdfplumber(pdf_content: bytes) -> tuple[str, int]:
-    """Extract text from PDF using pdfplumber (more accurate)."""
+async def stream_pdf(client: httpx.AsyncClient, url: str, spool: PDFSpool,
+                     timeout: Optional[float] = None) -> httpx.Response:
+    """Download a PDF into spool, streaming the body and abandoning it past the size cap."""
+    connect_timeout, read_timeout = domain_timeouts.get(url, default=30, override=timeout)
+    start_time = time.time()
     try:
-        pdf_file = io.BytesIO(pdf_content)
-        
-        text_parts = []
-        page_count = 0
-        
-        with pdfplumber.open(pdf_file) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_parts.append(page_text)
-                page_count += 1
-        
-        full_text = '\n'.join(text_parts)
-        return full_text, page_count
-    except Exception as e:
-        logging.error(f"pdfplumber extraction failed: {e}")
-        return "", 0
-
-def extract_pdf_text(pdf_content: bytes) -> tuple[str, int, str]:
-    """Extract text from PDF using the best available method."""
-    # Try pdfplumber first (more accurate)
-    text, page_count = extract_pdf_text_pdfplumber(pdf_content)
-    if text.strip():
-        return text, page_count, "pdfplumber"
-    
-    # Fallback to PyPDF2
-    text, page_count = extract_pdf_text_pypdf2(pdf_content)
-    if text.strip():
-        return text, page_count, "PyPDF2"
-    
-    return "Unable to extract text from PDF", 0, "failed"
+        async with client.stream('GET', url, timeout=httpx.Timeout(read_timeout, connect=connect_timeout)) as response:
+            domain_timeouts.record(url, time.time() - start_time)
+            response.raise_for_status()
+            spool.check_length(response.headers.get('Content-Length'))
+            async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_BYTES):
+                spool.write(chunk)
+            spool.finish()
+            return response
+    except httpx.ConnectTimeout:
+        domain_timeouts.record_timeout(url, connect_timeout)
+        raise
+    except httpx.ReadTimeout:
+        domain_timeouts.record_timeout(url, read_timeout)
+        raise
+
+def range_timeout(url: str, timeout: Optional[float] = None) -> httpx.Timeout:
+    """The adaptive per-domain timeout, for the range requests of fetch_pdf_range."""
+    connect_timeout, read_timeout = domain_timeouts.get(url, default=30, override=timeout)
+    return httpx.Timeout(read_timeout, connect=connect_timeout)
+
+def partial_pdf_response(partial: dict, start_time: float) -> PDFResponse:
+    """PDFResponse for pages fetched with range requests; content_length is the whole file's size."""
+    return PDFResponse(
+        final_url=partial['final_url'],
+        status_code=partial['status_code'],
+        content_type=partial['content_type'],
+        content_length=partial['total_size'],
+        redirect_count=partial['redirect_count'],
+        response_time=time.time() - start_time,
+        headers=partial['headers'],
+        pdf_text=partial['pdf_text'],
+        page_count=partial['page_count'],
+        extraction_method=partial['extraction_method'],
+        page_methods=partial['page_methods'],
+        bytes_transferred=partial['bytes_transferred']
+    )
+
+class SpoolStreamingResponse(StreamingResponse):
+    """StreamingResponse that deletes its spooled PDF however the response ends, even before the first line."""
+
+    def __init__(self, content, spool: PDFSpool, **kwargs):
+        super().__init__(content, **kwargs)
+        self.spool = spool
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.spool.close()
 
+def pdf_page_stream(spool: PDFSpool, page_spec, max_pages: Optional[int]) -> StreamingResponse:
+    """Stream a spooled PDF as NDJSON: a header line, then one line per page as it is extracted.
+
+    The response owns the spool and deletes it when done or when the client goes away.
+    """
+    lines = (json.dumps(record) + '\n' for record in iter_pdf_file(spool.path, page_spec, max_pages))
+    return SpoolStreamingResponse(lines, spool, media_type='application/x-ndjson')
+
+def failed_image_response(url: str, start_time: float, response: Optional[httpx.Response] = None,
+                          content_length: Optional[int] = None, error: Optional[str] = None,
+                          ocr_error: Optional[str] = None) -> ImageResponse:
+    """ImageResponse for a batch item whose download (error) or OCR (ocr_error) failed.
+
+    The server's status and headers are reported whenever a response was received.
+    """
+    return ImageResponse(
+        final_url=str(response.url) if response is not None else url,
+        status_code=response.status_code if response is not None else 0,
+        content_type=response.headers.get('Content-Type', '') if response is not None else '',
+        content_length=content_length,
+        redirect_count=len(response.history) if response is not None else 0,
+        response_time=time.time() - start_time,
+        headers=dict(response.headers) if response is not None else {},
+        extracted_text='',
+        image_dimensions=(0, 0),
+        extraction_method='failed',
+        error=error,
+        ocr_error=ocr_error
+    )
+
+def image_response(response: httpx.Response, image_bytes: bytes, dimensions: tuple[int, int], ocr: dict,
+                   start_time: float) -> ImageResponse:
+    """Build an ImageResponse from a downloaded image and its OCR result."""
+    return ImageResponse(
+        final_url=str(response.url),
+        status_code=response.status_code,
+        content_type=response.headers.get('Content-Type', ''),
+        content_length=len(image_bytes),
+        redirect_count=len(response.history),
+        response_time=time.time() - start_time,
+        headers=dict(response.headers),
+        extracted_text=ocr['text'],
+        image_dimensions=dimensions,
+        extraction_method=f"tesseract-psm{ocr['psm']}",
+        confidence_score=ocr['confidence']
+    )
+    
 # Enhanced sync endpoint with session management
 @app.get("/scrape")
-def scrape_url(url: str, user_agent: Optional[str] = None) -> URLResponse:
+def scrape_url(url: str, user_agent: Optional[str] = None, timeout: Optional[float] = None) -> URLResponse:
     """Scrape URL with enhanced session management and retry logic."""
     logging.info(f"Scraping URL: {url}")
     start_time = time.time()
@@ -229,7 +439,7 @@ def scrape_url(url: str, user_agent: Optional[str] = None) -> URLResponse:
     try:
         session = create_http_session()
 
-        response = session.get(url, allow_redirects=True, timeout=30, headers=headers)
+        response = timed_request(session, 'GET', url, 30, timeout, allow_redirects=True, headers=headers)
         response.raise_for_status()
 
         response_time = time.time() - start_time
@@ -273,10 +483,9 @@ async def fetch_url_content(request: URLRequest) -> URLResponse:
         
         async with httpx.AsyncClient(
             follow_redirects=True,
-            timeout=request.timeout,
             headers=headers
         ) as client:
-            response = await client.get(request.url)
+            response = await timed_httpx_get(client, request.url, 15, request.timeout)
             response.raise_for_status()
             
             response_time = time.time() - start_time
@@ -340,7 +549,7 @@ async def batch_fetch_urls(urls: list[str], user_agent: Optional[str] = None) ->
 
 # Stealth endpoint for stubborn websites with advanced anti-bot measures
 @app.get("/stealth-scrape")
-def stealth_scrape_url(url: str, user_agent: Optional[str] = None) -> URLResponse:
+def stealth_scrape_url(url: str, user_agent: Optional[str] = None, timeout: Optional[float] = None) -> URLResponse:
     """Stealth scraping with maximum anti-bot detection avoidance."""
     logging.info(f"Stealth scraping URL: {url}")
     start_time = time.time()
@@ -378,11 +587,14 @@ def stealth_scrape_url(url: str, user_agent: Optional[str] = None) -> URLRespons
         session.mount('http://', HTTPAdapter(max_retries=5))
         session.mount('https://', HTTPAdapter(max_retries=5))
         
-        response = session.get(
-            url, 
-            headers=stealth_headers, 
-            allow_redirects=True, 
-            timeout=45,
+        response = timed_request(
+            session,
+            'GET',
+            url,
+            45,
+            timeout,
+            headers=stealth_headers,
+            allow_redirects=True,
             stream=False
         )
         
@@ -419,18 +631,20 @@ def stealth_scrape_url(url: str, user_agent: Optional[str] = None) -> URLRespons
 
 # Browser-based scraping endpoint using Playwright
 @app.get("/browser-scrape")
-async def browser_scrape_url(url: str, user_agent: Optional[str] = None, wait_time: int = 3) -> URLResponse:
+async def browser_scrape_url(url: str, user_agent: Optional[str] = None, wait_time: int = 3,
+                             timeout: Optional[float] = None) -> URLResponse:
     """Scrape URL using headless browser to bypass advanced bot detection."""
     logging.info(f"Browser scraping URL: {url}")
     start_time = time.time()
+    _, nav_timeout = browser_timeouts.get(url, default=30, override=timeout)
     
     try:
         # Check if Playwright is available
         try:
-            from playwright.async_api import async_playwright
+            from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
         except ImportError:
             logging.error("Playwright not available, falling back to stealth scraping")
-            return stealth_scrape_url(url, user_agent)
+            return await run_blocking(stealth_scrape_url, url, user_agent, timeout)
             
         async with async_playwright() as p:
             # Launch browser with minimal configuration for Railway compatibility
@@ -443,127 +657,139 @@ async def browser_scrape_url(url: str, user_agent: Optional[str] = None, wait_ti
                         '--disable-dev-shm-usage',
                         '--disable-accelerated-2d-canvas',
                         '--no-first-run',
-                    '--no-zygote',
-                    '--disable-gpu',
-                    '--disable-features=VizDisplayCompositor',
-                    '--disable-web-security',
-                    '--disable-features=site-per-process'
-                ]
-            )
+                        '--no-zygote',
+                        '--disable-gpu',
+                        '--disable-features=VizDisplayCompositor',
+                        '--disable-web-security',
+                        '--disable-features=site-per-process'
+                    ]
+                )
             
-            # Create context with realistic browser fingerprint
-            context = await browser.new_context(
-                user_agent=user_agent or 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                viewport={'width': 1920, 'height': 1080},
-                locale='en-US',
-                timezone_id='America/New_York',
-                extra_http_headers={
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-                    'Accept-Language': 'en-US,en;q=0.9',
-                    'Accept-Encoding': 'gzip, deflate, br',
-                    'DNT': '1',
-                    'Upgrade-Insecure-Requests': '1',
-                    'Sec-Fetch-Dest': 'document',
-                    'Sec-Fetch-Mode': 'navigate',
-                    'Sec-Fetch-Site': 'none',
-                    'Sec-Fetch-User': '?1'
-                }
-            )
+                # Create context with realistic browser fingerprint
+                context = await browser.new_context(
+                    user_agent=user_agent or 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+                    viewport={'width': 1920, 'height': 1080},
+                    locale='en-US',
+                    timezone_id='America/New_York',
+                    extra_http_headers={
+                        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+                        'Accept-Language': 'en-US,en;q=0.9',
+                        'Accept-Encoding': 'gzip, deflate, br',
+                        'DNT': '1',
+                        'Upgrade-Insecure-Requests': '1',
+                        'Sec-Fetch-Dest': 'document',
+                        'Sec-Fetch-Mode': 'navigate',
+                        'Sec-Fetch-Site': 'none',
+                        'Sec-Fetch-User': '?1'
+                    }
+                )
             
-            # Create page and navigate
-            page = await context.new_page()
-            
-            # Set additional realistic properties
-            await page.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined,
-                });
-                Object.defineProperty(navigator, 'plugins', {
-                    get: () => [1, 2, 3, 4, 5],
-                });
-                Object.defineProperty(navigator, 'languages', {
-                    get: () => ['en-US', 'en'],
-                });
-                window.chrome = {
-                    runtime: {},
-                };
-                Object.defineProperty(navigator, 'permissions', {
-                    get: () => ({
-                        query: () => Promise.resolve({ state: 'granted' }),
-                    }),
-                });
-            """)
-            
-            # Navigate to the URL
-            response = await page.goto(
-                url, 
-                wait_until='networkidle',
-                timeout=30000
-            )
+                # Create page and navigate
+                page = await context.new_page()
             
-            # Wait for additional time to ensure full page load
-            await asyncio.sleep(wait_time)
+                # Set additional realistic properties
+                await page.add_init_script("""
+                    Object.defineProperty(navigator, 'webdriver', {
+                        get: () => undefined,
+                    });
+                    Object.defineProperty(navigator, 'plugins', {
+                        get: () => [1, 2, 3, 4, 5],
+                    });
+                    Object.defineProperty(navigator, 'languages', {
+                        get: () => ['en-US', 'en'],
+                    });
+                    window.chrome = {
+                        runtime: {},
+                    };
+                    Object.defineProperty(navigator, 'permissions', {
+                        get: () => ({
+                            query: () => Promise.resolve({ state: 'granted' }),
+                        }),
+                    });
+                """)
             
-            # Get final URL after redirects
-            final_url = page.url
+                # Navigate to the URL
+                nav_start = time.time()
+                try:
+                    response = await page.goto(
+                        url,
+                        wait_until='networkidle',
+                        timeout=nav_timeout * 1000
+                    )
+                except PlaywrightTimeoutError:
+                    browser_timeouts.record_timeout(url, nav_timeout)
+                    raise
+                browser_timeouts.record(url, time.time() - nav_start)
             
-            # Get response details
-            status_code = response.status if response else 200
+                # Wait for additional time to ensure full page load
+                await asyncio.sleep(wait_time)
             
-            # Count redirects by checking navigation history
-            redirect_count = 0
-            for entry in await page.evaluate('() => performance.getEntriesByType("navigation")'):
-                if 'redirectCount' in entry:
-                    redirect_count = entry['redirectCount']
-                    break
+                # Get final URL after redirects
+                final_url = page.url
             
-            # Get page content
-            content = await page.content()
-            content_preview = content[:1000] if content else None
+                # Get response details
+                status_code = response.status if response else 200
             
-            # Get response headers (approximated)
-            headers = {
-                'Content-Type': 'text/html; charset=utf-8',
-                'Status': str(status_code)
-            }
+                # Count redirects by checking navigation history
+                redirect_count = 0
+                for entry in await page.evaluate('() => performance.getEntriesByType("navigation")'):
+                    if 'redirectCount' in entry:
+                        redirect_count = entry['redirectCount']
+                        break
             
-            response_time = time.time() - start_time
+                # Get page content
+                content = await page.content()
+                content_preview = content[:1000] if content else None
             
-            await browser.close()
+                # Get response headers (approximated)
+                headers = {
+                    'Content-Type': 'text/html; charset=utf-8',
+                    'Status': str(status_code)
+                }
             
-            logging.info(f"Successfully browser scraped {url} - Status: {status_code}, Final URL: {final_url}")
+                response_time = time.time() - start_time
             
-            return URLResponse(
-                final_url=final_url,
-                status_code=status_code,
-                content_type='text/html; charset=utf-8',
-                content_length=len(content) if content else 0,
-                redirect_count=redirect_count,
-                response_time=response_time,
-                headers=headers,
-                content_preview=content_preview
-            )
+                await browser.close()
+            
+                logging.info(f"Successfully browser scraped {url} - Status: {status_code}, Final URL: {final_url}")
+            
+                return URLResponse(
+                    final_url=final_url,
+                    status_code=status_code,
+                    content_type='text/html; charset=utf-8',
+                    content_length=len(content) if content else 0,
+                    redirect_count=redirect_count,
+                    response_time=response_time,
+                    headers=headers,
+                    content_preview=content_preview
+                )
             
             except Exception as browser_error:
                 logging.error(f"Browser launch failed: {browser_error}, falling back to stealth scraping")
-                return stealth_scrape_url(url, user_agent)
+                return await run_blocking(stealth_scrape_url, url, user_agent, timeout)
             
     except Exception as e:
         logging.error(f"Error in browser scraping URL {url}: {e}")
         # Fallback to stealth scraping if browser scraping fails completely
         try:
             logging.info(f"Attempting fallback to stealth scraping for {url}")
-            return stealth_scrape_url(url, user_agent)
+            return await run_blocking(stealth_scrape_url, url, user_agent, timeout)
         except Exception as fallback_error:
             logging.error(f"Fallback stealth scraping also failed: {fallback_error}")
             raise HTTPException(status_code=400, detail=f"Both browser and stealth scraping failed: {str(e)}")
 
 # PDF scraping and text extraction endpoint
 @app.get("/scrape-pdf")
-def scrape_pdf_url(url: str, user_agent: Optional[str] = None) -> PDFResponse:
-    """Scrape PDF URL and extract text content."""
+def scrape_pdf_url(url: str, user_agent: Optional[str] = None, timeout: Optional[float] = None,
+                   pages: Optional[str] = None, max_pages: Optional[int] = None, stream: bool = False) -> PDFResponse:
+    """Scrape PDF URL and extract text content (optionally only some pages, optionally streamed as NDJSON)."""
     logging.info(f"Scraping PDF URL: {url}")
     start_time = time.time()
+    try:
+        page_spec = parse_page_spec(pages)
+        check_max_pages(max_pages)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     # Introduce random delay to mimic human behavior
     delay = random.uniform(1, 3)
@@ -581,22 +807,41 @@ def scrape_pdf_url(url: str, user_agent: Optional[str] = None) -> PDFResponse:
 
     try:
         session = create_http_session()
-        response = session.get(url, allow_redirects=True, timeout=30, headers=headers)
-        response.raise_for_status()
+        range_bytes = 0
+        if (page_spec or max_pages) and not stream:
+            # Only some pages are wanted: fetch just their byte ranges if the server allows
+            partial, range_bytes = fetch_pdf_range(url, headers, range_timeout(url, timeout), page_spec, max_pages)
+            if partial:
+                return partial_pdf_response(partial, start_time)
 
-        response_time = time.time() - start_time
-        redirect_count = len(response.history)
+        response = timed_request(session, 'GET', url, 30, timeout, allow_redirects=True, headers=headers,
+                                 stream=True)
+        response.raise_for_status()
 
         content_type = response.headers.get('Content-Type', '')
-        content_length = response.headers.get('Content-Length')
-        content_length = int(content_length) if content_length else len(response.content)
+        spool = PDFSpool()
+        try:
+            spool.check_length(response.headers.get('Content-Length'))
+            spool.fill(response.iter_content(DOWNLOAD_CHUNK_BYTES))
 
-        # Check if it's actually a PDF
-        if 'application/pdf' not in content_type and not response.content.startswith(b'%PDF'):
-            raise HTTPException(status_code=400, detail="URL does not contain PDF content")
+            response_time = time.time() - start_time
+            redirect_count = len(response.history)
+            content_length = spool.size
 
-        # Extract text from PDF
-        pdf_text, page_count, extraction_method = extract_pdf_text(response.content)
+            # Check if it's actually a PDF
+            if 'application/pdf' not in content_type and not spool.is_pdf():
+                raise HTTPException(status_code=400, detail="URL does not contain PDF content")
+
+            if stream:
+                page_stream = pdf_page_stream(spool, page_spec, max_pages)
+                spool = None  # Deleted by the response
+                return page_stream
+
+            # Extract text from PDF
+            pdf_text, page_count, extraction_method, page_methods = extract_pdf_file(spool.path, page_spec, max_pages)
+        finally:
+            if spool is not None:
+                spool.close()
 
         logging.info(f"Successfully scraped PDF {url} - Status: {response.status_code}, Pages: {page_count}, Method: {extraction_method}")
 
@@ -610,8 +855,13 @@ def scrape_pdf_url(url: str, user_agent: Optional[str] = None) -> PDFResponse:
             headers=dict(response.headers),
             pdf_text=pdf_text,
             page_count=page_count,
-            extraction_method=extraction_method
+            extraction_method=extraction_method,
+            page_methods=page_methods,
+            bytes_transferred=content_length + range_bytes
         )
+    except PDFTooLarge as e:
+        logging.error(f"Rejected PDF {url}: {e}")
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logging.error(f"Error scraping PDF URL {url}: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -620,36 +870,52 @@ def scrape_pdf_url(url: str, user_agent: Optional[str] = None) -> PDFResponse:
 
 # Async PDF scraping endpoint
 @app.post("/fetch-pdf/")
-async def fetch_pdf_content(request: URLRequest) -> PDFResponse:
-    """Fetch PDF content asynchronously and extract text."""
+async def fetch_pdf_content(request: PDFRequest) -> PDFResponse:
+    """Fetch PDF content asynchronously and extract text (optionally only some pages, optionally streamed as NDJSON)."""
     logging.info(f"Fetching PDF URL: {request.url}")
     start_time = time.time()
     
+    spool = None
     try:
+        page_spec = parse_page_spec(request.pages)
+        check_max_pages(request.max_pages)
         headers = get_headers(user_agent=request.user_agent, auth_token=request.auth_token)
         headers['Accept'] = 'application/pdf,application/octet-stream,*/*;q=0.8'
         
+        range_bytes = 0
+        if (page_spec or request.max_pages) and not request.stream:
+            # Only some pages are wanted: fetch just their byte ranges if the server allows
+            partial, range_bytes = await run_blocking(fetch_pdf_range, request.url, headers,
+                                                      range_timeout(request.url, request.timeout),
+                                                      page_spec, request.max_pages)
+            if partial:
+                return partial_pdf_response(partial, start_time)
+        
+        spool = PDFSpool()
         async with httpx.AsyncClient(
             follow_redirects=True,
-            timeout=request.timeout,
             headers=headers
         ) as client:
-            response = await client.get(request.url)
-            response.raise_for_status()
+            response = await stream_pdf(client, request.url, spool, request.timeout)
             
             response_time = time.time() - start_time
             redirect_count = len(response.history)
             
             content_type = response.headers.get('Content-Type', '')
-            content_length = response.headers.get('Content-Length')
-            content_length = int(content_length) if content_length else len(response.content)
+            content_length = spool.size
             
             # Check if it's actually a PDF
-            if 'application/pdf' not in content_type and not response.content.startswith(b'%PDF'):
+            if 'application/pdf' not in content_type and not spool.is_pdf():
                 raise HTTPException(status_code=400, detail="URL does not contain PDF content")
             
+            if request.stream:
+                page_stream = pdf_page_stream(spool, page_spec, request.max_pages)
+                spool = None  # Deleted by the response
+                return page_stream
+            
             # Extract text from PDF
-            pdf_text, page_count, extraction_method = extract_pdf_text(response.content)
+            pdf_text, page_count, extraction_method, page_methods = await run_pdf_extraction(spool.path, page_spec,
+                                                                                request.max_pages)
             
             logging.info(f"Successfully fetched PDF {request.url} - Status: {response.status_code}, Pages: {page_count}, Method: {extraction_method}")
             
@@ -663,8 +929,17 @@ async def fetch_pdf_content(request: URLRequest) -> PDFResponse:
                 headers=dict(response.headers),
                 pdf_text=pdf_text,
                 page_count=page_count,
-                extraction_method=extraction_method
+                extraction_method=extraction_method,
+                page_methods=page_methods,
+                bytes_transferred=content_length + range_bytes
             )
+    except PDFTooLarge as e:
+        logging.error(f"Rejected PDF {request.url}: {e}")
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        # Invalid page selections
+        logging.error(f"Rejected PDF request {request.url}: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
     except httpx.RequestError as e:
         logging.error(f"Request error for PDF URL {request.url}: {e}")
         raise HTTPException(status_code=400, detail=f"Request failed: {str(e)}")
@@ -674,17 +949,103 @@ async def fetch_pdf_content(request: URLRequest) -> PDFResponse:
     except Exception as e:
         logging.error(f"Unexpected error for PDF URL {request.url}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if spool is not None:
+            spool.close()
+
+# Image OCR endpoint
+@app.get("/scrape-image")
+async def scrape_image_url(url: str, user_agent: Optional[str] = None, timeout: Optional[float] = None) -> ImageResponse:
+    """Download an image (size-capped) and extract its text with OCR."""
+    logging.info(f"Scraping image URL: {url}")
+    start_time = time.time()
 
-# Smart URL endpoint that detects and handles both HTML and PDF content
+    headers = get_headers(user_agent=user_agent)
+    headers['Accept'] = IMAGE_ACCEPT
+
+    try:
+        async with create_async_client(headers) as client:
+            response, image_bytes = await stream_image(client, url, timeout)
+
+        image_format, dimensions = probe_image(image_bytes)
+        ocr = await run_ocr(image_bytes)
+
+        logging.info(f"Successfully OCR'd image {url} - {image_format} {dimensions[0]}x{dimensions[1]}, "
+                     f"psm {ocr['psm']}, confidence {ocr['confidence']}")
+        return image_response(response, image_bytes, dimensions, ocr, start_time)
+    except ImageRejected as e:
+        logging.error(f"Rejected image {url}: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except httpx.RequestError as e:
+        logging.error(f"Request error for image URL {url}: {e}")
+        raise HTTPException(status_code=400, detail=f"Request failed: {str(e)}")
+    except httpx.HTTPStatusError as e:
+        logging.error(f"HTTP error for image URL {url}: {e}")
+        raise HTTPException(status_code=e.response.status_code, detail=f"HTTP {e.response.status_code}: {e.response.reason_phrase}")
+    except Exception as e:
+        logging.error(f"Unexpected error for image URL {url}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Bulk image OCR endpoint
+@app.post("/batch-ocr")
+async def batch_ocr(request: BatchOCRRequest) -> list[ImageResponse]:
+    """OCR several images: concurrent downloads, identical images OCR'd once."""
+    if len(request.urls) > MAX_BATCH_IMAGES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IMAGES} images per batch")
+    logging.info(f"Batch OCR of {len(request.urls)} images")
+    start_time = time.time()
+
+    headers = get_headers(user_agent=request.user_agent)
+    headers['Accept'] = IMAGE_ACCEPT
+
+    # Each image is downloaded, probed and OCR'd while holding one of BATCH_BUFFERED_IMAGES slots;
+    # identical images share one OCR task
+    slots = asyncio.Semaphore(BATCH_BUFFERED_IMAGES)
+    ocr_tasks = {}
+
+    async def ocr_item(client: httpx.AsyncClient, url: str) -> ImageResponse:
+        async with slots:
+            try:
+                response, image_bytes = await stream_image(client, url, request.timeout)
+            except Exception as e:
+                failed = e.response if isinstance(e, httpx.HTTPStatusError) else None
+                return failed_image_response(url, start_time, failed, error=str(e) or type(e).__name__)
+            try:
+                _, dimensions = probe_image(image_bytes)
+                digest = image_hash(image_bytes)
+                if digest not in ocr_tasks:
+                    ocr_tasks[digest] = asyncio.ensure_future(run_ocr(image_bytes))
+                ocr = await ocr_tasks[digest]
+            except Exception as e:
+                return failed_image_response(url, start_time, response, len(image_bytes),
+                                             ocr_error=str(e) or type(e).__name__)
+            return image_response(response, image_bytes, dimensions, ocr, start_time)
+
+    async with create_async_client(headers, httpx.Limits(max_connections=10)) as client:
+        results = await asyncio.gather(*(ocr_item(client, url) for url in request.urls))
+    logging.info(f"Batch OCR: {len(ocr_tasks)} distinct of {len(request.urls)} images")
+    return results
+
+# Smart URL endpoint that detects and handles HTML, PDF and image content
 @app.get("/smart-scrape")
-async def smart_scrape_url(url: str, user_agent: Optional[str] = None, extract_images: bool = True, delay: int = 2):
-    """Smart scraping that automatically detects content type and handles accordingly."""
+async def smart_scrape_url(url: str, user_agent: Optional[str] = None, extract_images: bool = True, delay: int = 2,
+                           timeout: Optional[float] = None, pages: Optional[str] = None,
+                           max_pages: Optional[int] = None):
+    """Smart scraping that automatically detects content type and handles accordingly.
+
+    pages and max_pages limit which pages are extracted when the URL turns out to be a PDF.
+    """
     logging.info(f"Smart scraping URL: {url}")
     start_time = time.time()
+    try:
+        page_spec = parse_page_spec(pages)
+        check_max_pages(max_pages)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     # Introduce random delay
     actual_delay = random.uniform(1, 3) if delay == 2 else delay
-    time.sleep(actual_delay)
+    await asyncio.sleep(actual_delay)
     
     # Domain-specific handling - detect if we should use Playwright
     parsed_url = urlparse(url)
@@ -694,7 +1055,7 @@ async def smart_scrape_url(url: str, user_agent: Optional[str] = None, extract_i
         logging.info(f"Detected JavaScript-heavy site, using browser scraping for {url}")
         try:
             # Use browser scraping for JavaScript-heavy sites
-            browser_result = await browser_scrape_url(url, user_agent)
+            browser_result = await browser_scrape_url(url, user_agent, timeout=timeout)
             
             # Convert browser result to smart-scrape format
             return {
@@ -719,46 +1080,89 @@ async def smart_scrape_url(url: str, user_agent: Optional[str] = None, extract_i
         headers = get_headers(user_agent=user_agent)
 
     try:
-        session = create_http_session()
-        
-        # First, make a HEAD request to check content type
-        head_response = session.head(url, allow_redirects=True, timeout=10, headers=headers)
-        content_type = head_response.headers.get('Content-Type', '').lower()
-        
-        # If HEAD request fails, proceed with GET
-        if head_response.status_code >= 400:
-            response = session.get(url, allow_redirects=True, timeout=30, headers=headers)
-        else:
-            response = session.get(url, allow_redirects=True, timeout=30, headers=headers)
-        
-        response.raise_for_status()
-        
-        # Check actual content type
-        actual_content_type = response.headers.get('Content-Type', '').lower()
-        
-        # Detect if it's a PDF (by content type or content signature)
-        is_pdf = ('application/pdf' in actual_content_type or 
-                 response.content.startswith(b'%PDF'))
+        async with create_async_client(headers) as client:
+            # First, make a HEAD request to check content type
+            head_response = await timed_httpx_request(client, 'HEAD', url, 10, timeout)
+            content_type = head_response.headers.get('Content-Type', '').lower()
+
+            # Images go through the size-capped download and OCR path
+            if head_response.status_code < 400 and content_type.startswith('image/'):
+                image_result = await scrape_image_url(url, user_agent, timeout)
+                return {"content_type": "image", **image_result.model_dump(), "method": "ocr"}
+            
+            # If HEAD request fails, proceed with GET
+            async with timed_httpx_stream(client, url, 30, timeout) as response:
+                response.raise_for_status()
+                
+                # Check actual content type
+                actual_content_type = response.headers.get('Content-Type', '').lower()
+                
+                # Detect if it's a PDF (by content type or content signature); PDFs are streamed to disk
+                chunks = response.aiter_bytes(DOWNLOAD_CHUNK_BYTES)
+                try:
+                    first_chunk = await chunks.__anext__()
+                except StopAsyncIteration:
+                    first_chunk = b''
+                is_pdf = ('application/pdf' in actual_content_type or 
+                         first_chunk.startswith(b'%PDF'))
+                body = None
+                spool = None
+                if actual_content_type.startswith('image/'):
+                    body = await read_image_body(response, chunks, first_chunk)
+                elif not is_pdf:
+                    body = first_chunk + b''.join([chunk async for chunk in chunks])
+                else:
+                    spool = PDFSpool()
+                    try:
+                        spool.check_length(response.headers.get('Content-Length'))
+                        spool.write(first_chunk)
+                        async for chunk in chunks:
+                            spool.write(chunk)
+                        spool.finish()
+                    except BaseException:
+                        spool.close()
+                        raise
         
-        if is_pdf:
+        if actual_content_type.startswith('image/'):
+            # HEAD did not report the image type; OCR the downloaded body
+            image_format, dimensions = probe_image(body)
+            ocr = await run_ocr(body)
+            logging.info(f"Smart scraped image {url} - {image_format} {dimensions[0]}x{dimensions[1]}")
+            return {
+                "content_type": "image",
+                "final_url": str(response.url),
+                "status_code": response.status_code,
+                "redirect_count": len(response.history),
+                "response_time": time.time() - start_time,
+                "extracted_text": ocr['text'],
+                "image_dimensions": dimensions,
+                "extraction_method": f"tesseract-psm{ocr['psm']}",
+                "confidence_score": ocr['confidence'],
+                "content_length": len(body),
+                "method": "ocr"
+            }
+        elif is_pdf:
             # Handle as PDF
-            response_time = time.time() - start_time
-            redirect_count = len(response.history)
-            content_length = len(response.content)
-            
-            pdf_text, page_count, extraction_method = extract_pdf_text(response.content)
+            with spool:
+                response_time = time.time() - start_time
+                redirect_count = len(response.history)
+                content_length = spool.size
+                
+                pdf_text, page_count, extraction_method, page_methods = await run_pdf_extraction(spool.path, page_spec,
+                                                                                    max_pages)
             
             logging.info(f"Smart scraped PDF {url} - Status: {response.status_code}, Pages: {page_count}")
             
             return {
                 "content_type": "pdf",
-                "final_url": response.url,
+                "final_url": str(response.url),
                 "status_code": response.status_code,
                 "redirect_count": redirect_count,
                 "response_time": response_time,
                 "pdf_text": pdf_text,
                 "page_count": page_count,
                 "extraction_method": extraction_method,
+                "page_methods": page_methods,
                 "content_length": content_length
             }
         else:
@@ -770,13 +1174,13 @@ async def smart_scrape_url(url: str, user_agent: Optional[str] = None, extract_i
             
             content_preview = None
             if 'text/' in actual_content_type or 'application/json' in actual_content_type:
-                content_preview = response.text[:1000]
+                content_preview = body.decode(response.encoding or 'utf-8', errors='replace')[:1000]
             
             logging.info(f"Smart scraped HTML {url} - Status: {response.status_code}")
             
             return {
                 "content_type": "html",
-                "final_url": response.url,
+                "final_url": str(response.url),
                 "status_code": response.status_code,
                 "redirect_count": redirect_count,
                 "response_time": response_time,
@@ -786,11 +1190,14 @@ async def smart_scrape_url(url: str, user_agent: Optional[str] = None, extract_i
                 "method": "traditional"
             }
             
+    except HTTPException:
+        raise
+    except PDFTooLarge as e:
+        logging.error(f"Rejected PDF {url}: {e}")
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logging.error(f"Error in smart scraping URL {url}: {e}")
         raise HTTPException(status_code=400, detail=str(e))
-    finally:
-        session.close()
 
 # Health check endpoint
 @app.get("/health")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark PyPDF2, pdfplumber and probe-based extractor selection
+
+For each fixture, extracts every page with PyPDF2 and with pdfplumber and
+runs extract_pdf_file, which probes the first pages with PyPDF2 and picks
+the extractor from the probe score. Reports time, word recall against the
+known text (generated fixtures only) and the probe's decision. Pass PDF
+files as arguments, or run without arguments to use generated fixtures: a
+report with one string per line, which PyPDF2 reads well, and a layout that
+places every word separately, where PyPDF2 runs the words together.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmark_pdf_memory import line_stream, page_lines, write_pdf
+from pdf_extract import (PROBE_PAGES, count_pages, extract_page_texts, extract_pages, extract_pdf_file,
+                         probe_problem, score_text, shutdown_pdf_pool)
+
+PAGE_COUNT = 60
+
+
+def word_stream(page):
+    """Content stream drawing page_lines(page) one word at a time, with no space characters"""
+    ops = []
+    for line in page_lines(page):
+        x = 0
+        for word in line.split():
+            ops.append(f"({word}) Tj {len(word) * 6 + 4} 0 Td")
+            x += len(word) * 6 + 4
+        ops.append(f"{-x} -14 Td")
+    return f"BT /F1 10 Tf 50 760 Td {' '.join(ops)} ET"
+
+
+def word_recall(expected, text):
+    """Share of expected words found in the extracted text"""
+    expected_words = expected.lower().split()
+    found = set(text.lower().split())
+    return sum(word in found for word in expected_words) / len(expected_words)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        if sys.argv[1:]:
+            fixtures = [(path, path, None) for path in sys.argv[1:]]
+        else:
+            expected = ' '.join(line for page in range(PAGE_COUNT) for line in page_lines(page))
+            fixtures = []
+            for name, page_stream in (("line strings", line_stream), ("positioned words", word_stream)):
+                path = os.path.join(directory, name.replace(' ', '_') + '.pdf')
+                write_pdf(path, page_count=PAGE_COUNT, padding_mb=0, page_stream=page_stream)
+                fixtures.append((name, path, expected))
+
+        print("🚀 PDF extractor benchmark")
+        print("=" * 80)
+        try:
+            for name, path, expected in fixtures:
+                page_count = count_pages(path)
+                probe = score_text(extract_page_texts(path, 'PyPDF2', list(range(min(PROBE_PAGES, page_count)))))
+                print(f"\n📄 {name}: {page_count} pages")
+                print(f"   probe: {probe['density']:.0f} chars/page, garbage {probe['garbage']:.1%}, "
+                      f"whitespace {probe['whitespace']:.1%}, mean word length {probe['word_length']:.1f} "
+                      f"-> {probe_problem(probe) or 'ok'}")
+
+                runs = []
+                for method in ('PyPDF2', 'pdfplumber'):
+                    elapsed, pages = timed(extract_pages, path, method, list(range(page_count)))
+                    runs.append((method, elapsed, '\n'.join(pages)))
+                elapsed, (text, _, method, _) = timed(extract_pdf_file, path)
+                runs.append((f"selected: {method}", elapsed, text))
+
+                for label, elapsed, text in runs:
+                    recall = f"  recall={word_recall(expected, text):.0%}" if expected else ""
+                    print(f"   {label:<52} {elapsed:6.2f} s  chars={len(text)}{recall}")
+        finally:
+            shutdown_pdf_pool()
+
+
+if __name__ == "__main__":
+    main()
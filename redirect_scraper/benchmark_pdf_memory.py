@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory of PDF download + extraction
+
+Compares the original path (whole body in response.content, wrapped in
+BytesIO for each extractor) with the streamed path (body written to a
+PDFSpool temp file, extracted by the process pool through mmap). Each mode
+runs in a fresh process so its peak RSS (ru_maxrss) is its own; the pool
+workers' peak is reported separately.
+
+    python benchmark_pdf_memory.py [pdf_url]
+
+Without a URL, a generated 55 MB PDF (120 text pages plus an embedded
+binary stream) is served from a local HTTP server.
+"""
+
+import functools
+import http.server
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import pdfplumber
+import requests
+
+from pdf_extract import DOWNLOAD_CHUNK_BYTES, PDFSpool, extract_pdf_file, shutdown_pdf_pool
+
+MODES = ['buffered', 'streamed']
+
+
+def page_lines(page, count=40):
+    return [f"Page {page + 1} line {n}: revenue and production guidance" for n in range(count)]
+
+
+def line_stream(page):
+    """Content stream drawing page_lines(page) as one string per line"""
+    lines = " ".join(f"({line}) Tj T*" for line in page_lines(page))
+    return f"BT /F1 10 Tf 14 TL 50 760 Td {lines} ET"
+
+
+def write_pdf(path, page_count=120, padding_mb=55, page_stream=line_stream):
+    """Write a valid PDF with page_count text pages and an unreferenced binary stream
+
+    page_stream(page) returns each page's content stream. Written object by
+    object, so generating the fixture does not raise this process's peak RSS,
+    which the measured child processes would inherit.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(page_count))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {page_count} >>".encode())
+    font_id = 3 + 2 * page_count
+    for i in range(page_count):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R "
+                       f"/Resources << /Font << /F1 {font_id} 0 R >> >> >>".encode())
+        stream = page_stream(i).encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    with open(path, 'wb') as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+        if padding_mb:
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n<< /Length %d >>\nstream\n" % (len(offsets), padding_mb * 1024 * 1024))
+            for _ in range(padding_mb):
+                f.write(os.urandom(1024 * 1024))
+            f.write(b"\nendstream\nendobj\n")
+
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(offsets) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets) + 1, xref))
+
+
+def run_buffered(url):
+    """The original path: response.content, then a BytesIO copy per extractor"""
+    response = requests.get(url, timeout=60)
+    response.raise_for_status()
+    with pdfplumber.open(io.BytesIO(response.content)) as pdf:
+        text = '\n'.join(page.extract_text() or '' for page in pdf.pages)
+        return len(response.content), len(pdf.pages), "pdfplumber" if text.strip() else "failed"
+
+
+def run_streamed(url):
+    response = requests.get(url, timeout=60, stream=True)
+    response.raise_for_status()
+    with PDFSpool() as spool:
+        spool.check_length(response.headers.get('Content-Length'))
+        spool.fill(response.iter_content(DOWNLOAD_CHUNK_BYTES))
+        _, page_count, method, _ = extract_pdf_file(spool.path)
+        size = spool.size
+    shutdown_pdf_pool()
+    return size, page_count, method
+
+
+def run_mode(mode, url):
+    """Child process: run one mode and print its measurements as JSON"""
+    start = time.perf_counter()
+    size, page_count, method = (run_buffered if mode == 'buffered' else run_streamed)(url)
+    print(json.dumps({
+        'elapsed': time.perf_counter() - start,
+        'size': size,
+        'pages': page_count,
+        'method': method,
+        # ru_maxrss is in KB on Linux
+        'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'workers_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    }))
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve(directory):
+    handler = functools.partial(QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    if sys.argv[1:2] == ['--run']:
+        run_mode(sys.argv[2], sys.argv[3])
+        return
+
+    server = None
+    with tempfile.TemporaryDirectory() as directory:
+        if sys.argv[1:]:
+            url = sys.argv[1]
+        else:
+            write_pdf(os.path.join(directory, 'report.pdf'))
+            server = serve(directory)
+            url = f"http://127.0.0.1:{server.server_address[1]}/report.pdf"
+
+        print("🚀 PDF memory benchmark")
+        print("=" * 80)
+        for mode in MODES:
+            output = subprocess.run([sys.executable, __file__, '--run', mode, url],
+                                    capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"   {mode:<9} {result['size'] / 1024 / 1024:6.1f} MB, {result['pages']} pages "
+                  f"({result['method']}) in {result['elapsed']:.2f}s  peak RSS {result['rss_mb']:.0f} MB"
+                  f"  workers {result['workers_rss_mb']:.0f} MB")
+        if server:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
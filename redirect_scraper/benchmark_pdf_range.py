@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark partial PDF retrieval with HTTP range requests
+
+For each max_pages value, extracts the first pages with fetch_pdf_range and
+reports the bytes transferred, the number of requests and the time, against
+a full download of the file.
+
+    python benchmark_pdf_range.py [pdf_url]
+
+Without a URL, the generated 55 MB PDF from benchmark_pdf_memory.py is served
+from a local HTTP server that supports single byte ranges.
+"""
+
+import functools
+import http.server
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+from benchmark_pdf_memory import QuietHandler, write_pdf
+from pdf_extract import shutdown_pdf_pool
+from pdf_range import fetch_pdf_range
+
+PAGE_LIMITS = [1, 5, 20]
+
+
+class RangeHandler(QuietHandler):
+    """SimpleHTTPRequestHandler plus single-range GET support"""
+
+    def send_head(self):
+        match = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        path = self.translate_path(self.path)
+        if not match or not os.path.isfile(path):
+            return super().send_head()
+        size = os.path.getsize(path)
+        start = int(match.group(1))
+        end = min(int(match.group(2)) if match.group(2) else size - 1, size - 1)
+        f = open(path, 'rb')
+        f.seek(start)
+        self.send_response(206)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        return RangeBody(f, end - start + 1)
+
+
+class RangeBody:
+    """The requested slice of a file, for copyfile"""
+
+    def __init__(self, f, length):
+        self.f = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+def serve(directory):
+    handler = functools.partial(RangeHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    server = None
+    with tempfile.TemporaryDirectory() as directory:
+        if sys.argv[1:]:
+            url = sys.argv[1]
+        else:
+            write_pdf(os.path.join(directory, 'report.pdf'))
+            server = serve(directory)
+            url = f"http://127.0.0.1:{server.server_address[1]}/report.pdf"
+
+        print("🚀 PDF range retrieval benchmark")
+        print("=" * 80)
+        start = time.perf_counter()
+        size = len(httpx.get(url, follow_redirects=True, timeout=60).content)
+        print(f"   full download     {size / 1024 / 1024:8.2f} MB  1 request   {time.perf_counter() - start:6.2f} s")
+
+        try:
+            for max_pages in PAGE_LIMITS:
+                start = time.perf_counter()
+                result, transferred = fetch_pdf_range(url, {}, httpx.Timeout(60), max_pages=max_pages)
+                elapsed = time.perf_counter() - start
+                if result is None:
+                    print(f"   first {max_pages:>2} pages     fell back to a full download after "
+                          f"{transferred / 1024:.0f} KB")
+                    continue
+                print(f"   first {max_pages:>2} pages     {transferred / 1024 / 1024:8.2f} MB  "
+                      f"{result['requests']} requests {elapsed:6.2f} s  "
+                      f"({transferred / result['total_size']:.2%} of {result['page_count']} pages)")
+        finally:
+            shutdown_pdf_pool()
+            if server:
+                server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Image OCR for the /scrape-image, /batch-ocr and /smart-scrape endpoints.
+Images are checked from their header before decoding. OCR runs on this app's
+process pool with the scraper's OCR stack (ocr_pool.py, ocr_preprocess.py,
+ocr_engine.py), trying page segmentation modes until one is confident.
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from pdf_executors import LazyPool, ocr_workers
+from shared_modules import use_shared_modules
+use_shared_modules()
+from ocr_engine import get_engine
+from ocr_pool import DEFAULT_MIN_CONFIDENCE, DEFAULT_PSM_CANDIDATES, ocr_image as ocr_pil_image
+from ocr_preprocess import preprocess_options
+
+MAX_IMAGE_BYTES = int(os.getenv('MAX_IMAGE_BYTES', 20 * 1024 * 1024))
+MAX_IMAGE_PIXELS = 60_000_000  # Larger images are rejected as decompression bombs
+OCR_MAX_SIDE = 3000  # Larger JPEGs are decoded, and PDF pages rendered, at reduced scale
+OCR_PREPROCESS = preprocess_options()
+
+_pool = LazyPool(lambda: ProcessPoolExecutor(max_workers=ocr_workers(), initializer=get_engine))
+
+
+class ImageRejected(ValueError):
+    """The image is too large, not decodable or not an image at all"""
+
+
+def image_hash(image_bytes: bytes) -> str:
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def probe_image(image_bytes: bytes) -> tuple[str, tuple[int, int]]:
+    """Format and (width, height) from the header, without decoding pixels."""
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+    except Exception as e:
+        raise ImageRejected(f"Not a decodable image: {e}")
+    width, height = img.size
+    if width * height > MAX_IMAGE_PIXELS:
+        raise ImageRejected(f"Image too large to OCR: {width}x{height}")
+    return img.format, (width, height)
+
+
+def ocr_image(image_bytes: bytes) -> dict:
+    """OCR an encoded image (runs in a pool worker).
+
+    Returns text, confidence (mean word confidence 0-100) and the winning psm.
+    """
+    img = Image.open(io.BytesIO(image_bytes))
+    if max(img.size) > OCR_MAX_SIDE:
+        img.draft('L', (OCR_MAX_SIDE, OCR_MAX_SIDE))
+    return ocr_decoded(img)
+
+
+def ocr_decoded(img: Image.Image) -> dict:
+    """ocr_image for an image that is already decoded, such as a rendered PDF page."""
+    result = ocr_pil_image(img, preprocess=OCR_PREPROCESS, psm_order=DEFAULT_PSM_CANDIDATES,
+                           min_confidence=DEFAULT_MIN_CONFIDENCE)
+    return {'text': result['text'] or '', 'confidence': result['confidence'], 'psm': result['psm']}
+
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    """The OCR process pool shared by all endpoints, created on first use."""
+    return _pool.get()
+
+
+def shutdown_ocr_pool():
+    """Stop the worker processes; a new pool is created on next use."""
+    _pool.shutdown()
+
+
+async def run_ocr(image_bytes: bytes) -> dict:
+    """OCR on the shared pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_ocr_pool(), ocr_image, image_bytes)
@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-import requests
+import httpx
 
 app = FastAPI()
 
@@ -10,15 +10,15 @@ class URLRequest(BaseModel):
 @app.post("/fetch/")
 async def fetch_url_content(request: URLRequest):
     try:
-        with requests.Session() as session:
-            response = session.get(request.url, allow_redirects=True, timeout=15)
+        async with httpx.AsyncClient(follow_redirects=True, timeout=15) as client:
+            response = await client.get(request.url)
             response.raise_for_status()
 
             content_type = response.headers.get('Content-Type', '')
             if 'application/pdf' in content_type:
-                return {"message": "PDF content detected", "final_url": response.url}
+                return {"message": "PDF content detected", "final_url": str(response.url)}
             else:
                 preview = response.text[:1000]
-                return {"message": "HTML/Text content", "final_url": response.url, "preview": preview}
-    except requests.exceptions.RequestException as e:
+                return {"message": "HTML/Text content", "final_url": str(response.url), "preview": preview}
+    except httpx.HTTPError as e:
         raise HTTPException(status_code=400, detail=str(e))
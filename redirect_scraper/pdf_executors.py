@@ -0,0 +1,85 @@
+"""
+Sized executors for the blocking and CPU-bound work of async endpoints:
+the PDF (PDF_WORKERS) and OCR (OCR_WORKERS) process pools share PROCESS_WORKERS
+processes per web worker, and blocking calls run on BLOCKING_THREADS threads.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+def env_count(name: str, default: int) -> int:
+    """Positive integer from environment variable name, else default."""
+    configured = os.getenv(name, '')
+    return int(configured) if configured.isdigit() and int(configured) > 0 else default
+
+
+class LazyPool:
+    """A process-wide executor, created on first use and again after shutdown()."""
+
+    def __init__(self, factory: Callable[[], Executor]):
+        self.factory = factory
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = self.factory()
+            return self._executor
+
+    def shutdown(self, wait: bool = False):
+        """Stop the executor, cancelling queued work."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+
+def worker_error(e: Exception) -> RuntimeError:
+    """A RuntimeError with e's type and message, to raise from a pool worker instead of e.
+
+    Library exceptions (Tesseract, PDF parsers, pdfium) may not unpickle in the
+    parent, which breaks the whole process pool.
+    """
+    return RuntimeError(f"{type(e).__name__}: {e}")
+
+
+def blocking_threads() -> int:
+    return env_count('BLOCKING_THREADS', min(32, (os.cpu_count() or 1) + 4))
+
+
+def process_budget() -> int:
+    """Worker processes this web worker may start across the PDF and OCR pools."""
+    return env_count('PROCESS_WORKERS', max(1, (os.cpu_count() or 1) // env_count('WEB_CONCURRENCY', 1)))
+
+
+def pdf_workers() -> int:
+    return env_count('PDF_WORKERS', max(1, process_budget() // 2))
+
+
+def ocr_workers() -> int:
+    return env_count('OCR_WORKERS', max(1, process_budget() - pdf_workers()))
+
+
+_threads = LazyPool(lambda: ThreadPoolExecutor(max_workers=blocking_threads(), thread_name_prefix='blocking'))
+
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    """The thread pool for blocking calls, created on first use."""
+    return _threads.get()
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the thread pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_blocking_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_blocking_executor():
+    """Stop the threads; a new pool is created on next use."""
+    _threads.shutdown()
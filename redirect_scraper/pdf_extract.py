@@ -0,0 +1,487 @@
+"""
+PDF text extraction for the /scrape-pdf, /fetch-pdf/ and /smart-scrape endpoints.
+Pages are extracted on a process pool from a memory-mapped temp file, with
+PyPDF2 or pdfplumber as a probe of the first pages decides; pages without a
+text layer are rendered and OCR'd.
+"""
+
+import itertools
+import logging
+import mmap
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+from typing import Optional
+
+import pdfplumber
+import PyPDF2
+
+from pdf_executors import LazyPool, pdf_workers, run_blocking, worker_error
+from image_ocr import OCR_MAX_SIDE, get_ocr_pool, ocr_decoded
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+MAX_PDF_BYTES = int(os.getenv('MAX_PDF_BYTES', 100 * 1024 * 1024))
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+MIN_PAGES_PER_WORKER = 4  # Fewer pages than this are not worth another document parse
+
+PROBE_PAGES = 3
+MIN_CHARS_PER_PAGE = 100  # Non-whitespace characters; fewer suggests missing or scanned text
+MAX_GARBAGE_RATIO = 0.02
+MAX_MEAN_WORD_LENGTH = 10.0  # Above this, words are being run together (English averages about 5)
+MAX_WHITESPACE_RATIO = 0.35  # Above this, characters are being spaced apart
+
+OCR_DPI = int(os.getenv('PDF_OCR_DPI', 200))
+OCR_MAX_PAGES = int(os.getenv('PDF_OCR_MAX_PAGES', 20))
+OCR_TIME_BUDGET = float(os.getenv('PDF_OCR_TIME_BUDGET', 60))
+
+PAGE_SPEC_RE = re.compile(r'^\s*(\d+)\s*(-\s*(\d*))?\s*$')
+
+# Unmapped glyphs, replacement characters, control and private-use characters
+GARBAGE_RE = re.compile(r'\(cid:\d+\)|[\ufffd\x00-\x08\x0b\x0c\x0e-\x1f\ue000-\uf8ff]')
+
+_pool = LazyPool(lambda: ProcessPoolExecutor(max_workers=pool_size()))
+
+
+class PDFTooLarge(ValueError):
+    """The PDF exceeds MAX_PDF_BYTES"""
+
+
+class PDFSpool:
+    """A downloaded PDF written to a named temp file as it streams in; deleted on close."""
+
+    def __init__(self, max_bytes: int = MAX_PDF_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.head = b''
+        self.file = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+        self.path = self.file.name
+
+    def check_length(self, declared_length: Optional[str]):
+        if declared_length and declared_length.isdigit() and int(declared_length) > self.max_bytes:
+            raise PDFTooLarge(f"PDF is {int(declared_length)} bytes, limit is {self.max_bytes}")
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise PDFTooLarge(f"PDF exceeds the {self.max_bytes} byte limit")
+        if len(self.head) < 1024:
+            self.head += chunk[:1024 - len(self.head)]
+        self.file.write(chunk)
+
+    def fill(self, chunks) -> 'PDFSpool':
+        for chunk in chunks:
+            self.write(chunk)
+        self.finish()
+        return self
+
+    def finish(self):
+        """Flush to disk so the pool workers can map the file."""
+        self.file.close()
+
+    def is_pdf(self) -> bool:
+        return self.head.lstrip().startswith(b'%PDF')
+
+    def close(self):
+        self.file.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> 'PDFSpool':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def pool_size() -> int:
+    return pdf_workers()
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """The PDF extraction process pool, created on first use."""
+    return _pool.get()
+
+
+def shutdown_pdf_pool():
+    """Stop the worker processes; a new pool is created on next use."""
+    _pool.shutdown(wait=True)
+
+
+def parse_page_spec(spec: Optional[str]) -> Optional[list[tuple[int, Optional[int]]]]:
+    """Parse a pages= value such as '1-3,7,10-' into inclusive 1-based (first, last) ranges.
+
+    last is None for an open-ended range. Raises ValueError on malformed input.
+    """
+    if not spec or not spec.strip():
+        return None
+    ranges = []
+    for part in spec.split(','):
+        match = PAGE_SPEC_RE.match(part)
+        if not match:
+            raise ValueError(f"Invalid page range: {part.strip()!r}")
+        first = int(match.group(1))
+        last = first if match.group(2) is None else int(match.group(3)) if match.group(3) else None
+        if first < 1 or (last is not None and last < first):
+            raise ValueError(f"Invalid page range: {part.strip()!r}")
+        ranges.append((first, last))
+    return ranges
+
+
+def check_max_pages(max_pages: Optional[int]) -> Optional[int]:
+    if max_pages is not None and max_pages < 1:
+        raise ValueError("max_pages must be at least 1")
+    return max_pages
+
+
+def select_pages(page_count: int, page_spec: Optional[list[tuple[int, Optional[int]]]] = None,
+                 max_pages: Optional[int] = None) -> list[int]:
+    """0-based indices of the requested pages that exist, in order, capped at max_pages."""
+    if page_spec is None:
+        indices = list(range(page_count))
+    else:
+        requested = set()
+        for first, last in page_spec:
+            requested.update(range(first - 1, min(last or page_count, page_count)))
+        indices = sorted(requested)
+    return indices[:max_pages] if max_pages is not None else indices
+
+
+def page_chunks(indices: list[int], chunks: int) -> list[list[int]]:
+    """Split page indices into at most `chunks` consecutive runs of similar size."""
+    chunks = max(1, min(chunks, len(indices) // MIN_PAGES_PER_WORKER))
+    size, extra = divmod(len(indices), chunks)
+    runs = []
+    start = 0
+    for i in range(chunks):
+        stop = start + size + (1 if i < extra else 0)
+        runs.append(indices[start:stop])
+        start = stop
+    return runs
+
+
+def count_pages(path: str) -> int:
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        return count_pages_in(data)
+
+
+def count_pages_in(data) -> int:
+    """Page count of a PDF in a seekable binary file object (mmap, RangeFile)."""
+    try:
+        return len(PyPDF2.PdfReader(data).pages)
+    except Exception:
+        with pdfplumber.open(data) as pdf:
+            return len(pdf.pages)
+
+
+def extract_page_texts(path: str, method: str, indices: list[int]) -> list[str]:
+    """Texts of the pages at 0-based indices of the PDF at path (runs in a pool worker).
+
+    Only the requested pages are parsed.
+    """
+    if not indices:
+        return []
+    try:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return read_page_texts(data, method, indices)
+    except Exception as e:
+        raise worker_error(e) from None
+
+
+def read_page_texts(data, method: str, indices: list[int]) -> list[str]:
+    """extract_page_texts for a seekable binary file object."""
+    if not indices:
+        return []
+    if method == 'pdfplumber':
+        with pdfplumber.open(data, pages=[i + 1 for i in indices]) as pdf:
+            texts = []
+            for page in pdf.pages:
+                texts.append(page.extract_text() or '')
+                page.close()  # Drop the page's parsed layout objects
+            return texts
+    reader = PyPDF2.PdfReader(data)
+    return [reader.pages[i].extract_text() or '' for i in indices]
+
+
+def iter_page_texts(path: str, method: str, indices: list[int], chunks: Optional[int] = None):
+    """Yield page texts in order as the pool finishes each run of pages (chunks runs, default one per worker)."""
+    if not indices:
+        return
+    pool = get_pdf_pool()
+    futures = [pool.submit(extract_page_texts, path, method, run)
+               for run in page_chunks(indices, chunks or pool_size())]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def extract_pages(path: str, method: str, indices: list[int]) -> list[str]:
+    """Texts of the pages at indices in order, runs of pages extracted in parallel on the pool."""
+    return list(iter_page_texts(path, method, indices))
+
+
+def score_text(pages: list[str]) -> dict:
+    """Text density (non-whitespace characters per page), garbage ratio, whitespace ratio and mean word length."""
+    text = '\n'.join(pages)
+    whitespace = sum(char.isspace() for char in text)
+    garbage = sum(len(match) for match in GARBAGE_RE.findall(text))
+    words = len(text.split())
+    return {
+        'density': (len(text) - whitespace) / max(len(pages), 1),
+        'garbage': garbage / len(text) if text else 0.0,
+        'whitespace': whitespace / len(text) if text else 0.0,
+        'word_length': (len(text) - whitespace) / words if words else 0.0,
+    }
+
+
+def probe_problem(score: dict) -> Optional[str]:
+    """Why a probe score rules out the fast extractor, or None if it is good enough."""
+    if score['density'] < MIN_CHARS_PER_PAGE:
+        return f"low density {score['density']:.0f} chars/page"
+    if score['garbage'] > MAX_GARBAGE_RATIO:
+        return f"garbage {score['garbage']:.0%}"
+    if score['word_length'] > MAX_MEAN_WORD_LENGTH:
+        return f"run-together words, mean length {score['word_length']:.1f}"
+    if score['whitespace'] > MAX_WHITESPACE_RATIO:
+        return f"spaced-out characters, whitespace {score['whitespace']:.0%}"
+    return None
+
+
+def probe(path: str, indices: list[int]) -> tuple[list[str], Optional[str]]:
+    """PyPDF2 texts of the first PROBE_PAGES selected pages and why they fail the probe (None if they pass)."""
+    try:
+        texts = extract_page_texts(path, 'PyPDF2', indices[:PROBE_PAGES])
+        return texts, probe_problem(score_text(texts))
+    except Exception as e:
+        return [], f"probe failed: {e}"
+
+
+def render_page(path: str, index: int, dpi: int = OCR_DPI):
+    """Render the page at a 0-based index as a PIL image, the longer side within OCR_MAX_SIDE."""
+    pdf = pdfium.PdfDocument(path)
+    try:
+        page = pdf[index]
+        scale = min(dpi / 72, OCR_MAX_SIDE / max(page.get_size()))
+        image = page.render(scale=scale).to_pil()
+        page.close()
+        return image
+    finally:
+        pdf.close()
+
+
+def ocr_pdf_page(path: str, index: int, dpi: int = OCR_DPI) -> dict:
+    """Render and OCR one page (runs in an OCR pool worker)."""
+    try:
+        image = render_page(path, index, dpi)
+    except Exception as e:
+        raise worker_error(e) from None
+    return ocr_decoded(image)
+
+
+class OCRFallback:
+    """OCR for pages without a text layer, under a page limit and a time budget.
+
+    results() yields (index, text, page_method) for every submitted page.
+    """
+
+    def __init__(self, path: str, dpi: int = OCR_DPI, max_pages: int = OCR_MAX_PAGES,
+                 time_budget: float = OCR_TIME_BUDGET):
+        self.path = path
+        self.dpi = dpi
+        self.max_pages = max_pages
+        self.time_budget = time_budget
+        self.deadline = None
+        self.futures = {}
+        self.skipped = []
+
+    def submit(self, index: int):
+        if pdfium is None:
+            self.skipped.append((index, "none (OCR unavailable: pypdfium2 not installed)"))
+        elif len(self.futures) >= self.max_pages:
+            self.skipped.append((index, f"none (OCR page limit {self.max_pages})"))
+        else:
+            if self.deadline is None:
+                self.deadline = time.monotonic() + self.time_budget
+            self.futures[get_ocr_pool().submit(ocr_pdf_page, self.path, index, self.dpi)] = index
+
+    def _outcome(self, future) -> tuple[int, str, dict]:
+        index = self.futures[future]
+        try:
+            ocr = future.result()
+        except Exception as e:
+            logging.error(f"OCR of PDF page {index + 1} failed: {e}")
+            return index, '', {'method': f"none (OCR failed: {e})"}
+        return index, ocr['text'], {'method': f"ocr ({self.dpi} dpi)", 'confidence': ocr['confidence']}
+
+    def results(self):
+        pending = set(self.futures)
+        try:
+            if pending:
+                try:
+                    for future in as_completed(pending, timeout=max(0.0, self.deadline - time.monotonic())):
+                        pending.discard(future)
+                        yield self._outcome(future)
+                except FuturesTimeoutError:
+                    pass
+            for future in sorted(pending, key=self.futures.get):
+                if future.done():
+                    yield self._outcome(future)
+                else:
+                    future.cancel()  # A page already being OCR'd still finishes in its worker
+                    yield self.futures[future], '', {'method': f"none (OCR time budget {self.time_budget:g}s)"}
+            pending.clear()
+            for index, method in self.skipped:
+                yield index, '', {'method': method}
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def summary(self, texts: dict[int, str]) -> str:
+        """e.g. 'OCR 3/5 pages at 200 dpi' from the texts OCR produced"""
+        found = sum(bool(text.strip()) for text in texts.values())
+        return f"OCR {found}/{len(self.futures) + len(self.skipped)} pages at {self.dpi} dpi"
+
+
+def extract_text_layer(path: str, indices: list[int]) -> tuple[list[str], str, str]:
+    """Page texts from the extractor the probe picks, with its name and the method description."""
+    # Probe the first pages with the fast extractor
+    probe_pages, problem = probe(path, indices)
+    rest = indices[len(probe_pages):]
+
+    if problem is None:
+        try:
+            pages = probe_pages + extract_pages(path, 'PyPDF2', rest)
+            if any(page.strip() for page in pages):
+                return pages, 'PyPDF2', "PyPDF2 (probe ok)"
+        except Exception as e:
+            logging.error(f"PyPDF2 extraction failed: {e}")
+            problem = "PyPDF2 failed"
+
+    # Accurate extractor for documents the probe rejected
+    try:
+        pages = extract_pages(path, 'pdfplumber', indices)
+        if any(page.strip() for page in pages):
+            return pages, 'pdfplumber', f"pdfplumber (probe: {problem})"
+    except Exception as e:
+        logging.error(f"pdfplumber extraction failed: {e}")
+
+    # Whatever PyPDF2 finds beats nothing
+    if any(page.strip() for page in probe_pages):
+        try:
+            pages = probe_pages + extract_pages(path, 'PyPDF2', rest)
+            if any(page.strip() for page in pages):
+                return pages, 'PyPDF2', "PyPDF2 (pdfplumber found no text)"
+        except Exception as e:
+            logging.error(f"PyPDF2 extraction failed: {e}")
+
+    return [''] * len(indices), 'none', "no text layer"
+
+
+def extract_pdf_file(path: str, page_spec: Optional[list[tuple[int, Optional[int]]]] = None,
+                     max_pages: Optional[int] = None) -> tuple[str, int, str, list[dict]]:
+    """Extract text from a PDF file, choosing the extractor from a PyPDF2 probe of the first pages.
+
+    Returns (text, page_count, method, page_methods); page_count is the document's total.
+    """
+    try:
+        page_count = count_pages(path)
+    except Exception as e:
+        logging.error(f"Could not read PDF page tree: {e}")
+        return "Unable to extract text from PDF", 0, "failed", []
+    indices = select_pages(page_count, page_spec, max_pages)
+
+    pages, extractor, method = extract_text_layer(path, indices)
+    texts = dict(zip(indices, pages))
+    page_methods = {index: {'method': extractor} for index in indices}
+
+    # Render and OCR the pages that came back empty
+    ocr = OCRFallback(path)
+    for index in indices:
+        if not texts[index].strip():
+            ocr.submit(index)
+    ocr_texts = {}
+    for index, text, page_method in ocr.results():
+        ocr_texts[index] = texts[index] = text
+        page_methods[index] = page_method
+    if ocr_texts:
+        method = f"{method} + {ocr.summary(ocr_texts)}" if extractor != 'none' else ocr.summary(ocr_texts)
+
+    text = '\n'.join(texts[index] for index in indices if texts[index].strip())
+    page_methods = [{'page': index + 1, **page_methods[index]} for index in indices]
+    if not text.strip():
+        # page_methods still says why, e.g. the OCR time budget ran out
+        return "Unable to extract text from PDF", page_count, "failed", page_methods
+    return text, page_count, method, page_methods
+
+
+def iter_pdf_file(path: str, page_spec: Optional[list[tuple[int, Optional[int]]]] = None,
+                  max_pages: Optional[int] = None):
+    """Yield a header record, then one record per page as soon as it is extracted.
+
+    OCR'd pages follow the text pages, so records are not always in page order.
+    """
+    try:
+        page_count = count_pages(path)
+    except Exception as e:
+        logging.error(f"Could not read PDF page tree: {e}")
+        yield {'page_count': 0, 'pages': [], 'extraction_method': 'failed', 'error': str(e)}
+        return
+    indices = select_pages(page_count, page_spec, max_pages)
+    chunks = -(-len(indices) // MIN_PAGES_PER_WORKER)
+
+    probe_pages, problem = probe(path, indices)
+    extractor = 'PyPDF2' if problem is None else 'pdfplumber'
+    method = "PyPDF2 (probe ok)" if problem is None else f"pdfplumber (probe: {problem})"
+    yield {'page_count': page_count, 'pages': [i + 1 for i in indices], 'extraction_method': method}
+
+    if problem is None:
+        texts = itertools.chain(probe_pages, iter_page_texts(path, 'PyPDF2', indices[len(probe_pages):], chunks))
+    else:
+        texts = iter_page_texts(path, 'pdfplumber', indices, chunks)
+    ocr = OCRFallback(path)
+    try:
+        for index, text, page_extractor in text_layer_records(path, indices, extractor, texts, chunks):
+            if text.strip():
+                yield {'page': index + 1, 'text': text, 'method': page_extractor}
+            else:
+                ocr.submit(index)
+    except Exception as e:
+        logging.error(f"PDF text extraction failed: {e}")
+        yield {'error': f"Text extraction failed: {e}"}
+    for index, text, page_method in ocr.results():
+        yield {'page': index + 1, 'text': text, **page_method}
+
+
+def text_layer_records(path: str, indices: list[int], extractor: str, texts, chunks: Optional[int] = None):
+    """Yield (index, text, extractor) for texts of the pages at indices, in order.
+
+    If PyPDF2 fails partway through, the remaining pages are extracted with pdfplumber.
+    """
+    done = 0
+    try:
+        for text in texts:
+            yield indices[done], text, extractor
+            done += 1
+    except Exception as e:
+        if extractor != 'PyPDF2':
+            raise
+        logging.error(f"PyPDF2 extraction failed at page {indices[done] + 1}, retrying with pdfplumber: {e}")
+        rest = indices[done:]
+        for index, text in zip(rest, iter_page_texts(path, 'pdfplumber', rest, chunks)):
+            yield index, text, 'pdfplumber'
+
+
+async def run_pdf_extraction(path: str, page_spec: Optional[list[tuple[int, Optional[int]]]] = None,
+                             max_pages: Optional[int] = None) -> tuple[str, int, str, list[dict]]:
+    """extract_pdf_file without blocking the event loop."""
+    return await run_blocking(extract_pdf_file, path, page_spec, max_pages)
@@ -0,0 +1,303 @@
+"""
+Partial PDF retrieval with HTTP range requests.
+When only some pages are wanted, the PDF is read through cached range-request
+blocks, with the pages of linearized PDFs located from their hint stream.
+fetch_pdf_range returns None whenever a full download is needed instead.
+"""
+
+import io
+import logging
+import re
+import zlib
+from typing import Optional
+
+import httpx
+
+import pdf_extract
+from pdf_extract import (PROBE_PAGES, MAX_PDF_BYTES, PDFTooLarge, count_pages_in, probe_problem, read_page_texts,
+                         score_text, select_pages)
+
+RANGE_BLOCK_BYTES = 64 * 1024
+RANGE_MAX_SHARE = 0.5  # Beyond this share of the file, a full download is cheaper
+RANGE_MAX_REQUESTS = 64
+
+CONTENT_RANGE_RE = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+)')
+LINEARIZED_RE = re.compile(rb'<<\s*/Linearized\b(.*?)>>', re.DOTALL)
+HINT_STREAM_RE = re.compile(rb'\d+\s+\d+\s+obj\s*<<(.*?)>>\s*stream\r?\n', re.DOTALL)
+
+
+class RangeAbandoned(Exception):
+    """Partial retrieval stopped; download the whole file instead"""
+
+
+def content_range(response: httpx.Response) -> Optional[tuple[int, int, int]]:
+    """(first, last, total) from a 206 response's Content-Range, or None."""
+    if response.status_code != 206:
+        return None
+    match = CONTENT_RANGE_RE.match(response.headers.get('Content-Range', ''))
+    return tuple(int(group) for group in match.groups()) if match else None
+
+
+class RangeFile(io.RawIOBase):
+    """A remote file read through range requests, one cached block at a time."""
+
+    def __init__(self, client: httpx.Client, url: str, size: int, block_size: int = RANGE_BLOCK_BYTES,
+                 max_bytes: int = MAX_PDF_BYTES):
+        super().__init__()
+        self.client = client
+        self.url = url
+        self.size = size
+        self.block_size = block_size
+        self.max_bytes = max_bytes
+        self.blocks = {}
+        self.position = 0
+        self.bytes_transferred = 0
+        self.requests = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.size}[whence]
+        self.position = max(0, base + offset)
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        end = min(self.position + len(buffer), self.size)
+        if end <= self.position:
+            return 0
+        self.prefetch([(self.position, end)])
+        first = self.position // self.block_size
+        data = b''.join(self.blocks[block] for block in range(first, (end - 1) // self.block_size + 1))
+        data = data[self.position - first * self.block_size:end - first * self.block_size]
+        buffer[:len(data)] = data
+        self.position = end
+        return len(data)
+
+    def store(self, start: int, data: bytes):
+        """Cache fetched bytes; start is block-aligned, and only the file's last block may be short."""
+        for offset in range(0, len(data), self.block_size):
+            self.blocks[(start + offset) // self.block_size] = data[offset:offset + self.block_size]
+
+    def prefetch(self, ranges: list[tuple[int, int]]):
+        """Fetch the missing blocks covering the [start, end) ranges, one request per run of blocks."""
+        missing = sorted({block for start, end in ranges
+                          for block in range(start // self.block_size, (min(end, self.size) - 1) // self.block_size + 1)
+                          if block not in self.blocks})
+        runs = []
+        for block in missing:
+            if runs and runs[-1][1] == block - 1:
+                runs[-1][1] = block
+            else:
+                runs.append([block, block])
+        for first, last in runs:
+            self.fetch(first * self.block_size, min((last + 1) * self.block_size, self.size))
+
+    def fetch(self, start: int, end: int):
+        if self.requests >= RANGE_MAX_REQUESTS:
+            raise RangeAbandoned(f"more than {RANGE_MAX_REQUESTS} range requests")
+        if self.bytes_transferred + end - start > self.size * RANGE_MAX_SHARE:
+            raise RangeAbandoned(f"more than {RANGE_MAX_SHARE:.0%} of the file")
+        if self.bytes_transferred + end - start > self.max_bytes:
+            raise PDFTooLarge(f"PDF exceeds the {self.max_bytes} byte limit")
+        self.requests += 1
+        response = self.client.get(self.url, headers={'Range': f'bytes={start}-{end - 1}'})
+        response.raise_for_status()
+        if content_range(response) != (start, end - 1, self.size) or len(response.content) != end - start:
+            raise RangeAbandoned(f"unexpected range response {response.status_code} "
+                                 f"{response.headers.get('Content-Range')!r}")
+        self.bytes_transferred += len(response.content)
+        self.store(start, response.content)
+
+
+def _number(dictionary: bytes, key: bytes) -> Optional[int]:
+    match = re.search(rb'/' + key + rb'\s+(\d+)', dictionary)
+    return int(match.group(1)) if match else None
+
+
+def linearization(head: bytes, size: int) -> Optional[dict]:
+    """Page count, first page end (/E) and hint stream location (/H) of a linearized PDF, or None.
+
+    None too when /L no longer matches the file size: the hints are stale.
+    """
+    match = LINEARIZED_RE.search(head[:1024])
+    if not match:
+        return None
+    dictionary = match.group(1)
+    hint = re.search(rb'/H\s*\[\s*(\d+)\s+(\d+)', dictionary)
+    if _number(dictionary, b'L') != size or not hint:
+        return None
+    return {
+        'pages': _number(dictionary, b'N') or 0,
+        'first_page_end': _number(dictionary, b'E') or 0,
+        'hint_offset': int(hint.group(1)),
+        'hint_length': int(hint.group(2)),
+    }
+
+
+class BitReader:
+    """Big-endian bit fields, as packed in hint tables"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.bit = 0
+
+    def read(self, bits: int) -> int:
+        value = 0
+        for _ in range(bits):
+            byte = self.data[self.bit // 8]
+            value = (value << 1) | ((byte >> (7 - self.bit % 8)) & 1)
+            self.bit += 1
+        return value
+
+    def align(self):
+        self.bit = -(-self.bit // 8) * 8
+
+
+def page_offsets(hint_stream: bytes, page_count: int) -> list[tuple[int, int]]:
+    """(offset, length) of each page's objects from a decoded page offset hint table.
+
+    Offsets are as if the hint stream were absent; see page_ranges.
+    """
+    reader = BitReader(hint_stream)
+    reader.read(32)  # Least number of objects in a page
+    first_page_offset = reader.read(32)
+    objects_bits = reader.read(16)
+    least_length = reader.read(32)
+    length_bits = reader.read(16)
+    for bits in (32, 16, 32, 16, 16, 16, 16, 16):
+        reader.read(bits)  # Content stream and shared object fields, not needed here
+
+    # Each item is stored for all pages in turn, starting on a byte boundary
+    for _ in range(page_count):
+        reader.read(objects_bits)
+    reader.align()
+    offsets = []
+    offset = first_page_offset
+    for _ in range(page_count):
+        length = least_length + reader.read(length_bits)
+        offsets.append((offset, length))
+        offset += length
+    return offsets
+
+
+def read_hint_stream(data: RangeFile, hints: dict) -> bytes:
+    """The decoded primary hint stream."""
+    data.seek(hints['hint_offset'])
+    raw = data.read(hints['hint_length'])
+    match = HINT_STREAM_RE.match(raw)
+    if not match:
+        raise ValueError("hint stream object not found")
+    body = raw[match.end():match.end() + (_number(match.group(1), b'Length') or 0)]
+    return zlib.decompress(body) if b'/FlateDecode' in match.group(1) else body
+
+
+def page_ranges(data: RangeFile, hints: dict, indices: list[int]) -> list[tuple[int, int]]:
+    """[start, end) byte ranges of the selected pages of a linearized PDF."""
+    ranges = []
+    if 0 in indices:
+        ranges.append((0, hints['first_page_end']))
+    later = [index for index in indices if 0 < index < hints['pages']]
+    if later:
+        offsets = page_offsets(read_hint_stream(data, hints), hints['pages'])
+        for index in later:
+            offset, length = offsets[index]
+            if offset >= hints['hint_offset']:
+                offset += hints['hint_length']
+            ranges.append((offset, offset + length))
+    return ranges
+
+
+def extract_range_file(data: RangeFile, page_spec=None, max_pages: Optional[int] = None) -> Optional[tuple]:
+    """extract_pdf_file for a RangeFile, without OCR; None when a selected page needs OCR."""
+    data.seek(0)
+    head = data.read(1024)
+    hints = linearization(head, data.size)
+    plan = [(max(0, data.size - data.block_size), data.size)]  # Trailer and main xref
+    if hints:
+        try:
+            plan += page_ranges(data, hints, select_pages(hints['pages'], page_spec, max_pages))
+        except RangeAbandoned:
+            raise
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable linearization hints: {e}")
+    data.prefetch(plan)
+
+    page_count = count_pages_in(data)
+    indices = select_pages(page_count, page_spec, max_pages)
+    extractor = 'PyPDF2'
+    texts = read_page_texts(data, extractor, indices)
+    problem = probe_problem(score_text(texts[:PROBE_PAGES]))
+    method = "PyPDF2 (probe ok)"
+    if problem is not None:
+        extractor = 'pdfplumber'
+        method = f"pdfplumber (probe: {problem})"
+        texts = read_page_texts(data, extractor, indices)
+
+    if any(not text.strip() for text in texts) and pdf_extract.pdfium is not None:
+        return None
+    text = '\n'.join(text for text in texts if text.strip())
+    if not text:
+        return None
+    return text, page_count, method, [{'page': index + 1, 'method': extractor} for index in indices]
+
+
+def fetch_pdf_range(url: str, headers: dict, timeout: httpx.Timeout, page_spec=None,
+                    max_pages: Optional[int] = None) -> tuple[Optional[dict], int]:
+    """Extract the selected pages of a remote PDF from range requests.
+
+    Returns (result, bytes_transferred); result is None when the caller must download the whole file.
+    """
+    with httpx.Client(follow_redirects=True, headers=headers, timeout=timeout) as client:
+        with client.stream('GET', url, headers={'Range': f'bytes=0-{RANGE_BLOCK_BYTES - 1}'}) as response:
+            response.raise_for_status()
+            # A server without range support answers 200; the body is left unread
+            span = content_range(response)
+            if span is None or span[0] != 0:
+                logging.info(f"No range support for {url} (status {response.status_code}, "
+                             f"Accept-Ranges: {response.headers.get('Accept-Ranges')})")
+                return None, 0
+            first = response.read()
+
+        data = RangeFile(client, str(response.url), span[2])
+        data.bytes_transferred = len(first)
+        data.requests = 1
+        data.store(0, first)
+        if not first.lstrip().startswith(b'%PDF'):
+            return None, data.bytes_transferred
+        try:
+            extracted = extract_range_file(data, page_spec, max_pages)
+        except (RangeAbandoned, httpx.HTTPError) as e:
+            logging.info(f"Range retrieval of {url} abandoned: {e}")
+            extracted = None
+        except PDFTooLarge:
+            raise
+        except Exception as e:
+            logging.error(f"Range extraction of {url} failed: {e}")
+            extracted = None
+        if extracted is None:
+            return None, data.bytes_transferred
+
+    text, page_count, method, page_methods = extracted
+    logging.info(f"Fetched {len(page_methods)} pages of {url} in {data.requests} range requests: "
+                 f"{data.bytes_transferred} of {data.size} bytes")
+    return {
+        'final_url': str(response.url),
+        'status_code': response.status_code,
+        'headers': dict(response.headers),
+        'content_type': response.headers.get('Content-Type', ''),
+        'redirect_count': len(response.history),
+        'pdf_text': text,
+        'page_count': page_count,
+        'extraction_method': method,
+        'page_methods': page_methods,
+        'total_size': data.size,
+        'bytes_transferred': data.bytes_transferred,
+        'requests': data.requests,
+    }, data.bytes_transferred
@@ -0,0 +1,16 @@
+"""
+Modules shared with the scraper at the repository root (adaptive_timeouts.py
+and the OCR stack). The root is appended to sys.path, so this app's own
+modules of the same name (main.py) still take precedence.
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def use_shared_modules() -> None:
+    """Make the repository root's modules importable; call before importing them."""
+    if REPO_ROOT not in sys.path:
+        sys.path.append(REPO_ROOT)
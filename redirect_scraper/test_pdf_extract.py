@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Unit tests for page selection, the extraction probe, streaming and the OCR
+fallback (pdf_extract.py)..
+
+    python -m pytest -q test_pdf_extract.py
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import pdf_extract
+from pdf_extract import check_max_pages, page_chunks, parse_page_spec, probe_problem, score_text, select_pages
+
+
+@pytest.mark.parametrize('spec, expected', [
+    (None, None),
+    ('  ', None),
+    ('3', [(3, 3)]),
+    ('1-3, 7 ,10-', [(1, 3), (7, 7), (10, None)]),
+    ('2 - 4', [(2, 4)]),
+])
+def test_parse_page_spec(spec, expected):
+    assert parse_page_spec(spec) == expected
+
+
+@pytest.mark.parametrize('spec', ['0', '5-2', 'a', '1,,2', '-3', '1-2-3'])
+def test_parse_page_spec_rejects(spec):
+    with pytest.raises(ValueError):
+        parse_page_spec(spec)
+
+
+def test_select_pages():
+    assert select_pages(5) == [0, 1, 2, 3, 4]
+    assert select_pages(5, max_pages=2) == [0, 1]
+    assert select_pages(10, parse_page_spec('8-,2,1-3')) == [0, 1, 2, 7, 8, 9]
+    assert select_pages(10, parse_page_spec('8-,2,1-3'), max_pages=4) == [0, 1, 2, 7]
+
+
+def test_select_pages_ignores_missing_pages():
+    assert select_pages(3, parse_page_spec('2-9,20')) == [1, 2]
+    assert select_pages(0, parse_page_spec('1-')) == []
+
+
+def test_check_max_pages():
+    assert check_max_pages(None) is None
+    assert check_max_pages(3) == 3
+    with pytest.raises(ValueError):
+        check_max_pages(0)
+
+
+def test_page_chunks():
+    assert page_chunks(list(range(10)), 3) == [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]]
+    assert page_chunks(list(range(13)), 3) == [[0, 1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12]]
+    assert page_chunks([4, 5], 8) == [[4, 5]]
+
+
+def test_probe_accepts_prose():
+    prose = "The company reported revenue of $12.4 million for the quarter, up 18% on the prior year. " * 3
+    assert probe_problem(score_text([prose, prose])) is None
+
+
+@pytest.mark.parametrize('pages, problem', [
+    (['', 'Scan'], 'low density'),
+    (['TheCompanyReportedRevenueOfTwelveMillionForTheQuarterUpEighteenPercent ' * 3], 'run-together words'),
+    (['T h e  c o m p a n y  r e p o r t e d  r e v e n u e  f o r  t h e  q u a r t e r ' * 4],
+     'spaced-out characters'),
+])
+def test_probe_rejects_bad_text(pages, problem):
+    assert probe_problem(score_text(pages)).startswith(problem)
+
+
+def fake_page_texts(fail_at):
+    """iter_page_texts stand-in: PyPDF2 raises at page index fail_at, pdfplumber always works"""
+    def iter_page_texts(path, method, indices, chunks=None):
+        for index in indices:
+            if method == 'PyPDF2' and index == fail_at:
+                raise RuntimeError("PdfReadError: broken content stream")
+            yield f"{method} text of page {index + 1}"
+    return iter_page_texts
+
+
+@pytest.fixture
+def six_page_pdf(monkeypatch):
+    monkeypatch.setattr(pdf_extract, 'count_pages', lambda path: 6)
+    monkeypatch.setattr(pdf_extract, 'probe', lambda path, indices: (["PyPDF2 text of page 1"], None))
+
+
+def test_stream_retries_failed_pages_with_pdfplumber(six_page_pdf, monkeypatch):
+    monkeypatch.setattr(pdf_extract, 'iter_page_texts', fake_page_texts(fail_at=3))
+    header, *records = pdf_extract.iter_pdf_file('doc.pdf')
+    assert header['extraction_method'] == 'PyPDF2 (probe ok)'
+    assert [(record['page'], record['method']) for record in records] == [
+        (1, 'PyPDF2'), (2, 'PyPDF2'), (3, 'PyPDF2'), (4, 'pdfplumber'), (5, 'pdfplumber'), (6, 'pdfplumber')]
+    assert records[3]['text'] == 'pdfplumber text of page 4'
+
+
+def test_stream_ends_with_an_error_record(six_page_pdf, monkeypatch):
+    def failing(path, method, indices, chunks=None):
+        yield f"{method} text of page {indices[0] + 1}"
+        raise RuntimeError("PdfReadError: broken content stream")
+    monkeypatch.setattr(pdf_extract, 'iter_page_texts', failing)
+    header, *records = pdf_extract.iter_pdf_file('doc.pdf')
+    assert [record.get('page') for record in records] == [1, 2, 3, None]
+    assert records[-1] == {'error': 'Text extraction failed: PdfReadError: broken content stream'}
+
+
+PROSE = "The company reported revenue of 12.4 million for the quarter, up 18 percent on the prior year."
+
+
+def text_pdf(*page_texts):
+    """A PDF with one page per text; an empty text gives a page without a text layer"""
+    count = len(page_texts)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+                   b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(count)), count),
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    for i, text in enumerate(page_texts):
+        content = b"BT /F1 10 Tf 40 700 Td (%s) Tj ET" % text.encode() if text else b""
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i))
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
+
+
+@pytest.fixture
+def ocr_stub(monkeypatch):
+    """Pools on threads and a page OCR that records which pages it was asked for"""
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(pdf_extract, 'get_pdf_pool', lambda: pool)
+    monkeypatch.setattr(pdf_extract, 'get_ocr_pool', lambda: pool)
+    ocr_pages = []
+
+    def ocr_pdf_page(path, index, dpi=pdf_extract.OCR_DPI):
+        ocr_pages.append(index)
+        return {'text': f"Scanned page {index + 1}", 'confidence': 88.0, 'psm': 6}
+    monkeypatch.setattr(pdf_extract, 'ocr_pdf_page', ocr_pdf_page)
+    yield ocr_pages
+    pool.shutdown()
+
+
+def write_pdf(tmp_path, *page_texts):
+    path = tmp_path / 'doc.pdf'
+    path.write_bytes(text_pdf(*page_texts))
+    return str(path)
+
+
+def test_only_pages_without_text_are_ocrd(tmp_path, ocr_stub):
+    path = write_pdf(tmp_path, PROSE, '', PROSE)
+    text, page_count, method, page_methods = pdf_extract.extract_pdf_file(path)
+    assert ocr_stub == [1]
+    assert page_count == 3
+    assert text.split('\n') == [PROSE, 'Scanned page 2', PROSE]
+    assert page_methods[1] == {'page': 2, 'method': f"ocr ({pdf_extract.OCR_DPI} dpi)", 'confidence': 88.0}
+    assert page_methods[0]['method'] == page_methods[2]['method'] != page_methods[1]['method']
+    assert method.endswith(f"+ OCR 1/1 pages at {pdf_extract.OCR_DPI} dpi")
+
+
+def test_pages_with_text_are_never_ocrd(tmp_path, ocr_stub):
+    path = write_pdf(tmp_path, PROSE, PROSE)
+    text, _, method, _ = pdf_extract.extract_pdf_file(path)
+    assert ocr_stub == []
+    assert 'OCR' not in method
+
+
+def test_streamed_ocr_pages_come_last(tmp_path, ocr_stub):
+    path = write_pdf(tmp_path, '', PROSE)
+    header, *records = pdf_extract.iter_pdf_file(path)
+    assert header['pages'] == [1, 2]
+    assert [(record['page'], record['text']) for record in records] == [(2, PROSE), (1, 'Scanned page 1')]
+
+
+def test_without_pypdfium2_empty_pages_are_reported(tmp_path, ocr_stub, monkeypatch):
+    monkeypatch.setattr(pdf_extract, 'pdfium', None)
+    path = write_pdf(tmp_path, PROSE, '')
+    _, _, _, page_methods = pdf_extract.extract_pdf_file(path)
+    assert ocr_stub == []
+    assert page_methods[1] == {'page': 2, 'method': "none (OCR unavailable: pypdfium2 not installed)"}
+
+
+@pytest.mark.skipif(pdf_extract.pdfium is None, reason="requires pypdfium2")
+def test_render_page(tmp_path):
+    path = write_pdf(tmp_path, PROSE, '')
+    assert pdf_extract.render_page(path, 1, dpi=72).size == (612, 792)
+    assert max(pdf_extract.render_page(path, 0, dpi=600).size) == pdf_extract.OCR_MAX_SIDE
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Unit tests for partial PDF retrieval (pdf_range.py).
+
+The fixture is a small linearized PDF written by hand: the linearization
+dictionary, the first page, the hint stream with its page offset table, the
+remaining pages and one cross-reference table at the end.
+
+    python -m pytest -q test_pdf_range.py
+"""
+
+import functools
+import http.server
+import re
+import threading
+import zlib
+
+import httpx
+import pytest
+
+import pdf_range
+from pdf_extract import parse_page_spec
+from pdf_range import RangeFile, extract_range_file, fetch_pdf_range, linearization, page_ranges
+
+WORDS = "Quarterly revenue grew across every region while operating costs stayed flat."
+
+
+class BitWriter:
+    """Big-endian bit fields, the inverse of pdf_range.BitReader"""
+
+    def __init__(self):
+        self.bits = []
+
+    def write(self, value, bits):
+        self.bits += [(value >> shift) & 1 for shift in range(bits - 1, -1, -1)]
+
+    def align(self):
+        self.bits += [0] * (-len(self.bits) % 8)
+
+    def getvalue(self):
+        self.align()
+        return bytes(int(''.join(map(str, self.bits[i:i + 8])), 2) for i in range(0, len(self.bits), 8))
+
+
+def pdf_object(number, body):
+    return b'%d 0 obj\n' % number + body + b'\nendobj\n'
+
+
+def pdf_stream(number, data, entries=b''):
+    return pdf_object(number, b'<< /Length %d%s >>\nstream\n' % (len(data), entries) + data + b'\nendstream')
+
+
+def page_content(index):
+    lines = [b'BT /F1 11 Tf 72 760 Td 14 TL']
+    lines += [b'(Page %d: %s) Tj T*' % (index + 1, WORDS.encode()) for _ in range(4)]
+    lines.append(b'ET')
+    return b'\n'.join(lines)
+
+
+def hint_table(first_page_offset, lengths, objects):
+    """A page offset hint table for pages with the given lengths and object counts."""
+    least_objects, least_length = min(objects), min(lengths)
+    objects_bits = max((count - least_objects).bit_length() for count in objects)
+    length_bits = max((length - least_length).bit_length() for length in lengths)
+    writer = BitWriter()
+    writer.write(least_objects, 32)
+    writer.write(first_page_offset, 32)
+    writer.write(objects_bits, 16)
+    writer.write(least_length, 32)
+    writer.write(length_bits, 16)
+    for bits in (32, 16, 32, 16, 16, 16, 16, 16):
+        writer.write(0, bits)
+    for count in objects:
+        writer.write(count - least_objects, objects_bits)
+    writer.align()
+    for length in lengths:
+        writer.write(length - least_length, length_bits)
+    return writer.getvalue()
+
+
+def linearized_pdf(pages=4, padding=20, bad_hints=False):
+    """(pdf bytes, [start, end) byte range of each page's objects) for a linearized PDF.
+
+    Page i carries 64 * padding * (i + 1) bytes of filler, so later pages are larger.
+    """
+    # Objects: 1 linearization dictionary, 2 catalog, 3 page tree, 4 font,
+    # 5 + 3i page i, 6 + 3i its content stream, 7 + 3i an unreferenced filler
+    # stream that makes the page longer, last the hint stream
+    hint_number = 5 + 3 * pages
+    kids = b' '.join(b'%d 0 R' % (5 + 3 * i) for i in range(pages))
+    page_objects = [
+        pdf_object(5 + 3 * i, b'<< /Type /Page /Parent 3 0 R /MediaBox [0 0 612 792] /Contents %d 0 R '
+                              b'/Resources << /Font << /F1 4 0 R >> >> >>' % (6 + 3 * i))
+        + pdf_stream(6 + 3 * i, page_content(i))
+        + pdf_stream(7 + 3 * i, b'x' * 64 * padding * (i + 1))
+        for i in range(pages)
+    ]
+    page_objects[0] += pdf_object(4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+
+    header = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    template = (b'<< /Linearized 1 /L %010d /H [ %010d %010d ] /O 5 /E %010d /N ' + b'%d' % pages
+                + b' /T %010d >>')
+    linearization_length = len(pdf_object(1, template % (0, 0, 0, 0, 0)))
+    front = pdf_object(2, b'<< /Type /Catalog /Pages 3 0 R >>') + pdf_object(
+        3, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (kids, pages))
+
+    # Offsets as if the hint stream were absent, as the hint table records them
+    first_page_offset = len(header) + linearization_length + len(front)
+    starts = [first_page_offset]
+    for page in page_objects:
+        starts.append(starts[-1] + len(page))
+    lengths = [end - start for start, end in zip(starts, starts[1:])]
+    table = b'\x00' * 6 if bad_hints else hint_table(first_page_offset, lengths, [4] + [3] * (pages - 1))
+    hint = pdf_stream(hint_number, zlib.compress(table), b' /Filter /FlateDecode /S %d' % len(table))
+
+    hint_offset = starts[1]
+    body = front + page_objects[0] + hint + b''.join(page_objects[1:])
+    offsets = {2: len(header) + linearization_length}
+    offsets[3] = offsets[2] + len(pdf_object(2, b'<< /Type /Catalog /Pages 3 0 R >>'))
+    position = first_page_offset
+    for i, page in enumerate(page_objects):
+        for number in (5 + 3 * i, 6 + 3 * i, 7 + 3 * i):
+            offsets[number] = position + page.index(b'%d 0 obj' % number)
+        if i == 0:
+            offsets[4] = position + page.index(b'4 0 obj')
+            offsets[hint_number] = position + len(page)
+            position += len(hint)
+        position += len(page)
+    xref_offset = len(header) + linearization_length + len(body)
+    xref = b'xref\n0 %d\n0000000000 65535 f \n' % (hint_number + 1)
+    xref += b''.join(b'%010d 00000 n \n' % (len(header) if number == 1 else offsets[number])
+                     for number in range(1, hint_number + 1))
+    trailer = b'trailer\n<< /Size %d /Root 2 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (hint_number + 1, xref_offset)
+    size = xref_offset + len(xref) + len(trailer)
+
+    first_page_end = hint_offset
+    dictionary = pdf_object(1, template % (size, hint_offset, len(hint), first_page_end, xref_offset))
+    pdf = header + dictionary + body + xref + trailer
+    assert len(pdf) == size
+
+    page_spans = [(0, first_page_end)]
+    page_spans += [(start + len(hint), end + len(hint)) for start, end in zip(starts[1:-1], starts[2:])]
+    return pdf, page_spans
+
+
+def range_client(pdf):
+    """An httpx client answering range requests from pdf, as a server with range support would."""
+    def handler(request):
+        match = re.fullmatch(r'bytes=(\d+)-(\d+)', request.headers['Range'])
+        start, end = int(match.group(1)), min(int(match.group(2)), len(pdf) - 1)
+        return httpx.Response(206, content=pdf[start:end + 1],
+                              headers={'Content-Range': f'bytes {start}-{end}/{len(pdf)}'})
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+def range_file(pdf, block_size=1024):
+    return RangeFile(range_client(pdf), 'http://test/report.pdf', len(pdf), block_size=block_size)
+
+
+def test_linearization_reads_the_dictionary():
+    pdf, spans = linearized_pdf()
+    hints = linearization(pdf[:1024], len(pdf))
+    assert hints['pages'] == 4
+    assert hints['first_page_end'] == spans[0][1]
+    assert pdf[hints['hint_offset']:].startswith(b'17 0 obj')
+
+
+def test_linearization_ignores_updated_files():
+    pdf, _ = linearized_pdf()
+    assert linearization(pdf[:1024], len(pdf) + 100) is None
+    assert linearization(b'%PDF-1.4\n1 0 obj\n<< /Type /Catalog >>\nendobj\n', 1000) is None
+
+
+def test_page_ranges_match_the_pages():
+    pdf, spans = linearized_pdf(pages=5)
+    data = range_file(pdf)
+    hints = linearization(pdf[:1024], len(pdf))
+    assert page_ranges(data, hints, [0, 1, 2, 3, 4]) == spans
+    for index, (start, end) in enumerate(spans[1:], start=1):
+        assert pdf[start:end].startswith(b'%d 0 obj\n<< /Type /Page ' % (5 + 3 * index))
+
+
+def test_range_file_reads_across_blocks_and_caches_them():
+    pdf, _ = linearized_pdf()
+    data = range_file(pdf, block_size=100)
+    data.seek(250)
+    assert data.read(300) == pdf[250:550]
+    requests = data.requests
+    data.seek(300)
+    assert data.read(200) == pdf[300:500]
+    assert data.requests == requests
+    data.seek(-10, 2)
+    assert data.read() == pdf[-10:]
+
+
+def test_range_file_gives_up_beyond_the_share():
+    pdf, _ = linearized_pdf()
+    data = range_file(pdf)
+    with pytest.raises(pdf_range.RangeAbandoned):
+        data.prefetch([(0, len(pdf))])
+
+
+def test_extract_range_file_reads_only_the_selected_pages(caplog):
+    pdf, spans = linearized_pdf(pages=6, padding=60)
+    data = range_file(pdf)
+    text, page_count, _, page_methods = extract_range_file(data, max_pages=2)
+    assert page_count == 6
+    assert 'Page 1:' in text and 'Page 2:' in text and 'Page 3:' not in text
+    assert page_methods == [{'page': 1, 'method': 'PyPDF2'}, {'page': 2, 'method': 'PyPDF2'}]
+    assert data.bytes_transferred < len(pdf) / 2
+    assert sum(spans[-1]) // 2 // data.block_size not in data.blocks
+    assert 'linearization hints' not in caplog.text
+
+
+def test_bad_hint_table_falls_back_to_reading_objects(caplog):
+    pdf, _ = linearized_pdf(pages=6, padding=60, bad_hints=True)
+    data = range_file(pdf)
+    text, page_count, _, _ = extract_range_file(data, page_spec=parse_page_spec('2'))
+    assert page_count == 6
+    assert 'Page 2:' in text and 'Page 1:' not in text
+    assert 'Ignoring unreadable linearization hints' in caplog.text
+
+
+class PDFHandler(http.server.BaseHTTPRequestHandler):
+    """Serves one PDF, with or without single-range support"""
+
+    def __init__(self, *args, pdf, ranges, **kwargs):
+        self.pdf = pdf
+        self.ranges = ranges
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        match = re.fullmatch(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))
+        if self.ranges and match:
+            start, end = int(match.group(1)), min(int(match.group(2)), len(self.pdf) - 1)
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(self.pdf)}')
+        else:
+            start, end = 0, len(self.pdf) - 1
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(self.pdf[start:end + 1])
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def serve_pdf():
+    servers = []
+
+    def serve(pdf, ranges):
+        handler = functools.partial(PDFHandler, pdf=pdf, ranges=ranges)
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}/report.pdf"
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_fetch_pdf_range_reads_the_first_pages(serve_pdf):
+    pdf, _ = linearized_pdf(pages=3, padding=2000)
+    url = serve_pdf(pdf, ranges=True)
+    result, transferred = fetch_pdf_range(url, {}, httpx.Timeout(10), max_pages=1)
+    assert result['page_count'] == 3
+    assert 'Page 1:' in result['pdf_text'] and 'Page 2:' not in result['pdf_text']
+    assert result['total_size'] == len(pdf)
+    assert transferred == result['bytes_transferred'] < len(pdf) / 2
+
+
+def test_fetch_pdf_range_falls_back_without_206(serve_pdf):
+    pdf, _ = linearized_pdf(pages=3, padding=2000)
+    url = serve_pdf(pdf, ranges=False)
+    assert fetch_pdf_range(url, {}, httpx.Timeout(10), max_pages=1) == (None, 0)
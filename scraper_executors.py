@@ -0,0 +1,101 @@
+"""
+Sized executors for the blocking work of async code: a thread pool for calls
+that wait (BLOCKING_THREADS) and a process pool for HTML parsing
+(PARSE_WORKERS). Parsing and OCR (ocr_pool.py) share PROCESS_WORKERS processes
+per web worker, a quarter for parsing.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def env_count(name, default):
+    """Positive integer from environment variable name, else default"""
+    configured = os.getenv(name, '')
+    return int(configured) if configured.isdigit() and int(configured) > 0 else default
+
+
+class LazyPool:
+    """A process-wide executor, created on first use and again after shutdown()"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self.factory()
+            return self._executor
+
+    def shutdown(self, wait=False):
+        """Stop the executor, cancelling queued work"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+
+def worker_error(e):
+    """A RuntimeError with e's type and message, to raise from a pool worker instead of e
+
+    Library exceptions (Tesseract, PDF parsers) may not unpickle in the parent,
+    which breaks the whole process pool.
+    """
+    return RuntimeError(f"{type(e).__name__}: {e}")
+
+
+def blocking_threads():
+    """Number of threads for blocking calls"""
+    return env_count('BLOCKING_THREADS', min(32, (os.cpu_count() or 1) + 4))
+
+
+def process_budget():
+    """Worker processes this web worker may start across the parsing and OCR pools"""
+    return env_count('PROCESS_WORKERS', max(1, (os.cpu_count() or 1) // env_count('WEB_CONCURRENCY', 1)))
+
+
+def parse_workers():
+    """Number of HTML parsing worker processes"""
+    return env_count('PARSE_WORKERS', max(1, process_budget() // 4))
+
+
+def ocr_workers():
+    """Number of OCR worker processes"""
+    return env_count('OCR_WORKERS', max(1, process_budget() - parse_workers()))
+
+
+_threads = LazyPool(lambda: ThreadPoolExecutor(max_workers=blocking_threads(), thread_name_prefix='blocking'))
+_processes = LazyPool(lambda: ProcessPoolExecutor(max_workers=parse_workers()))
+
+
+def get_blocking_executor():
+    """The process-wide thread pool for blocking calls, created on first use"""
+    return _threads.get()
+
+
+def get_parse_pool():
+    """The process-wide HTML parsing pool, created on first use"""
+    return _processes.get()
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the thread pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_blocking_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def run_parse(func, *args, **kwargs):
+    """Run a CPU-bound, picklable call on the parsing pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_parse_pool(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executors():
+    """Stop both pools; new ones are created on next use"""
+    _processes.shutdown()
+    _threads.shutdown()
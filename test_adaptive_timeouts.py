@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Unit tests for adaptive per-domain timeouts
+
+    python -m pytest -q test_adaptive_timeouts.py
+"""
+
+from adaptive_timeouts import AdaptiveTimeouts, LatencySketch
+
+
+def test_sketch_quantiles_bound_the_samples():
+    sketch = LatencySketch()
+    assert sketch.quantile(0.5) is None
+    for seconds in [0.1] * 90 + [2.0] * 10:
+        sketch.add(seconds)
+    assert 0.1 <= sketch.quantile(0.5) < 0.1 * sketch.growth
+    assert 2.0 <= sketch.quantile(0.99) < 2.0 * sketch.growth
+
+
+def test_sketch_halves_counts_when_full():
+    sketch = LatencySketch(max_samples=10)
+    for _ in range(11):
+        sketch.add(0.5)
+    assert sketch.count == 5.5
+    assert sum(sketch.counts) == 5.5
+
+
+def test_cold_domain_gets_the_default():
+    timeouts = AdaptiveTimeouts(min_samples=5)
+    for _ in range(4):
+        timeouts.record('https://example.com/a', 0.2)
+    assert timeouts.get('https://example.com/b', default=30) == (30.0, 30.0)
+
+
+def test_override_wins():
+    timeouts = AdaptiveTimeouts(min_samples=1)
+    timeouts.record('https://example.com/', 0.2)
+    assert timeouts.get('https://example.com/', override=12) == (12.0, 12.0)
+
+
+def test_timeouts_follow_latency_within_bounds():
+    timeouts = AdaptiveTimeouts()
+    for _ in range(20):
+        timeouts.record('https://fast.example/', 0.05)
+        timeouts.record('https://slow.example/', 10.0)
+        timeouts.record('https://stuck.example/', 500.0)
+    assert timeouts.get('https://fast.example/') == (2.0, 5.0)
+    connect, read = timeouts.get('https://slow.example/')
+    assert connect == 10.0 and 30.0 <= read <= 90.0
+    assert timeouts.get('https://stuck.example/') == (10.0, 90.0)
+
+
+def test_domains_are_keyed_by_host_and_evicted_lru():
+    timeouts = AdaptiveTimeouts(min_samples=1, max_domains=2)
+    timeouts.record('https://A.example/x', 1.0)
+    timeouts.record('https://b.example/', 1.0)
+    timeouts.get('https://a.example/y')  # a becomes the most recently used
+    timeouts.record('https://c.example/', 1.0)
+    assert set(timeouts.snapshot()) == {'a.example', 'c.example'}
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Unit tests for API record-and-replay
+
+    python -m pytest -q test_api_replay.py
+"""
+
+import json
+
+from api_replay import MAX_FAILURES, ApiProfileStore, origin_of, page_tokens, templatize
+
+PAGE_URL = 'https://news.example.com/markets/2024/acme-results-123456.html'
+BODY = ("Acme Ltd reported a record half-year profit on Tuesday, lifting its interim dividend by ten "
+        "per cent and upgrading full-year guidance as demand for its services kept growing across all of its "
+        "regions and markets.")
+
+
+def capture(url, body=None, text=BODY):
+    return {
+        'method': 'POST' if body else 'GET',
+        'url': url,
+        'headers': {'Accept': 'application/json', 'Cookie': 'session=secret'},
+        'body': body,
+        'payload': {'article': {'content': text}},
+    }
+
+
+def test_origin_of():
+    assert origin_of('HTTPS://News.Example.com/a?b=1') == 'https://news.example.com'
+    assert origin_of('http://example.com:8080/') == 'http://example.com:8080'
+    assert origin_of('https://a.example.com.au/') != origin_of('https://b.example.com.au/')
+
+
+def test_page_tokens():
+    assert page_tokens(PAGE_URL) == {
+        'path': '/markets/2024/acme-results-123456.html',
+        'slug': 'acme-results-123456.html',
+        'slug_stem': 'acme-results-123456',
+        'id0': '123456',
+        'id1': '2024',
+    }
+    assert page_tokens('https://example.com/') == {}
+
+
+def test_templatize_prefers_the_longest_value():
+    tokens = page_tokens(PAGE_URL)
+    template, used = templatize('/api/content?path=/markets/2024/acme-results-123456.html', tokens)
+    assert (template, used) == ('/api/content?path={path}', True)
+    template, used = templatize('/api/story/123456?fields={"body":1}', tokens)
+    assert used and template.format(**tokens) == '/api/story/123456?fields={"body":1}'
+    assert template.startswith('/api/story/{id0}')
+
+
+def test_templatize_without_tokens():
+    assert templatize('/api/menu', page_tokens(PAGE_URL)) == ('/api/menu', False)
+
+
+def test_record_and_replay_for_another_page():
+    store = ApiProfileStore()
+    captures = [
+        capture('https://news.example.com/api/story/123456'),
+        capture('https://news.example.com/api/menu'),  # Same for every page
+        capture('https://ads.example.net/api/story/123456'),  # Another origin
+        capture('https://news.example.com/api/teaser/123456', text='Too short'),
+    ]
+    assert store.record(PAGE_URL, captures) == 1
+    assert store.has_profile('https://news.example.com/other')
+    assert not store.has_profile('http://news.example.com/other')
+
+    requests = list(store.requests_for('https://news.example.com/markets/2024/other-story-654321.html'))
+    assert [(method, url, headers) for _, method, url, headers, _ in requests] == [
+        ('GET', 'https://news.example.com/api/story/654321', {'Accept': 'application/json'}),
+    ]
+
+
+def test_failing_templates_are_dropped_and_saved(tmp_path):
+    path = tmp_path / 'profiles.json'
+    store = ApiProfileStore(str(path))
+    store.record(PAGE_URL, [capture('https://news.example.com/api/story', body='{"slug": "acme-results-123456"}')])
+    template = store.profiles['https://news.example.com'][0]
+    assert template['body'] == '{{"slug": "{slug_stem}"}}'
+    assert not path.exists()  # record() leaves writing to save()
+
+    assert not store.mark(PAGE_URL, template, success=True)
+    for _ in range(MAX_FAILURES):
+        assert store.mark(PAGE_URL, template, success=False)
+    assert not store.has_profile(PAGE_URL)
+
+    store.save()
+    assert json.loads(path.read_text()) == {}
+    assert ApiProfileStore(str(path)).profiles == {}
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Unit tests for embedded JSON data extraction
+
+    python -m pytest -q test_embedded_data.py
+"""
+
+import json
+
+from embedded_data import extract_embedded_data, extract_from_payloads
+
+BODY = ("Shareholders approved every resolution at the annual general meeting, including the "
+        "re-election of two directors and the new long-term incentive plan for senior executives.")
+
+
+def test_next_data():
+    payload = {'props': {'pageProps': {'article': {
+        'title': 'AGM results',
+        'publishedAt': '2024-05-01T09:00:00Z',
+        'body': f'<p>{BODY}</p>',
+        'summary': 'Shareholders approved every resolution',
+        'heroImage': {'src': '/images/agm.jpg'},
+    }}}}
+    html = f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(payload)}</script>'
+    result = extract_embedded_data(html, 'https://example.com/news/agm')
+    assert result['title'] == 'AGM results'
+    assert result['date'] == '2024-05-01T09:00:00Z'
+    assert result['text'] == BODY  # The summary is contained in the body and dropped
+    assert result['images'] == ['https://example.com/images/agm.jpg']
+    assert result['sources'] == ['__NEXT_DATA__']
+
+
+def test_ld_json_prefers_headline():
+    payload = {'@type': 'NewsArticle', 'name': 'Example Media', 'headline': 'Profit &amp; loss',
+               'datePublished': '2024-02-03', 'image': ['https://cdn.example.com/resizer/abc']}
+    html = f'<script type="application/ld+json">{json.dumps(payload)}</script>'
+    result = extract_embedded_data(html, 'https://example.com/')
+    assert result['title'] == 'Profit & loss'
+    assert result['date'] == '2024-02-03'
+    assert result['images'] == ['https://cdn.example.com/resizer/abc']
+
+
+def test_window_state_assignment():
+    html = f'<script>window.__INITIAL_STATE__ = {json.dumps({"story": {"content": BODY}})};</script>'
+    result = extract_embedded_data(html, 'https://example.com/')
+    assert result['text'] == BODY
+    assert result['sources'] == ['window.__INITIAL_STATE__']
+
+
+def test_broken_json_is_skipped():
+    html = ('<script type="application/json">{"title": </script>'
+            '<script type="application/ld+json">{"headline": "Kept"}</script>')
+    result = extract_embedded_data(html, 'https://example.com/')
+    assert result['title'] == 'Kept'
+    assert result['sources'] == ['application/ld+json']
+
+
+def test_no_payloads():
+    assert extract_embedded_data('<html><script>var a = 1;</script></html>', 'https://example.com/') is None
+    assert extract_embedded_data(None, 'https://example.com/') is None
+    assert extract_from_payloads([], 'https://example.com/') is None
+
+
+def test_non_image_urls_are_not_images():
+    result = extract_from_payloads([('xhr', {'link': 'https://example.com/about', 'src': '/page.html'})],
+                                   'https://example.com/')
+    assert result['images'] == []
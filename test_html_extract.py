@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Unit tests for single-pass HTML extraction
+
+    python -m pytest -q test_html_extract.py
+"""
+
+import pytest
+
+from html_extract import available_backends, best_candidate, extract_page, image_candidates, parse_srcset
+
+
+def test_parse_srcset():
+    assert parse_srcset('a.jpg 480w, b.jpg 1080w') == [('a.jpg', '480w'), ('b.jpg', '1080w')]
+    assert parse_srcset('a.jpg, b.jpg 2x') == [('a.jpg', ''), ('b.jpg', '2x')]
+    assert parse_srcset('  ') == []
+
+
+def test_parse_srcset_keeps_commas_inside_urls():
+    srcset = 'https://cdn.example/w_400,h_300/x.jpg 400w, https://cdn.example/w_1600,h_1200/x.jpg 1600w'
+    assert parse_srcset(srcset) == [
+        ('https://cdn.example/w_400,h_300/x.jpg', '400w'),
+        ('https://cdn.example/w_1600,h_1200/x.jpg', '1600w'),
+    ]
+
+
+def test_image_candidates_widths_and_densities():
+    attrs = {'src': 'small.jpg', 'srcset': 'one.jpg 1x, two.jpg 2x', 'width': '800'}
+    assert image_candidates(attrs) == [('one.jpg', 800, 1.0), ('two.jpg', 1600, 2.0), ('small.jpg', 800, 1.0)]
+
+
+def test_image_candidates_prefer_lazy_attributes_and_skip_placeholders():
+    attrs = {'src': 'data:image/gif;base64,R0lGOD', 'data-srcset': 'real.jpg 1200w', 'srcset': 'blank.jpg 1w'}
+    assert image_candidates(attrs) == [('real.jpg', 1200, None)]
+
+
+def test_image_candidates_skip_undecodable_sources():
+    sources = [{'srcset': 'x.avif 2000w', 'type': 'image/avif'}, {'srcset': 'x.webp 2000w', 'type': 'image/webp'}]
+    urls = [url for url, _, _ in image_candidates({'src': 'x.jpg'}, sources)]
+    assert urls == ['x.webp', 'x.jpg']
+
+
+@pytest.mark.parametrize('candidates, expected', [
+    ([], None),
+    ([('a', 800, None), ('b', 1800, None), ('c', 2400, None)], 'b'),  # Smallest at or above the target
+    ([('a', 800, None), ('b', 1200, None)], 'b'),  # Largest when none is wide enough
+    ([('a', None, 1.0), ('b', None, 3.0), ('c', None, 2.0)], 'b'),  # Highest density when widths are unknown
+    ([('a', None, 3.0), ('b', 900, None)], 'b'),  # Known widths win over densities
+])
+def test_best_candidate(candidates, expected):
+    assert best_candidate(candidates, target_width=1600) == expected
+
+
+PAGE = """<html><head><title> Results </title>
+<meta property="og:image" content="/og.png"><script>var x = 'hidden';</script></head>
+<body><p>Revenue <b>grew</b> strongly.</p>
+<picture><source srcset="/chart-800.webp 800w, /chart-2000.webp 2000w" type="image/webp">
+<img src="/chart.jpg" alt=""></picture>
+<div style="background-image: url('/bg.png')">Footer</div></body></html>"""
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_extract_page_backends_agree(backend):
+    result = extract_page(PAGE, 'https://example.com/news/', backend=backend)
+    assert result['backend'] == backend
+    assert result['title'] == 'Results'
+    assert 'Revenue grew strongly.' in result['text'] and 'hidden' not in result['text']
+    assert result['images'] == ['https://example.com/chart-2000.webp', 'https://example.com/bg.png']
+    assert result['meta_images'] == ['https://example.com/og.png']
+
+
+def test_extract_page_filters_with_is_image():
+    result = extract_page(PAGE, 'https://example.com/', is_image=lambda url: url.endswith('.png'))
+    assert result['images'] == ['https://example.com/bg.png']
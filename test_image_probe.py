@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Unit tests for header-only image probing
+
+    python -m pytest -q test_image_probe.py
+"""
+
+import base64
+from io import BytesIO
+
+import pytest
+from PIL import Image, features
+
+from image_probe import PROBE_CHUNK_BYTES, decode_data_url, parse_image_header, qualifies, rank_images
+
+FORMATS = ['PNG', 'JPEG', 'GIF'] + (['WEBP'] if features.check('webp') else [])
+
+
+def encode(fmt, size=(640, 480), **params):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 40, 40)).save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('fmt', FORMATS)
+def test_header_gives_format_and_size(fmt):
+    data = encode(fmt)
+    assert parse_image_header(data[:PROBE_CHUNK_BYTES]) == (fmt, 640, 480)
+
+
+@pytest.mark.parametrize('fmt', FORMATS)
+def test_truncated_header_is_incomplete(fmt):
+    assert parse_image_header(encode(fmt)[:8]) is None
+
+
+def test_jpeg_frame_header_after_a_large_exif_block():
+    exif = Image.Exif()
+    exif[0x010E] = 'x' * 20000  # ImageDescription
+    data = encode('JPEG', exif=exif.tobytes())
+    assert parse_image_header(data[:PROBE_CHUNK_BYTES]) is None
+    assert parse_image_header(data[:30000]) == ('JPEG', 640, 480)
+
+
+@pytest.mark.parametrize('data', [b'', b'not an image at all', b'\x89PNG\r\n\x1a\n\0\0'])
+def test_garbage_is_incomplete(data):
+    assert parse_image_header(data) is None
+
+
+def test_svg():
+    svg = b'<?xml version="1.0"?>\n<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"></svg>'
+    assert parse_image_header(svg) == ('SVG', None, None)
+    assert not qualifies(parse_image_header(svg))
+
+
+def test_data_url():
+    data = encode('PNG', size=(300, 200))
+    url = 'data:image/png;base64,' + base64.b64encode(data).decode()
+    assert decode_data_url(url) == data
+    assert decode_data_url('data:image/svg+xml,<svg/>') is None
+    assert decode_data_url('data:text/plain;base64,aGk=') is None
+
+
+@pytest.mark.parametrize('probe, expected', [
+    (None, True),  # Header not read: OCR it anyway
+    (('PNG', None, None), True),
+    (('GIF', 1, 1), False),  # Tracking pixel
+    (('PNG', 40, 600), False),  # Too narrow
+    (('PNG', 120, 120), False),  # Too small in area
+    (('JPEG', 800, 600), True),
+])
+def test_qualifies(probe, expected):
+    assert qualifies(probe) is expected
+
+
+def test_rank_images():
+    urls = ['small', 'unknown', 'big', 'svg', 'medium', 'unprobed']
+    probes = {
+        'small': ('PNG', 20, 20),
+        'unknown': None,
+        'big': ('JPEG', 2000, 1500),
+        'svg': ('SVG', None, None),
+        'medium': ('PNG', 800, 600),
+    }
+    assert rank_images(urls, probes) == ['big', 'medium', 'unknown']
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Unit tests for main-content extraction
+
+    python -m pytest -q test_main_content.py
+"""
+
+import pytest
+
+from main_content import NEGATIVE_RE, POSITIVE_RE, extract_main_content
+
+PROSE = ("The company reported revenue of $12.4 million for the quarter, up 18% on the prior year, "
+         "driven by growth in its enterprise segment, new contracts in Asia, and lower churn. ")
+
+PAGE = f"""<html><body>
+<nav><ul><li><a href="/">Home</a></li><li><a href="/news">News</a></li></ul></nav>
+<div class="cookie-banner"><p>We use cookies to improve your experience on this website, please accept.</p></div>
+<div id="main" class="article-body">
+  <h1>Quarterly results</h1>
+  <p>{PROSE}</p>
+  <p>{PROSE}</p>
+  <img src="/chart.png">
+</div>
+<div class="related-links"><ul>
+  <li><a href="/a">Another story about markets, rates, and the economy this week</a></li>
+  <li><a href="/b">A second story about markets, rates, and the economy this week</a></li>
+</ul></div>
+<footer><p>Copyright 2024 Example Media Pty Ltd, all rights reserved, terms apply.</p></footer>
+</body></html>"""
+
+
+def test_article_body_wins_over_boilerplate():
+    result = extract_main_content(PAGE, 'https://example.com/news/results')
+    assert result['text'].startswith('Quarterly results The company reported')
+    assert 'cookies' not in result['text']
+    assert 'Another story' not in result['text']
+    assert 'Copyright' not in result['text']
+    assert result['images'] == ['https://example.com/chart.png']
+    assert result['score'] > 0
+
+
+def test_split_article_keeps_strong_siblings_in_order():
+    page = f"""<html><body><div>
+      <section><p>First part. {PROSE}</p><p>{PROSE}</p></section>
+      <section><p>Second part. {PROSE}</p><p>{PROSE}</p></section>
+      <section><p>Short aside.</p></section>
+    </div></body></html>"""
+    text = extract_main_content(page, 'https://example.com/')['text']
+    assert text.index('First part.') < text.index('Second part.')
+    assert 'Short aside.' not in text
+
+
+@pytest.mark.parametrize('html', ['', '   ', '<html><body><p>Too short.</p></body></html>'])
+def test_no_prose_returns_none(html):
+    assert extract_main_content(html, 'https://example.com/') is None
+
+
+@pytest.mark.parametrize('names', ['nav', 'site-header', 'share-bar', 'cookie_consent', 'ad', 'sidebar widgets'])
+def test_boilerplate_names(names):
+    assert NEGATIVE_RE.search(names)
+
+
+@pytest.mark.parametrize('names', ['shareholder-update', 'commentary', 'subheader', 'loading', 'navigator-guide'])
+def test_content_names_are_not_boilerplate(names):
+    assert not NEGATIVE_RE.search(names)
+
+
+@pytest.mark.parametrize('names', ['related-posts', 'maintenance', 'textbox', 'postscript'])
+def test_content_names_match_whole_tokens(names):
+    assert not POSITIVE_RE.search(names)
+
+
+@pytest.mark.parametrize('names', ['related-posts', 'footer-content', 'share-content', 'cookie-banner__text'])
+def test_content_like_boilerplate_is_dropped(names):
+    page = f"""<html><body><div class="entry">
+      <p>{PROSE}</p><p>{PROSE}</p>
+      <div class="{names}"><p>Read more about markets, rates, and the economy in our other coverage.</p></div>
+    </div></body></html>"""
+    text = extract_main_content(page, 'https://example.com/')['text']
+    assert 'The company reported' in text
+    assert 'Read more' not in text
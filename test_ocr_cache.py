@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the OCR result cache
+
+    python -m pytest -q test_ocr_cache.py
+"""
+
+import itertools
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+import ocr_cache
+from ocr_cache import OCRCache, hamming_distance, perceptual_hash
+
+SETTINGS = '--psm 6'
+
+
+def encode(img, fmt='PNG', **params):
+    buffer = BytesIO()
+    img.save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+def chart(shade=0):
+    """A 200x120 image with distinct bars, so its perceptual hash has structure"""
+    img = Image.new('RGB', (200, 120), 'white')
+    for i, height in enumerate((30, 90, 60, 110, 45)):
+        img.paste((20 + shade, 60, 160), (10 + 38 * i, 120 - height, 38 + 38 * i, 120))
+    return img
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = OCRCache(str(tmp_path / 'ocr.db'), use_phash=True)
+    yield cache
+    cache.close()
+
+
+def test_exact_hit_and_misses(cache):
+    image = encode(chart())
+    assert cache.get(image, SETTINGS)[0] is None
+    cache.put(image, SETTINGS, 'Revenue by region')
+    assert cache.get(image, SETTINGS)[:2] == ('exact', 'Revenue by region')
+    assert cache.get(image, '--psm 3')[0] is None  # Other settings, other entry
+    stats = cache.stats()
+    assert (stats['hits'], stats['perceptual_hits'], stats['misses']) == (1, 0, 2)
+    assert stats['hit_rate'] == pytest.approx(1 / 3, abs=0.001)
+
+
+def test_images_without_text_are_cached(cache):
+    image = encode(chart())
+    cache.put(image, SETTINGS, None)
+    assert cache.get(image, SETTINGS)[:2] == ('exact', None)
+
+
+def test_perceptual_near_match(cache):
+    original = encode(chart())
+    recompressed = encode(chart(shade=6), 'JPEG', quality=70)
+    assert original != recompressed
+    assert hamming_distance(perceptual_hash(original), perceptual_hash(recompressed)) <= ocr_cache.PHASH_MAX_DISTANCE
+
+    cache.put(original, SETTINGS, 'Revenue by region')
+    match, text, phash = cache.get(recompressed, SETTINGS)
+    assert (match, text) == ('perceptual', 'Revenue by region')
+    assert phash == perceptual_hash(recompressed)
+    assert cache.stats()['perceptual_hits'] == 1
+
+
+def test_unrelated_image_is_not_a_perceptual_match(cache):
+    cache.put(encode(chart()), SETTINGS, 'Revenue by region')
+    flipped = encode(chart().transpose(Image.FLIP_LEFT_RIGHT))
+    assert cache.get(flipped, SETTINGS)[0] is None
+
+
+def test_perceptual_matching_is_off_by_default(tmp_path):
+    cache = OCRCache(str(tmp_path / 'ocr.db'))
+    cache.put(encode(chart()), SETTINGS, 'Revenue by region')
+    assert cache.get(encode(chart(shade=6), 'JPEG', quality=70), SETTINGS)[0] is None
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = itertools.count(1000)
+    monkeypatch.setattr(ocr_cache.time, 'time', lambda: next(clock))
+    cache = OCRCache(str(tmp_path / 'ocr.db'), max_mb=0.1)
+    images = [f'image {i}'.encode() for i in range(40)]
+    text = 'x' * 4000
+
+    cache.put(images[0], SETTINGS, text)
+    for image in images[1:]:
+        cache.put(image, SETTINGS, text)
+        assert cache.get(images[0], SETTINGS)[0] == 'exact'  # Keeps the first entry recently used
+
+    assert cache.stats()['size_bytes'] <= cache.max_bytes
+    assert cache.get(images[1], SETTINGS)[0] is None
+    assert cache.get(images[-1], SETTINGS)[0] == 'exact'
+    cache.close()
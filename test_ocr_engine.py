@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Unit tests for OCR engine selection
+
+Neither Tesseract nor tesserocr needs to be installed: tesserocr is replaced
+by a stand-in module and pytesseract's calls are stubbed.
+
+    python -m pytest -q test_ocr_engine.py
+"""
+
+import types
+
+import pytest
+
+import ocr_engine
+from ocr_engine import PytesseractEngine, TesserocrEngine, mean_confidence, psm_of
+
+
+class FakeAPI:
+    """Records what tesserocr.PyTessBaseAPI was asked to do"""
+
+    def __init__(self, lang):
+        self.lang = lang
+        self.calls = []
+
+    def SetPageSegMode(self, psm):
+        self.calls.append(('psm', psm))
+
+    def SetImage(self, img):
+        self.calls.append(('image', img))
+
+    def GetUTF8Text(self):
+        return 'Revenue grew\n'
+
+    def AllWordConfidences(self):
+        return [90, 80]
+
+
+def broken_api(lang):
+    raise RuntimeError("Failed to init API, possibly an invalid tessdata path")
+
+
+@pytest.fixture
+def engine_state(monkeypatch):
+    """A fresh engine choice for each test"""
+    monkeypatch.setattr(ocr_engine, '_engine', None)
+    monkeypatch.setattr(ocr_engine, '_available', None)
+    monkeypatch.delenv('OCR_ENGINE', raising=False)
+    return monkeypatch
+
+
+@pytest.mark.parametrize('config, expected', [('--psm 11', 11), ('--oem 1 --psm  3', 3), ('', 6), (None, 6)])
+def test_psm_of(config, expected):
+    assert psm_of(config) == expected
+
+
+def test_mean_confidence_ignores_non_words():
+    assert mean_confidence(['-1', '90', 80.5, -1]) == pytest.approx(85.2, abs=0.05)
+    assert mean_confidence([-1, '-1']) == 0.0
+
+
+def test_pytesseract_without_tesserocr(engine_state):
+    engine_state.setattr(ocr_engine, 'tesserocr', None)
+    assert isinstance(ocr_engine.get_engine(), PytesseractEngine)
+    assert ocr_engine.get_engine() is ocr_engine.get_engine()
+
+
+def test_tesserocr_requested_but_missing(engine_state, capsys):
+    engine_state.setattr(ocr_engine, 'tesserocr', None)
+    engine_state.setenv('OCR_ENGINE', 'tesserocr')
+    assert ocr_engine.get_engine().name == 'pytesseract'
+    assert 'tesserocr is not installed' in capsys.readouterr().out
+
+
+def test_tesserocr_preferred_when_installed(engine_state):
+    engine_state.setattr(ocr_engine, 'tesserocr', types.SimpleNamespace(PyTessBaseAPI=FakeAPI))
+    engine = ocr_engine.get_engine()
+    assert isinstance(engine, TesserocrEngine)
+    assert engine.recognize('image', 11) == ('Revenue grew\n', 85.0)
+    assert engine.api.calls == [('psm', 11), ('image', 'image')]
+    assert ocr_engine.tesseract_available()
+
+
+def test_tesserocr_that_fails_to_start_falls_back(engine_state, capsys):
+    engine_state.setattr(ocr_engine, 'tesserocr', types.SimpleNamespace(PyTessBaseAPI=broken_api))
+    assert ocr_engine.get_engine().name == 'pytesseract'
+    assert 'tesserocr unavailable' in capsys.readouterr().out
+
+
+def test_pytesseract_forced(engine_state):
+    engine_state.setattr(ocr_engine, 'tesserocr', types.SimpleNamespace(PyTessBaseAPI=FakeAPI))
+    engine_state.setenv('OCR_ENGINE', 'pytesseract')
+    assert ocr_engine.get_engine().name == 'pytesseract'
+
+
+def test_pytesseract_engine_keeps_lines(monkeypatch):
+    data = {
+        'text': ['Revenue', 'grew', '', 'Costs', 'fell'],
+        'conf': ['91', '89', '-1', '70', '80'],
+        'block_num': [1, 1, 1, 1, 1],
+        'par_num': [1, 1, 1, 1, 1],
+        'line_num': [1, 1, 1, 2, 2],
+    }
+    calls = []
+
+    def image_to_data(img, lang, config, output_type):
+        calls.append(config)
+        return data
+    monkeypatch.setattr(ocr_engine.pytesseract, 'image_to_data', image_to_data)
+    assert PytesseractEngine().recognize('image', 4) == ('Revenue grew\nCosts fell', 82.5)
+    assert calls == ['--psm 4']
+
+
+def test_tesseract_unavailable(engine_state):
+    engine_state.setattr(ocr_engine, 'tesserocr', None)
+
+    def missing():
+        raise ocr_engine.pytesseract.TesseractNotFoundError()
+    engine_state.setattr(ocr_engine.pytesseract, 'get_tesseract_version', missing)
+    assert ocr_engine.tesseract_available() is False
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Unit tests for stitching the OCR texts of overlapping image bands
+
+    python -m pytest -q test_ocr_pool.py
+"""
+
+from ocr_pool import stitch_texts
+
+
+def test_overlap_is_read_once():
+    first = "Revenue rose 12% to $40 million. Operating costs fell"
+    second = "to $40 million. Operating costs fell by 3% over the half."
+    assert stitch_texts([first, second]) == (
+        "Revenue rose 12% to $40 million. Operating costs fell by 3% over the half.")
+
+
+def test_fragments_at_the_band_edges_are_dropped():
+    # The band edge cuts the last line of the first band and the first line of the second
+    first = "The board declared a dividend of 5 cents per share payable in Octo"
+    second = "ividend of 5 cents per share payable in October to holders."
+    assert stitch_texts([first, second]) == (
+        "The board declared a dividend of 5 cents per share payable in October to holders.")
+
+
+def test_matching_ignores_punctuation_and_case():
+    assert stitch_texts(["net profit was Strong, growing fast.", "strong growing fast again"]) == (
+        "net profit was strong growing fast again")
+
+
+def test_unrelated_bands_are_joined():
+    assert stitch_texts(["First band text.", "Second band text."]) == "First band text. Second band text."
+
+
+def test_empty_bands():
+    assert stitch_texts([]) == ''
+    assert stitch_texts(["", "Only text here", None]) == 'Only text here'
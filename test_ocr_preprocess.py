@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the OCR resize step
+
+The fixtures are drawn rather than rendered from a font: "words" of
+vertical strokes, which the text-line detector sees like glyphs.
+
+    python -m pytest -q test_ocr_preprocess.py
+"""
+
+import pytest
+from PIL import Image, ImageDraw
+
+from ocr_preprocess import PREPROCESS_DEFAULTS, resize_scale
+from text_detect import detector_available, estimate_char_height
+
+pytestmark = pytest.mark.skipif(not detector_available(), reason="requires OpenCV")
+
+
+def draw_lines(draw, top, count, line_height, width, gap):
+    """count lines of stroke words line_height tall, starting at top"""
+    for line in range(count):
+        y = top + line * (line_height + gap)
+        x = 40
+        while x + 6 * line_height < width - 40:
+            for stroke in range(x, x + 6 * line_height, max(2, line_height // 4)):
+                draw.rectangle((stroke, y, stroke + max(1, line_height // 8), y + line_height - 1), fill=0)
+            x += 7 * line_height
+    return top + count * (line_height + gap)
+
+
+def page(width, height, headings, body, body_height):
+    img = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    bottom = draw_lines(draw, 40, headings, 48, width, 40)
+    draw_lines(draw, bottom + 40, body, body_height, width, body_height)
+    return img
+
+
+def test_small_body_text_sets_the_scale():
+    img = page(2400, 1800, headings=2, body=30, body_height=12)
+    char_height = estimate_char_height(img)
+    assert 12 <= char_height <= 16  # Stroke edges add a pixel or two; headings are 48
+    uncapped = dict(PREPROCESS_DEFAULTS, max_width=10000)
+    assert resize_scale(img, uncapped) == pytest.approx(32 / char_height)
+    assert resize_scale(img, PREPROCESS_DEFAULTS) == pytest.approx(3000 / 2400)
+
+
+def test_tall_image_is_not_shrunk_to_fit():
+    img = page(800, 5000, headings=1, body=120, body_height=20)
+    char_height = estimate_char_height(img)
+    assert 20 <= char_height <= 24
+    assert resize_scale(img, PREPROCESS_DEFAULTS) == pytest.approx(32 / char_height)
+
+
+def test_wide_and_huge_images_are_capped():
+    wide = Image.new('L', (6000, 1000), 255)
+    assert resize_scale(wide, PREPROCESS_DEFAULTS) == pytest.approx(0.5)
+    options = dict(PREPROCESS_DEFAULTS, target_char_height=80)  # Scale 4 on the tall page
+    tall = page(800, 5000, headings=1, body=120, body_height=20)
+    scale = resize_scale(tall, options)
+    assert 800 * 5000 * scale ** 2 == pytest.approx(options['max_pixels'], rel=0.01)
@@ -62,6 +62,8 @@ async def test_listcorp_scraping():
         print(f"\n❌ Test failed with error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        await scraper.aclose()
 
 if __name__ == "__main__":
     # Run the async test
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the image URL classifier
+
+    python -m pytest -q test_url_classifier.py
+"""
+
+import pytest
+
+from url_classifier import DEFINITE_IMAGE, NOT_IMAGE, PROBABLE_IMAGE, ImageURLClassifier, classify_url
+
+
+@pytest.mark.parametrize('url', [
+    'https://example.com/chart.png',
+    'https://example.com/a/b/Photo.JPEG?w=800',
+    'https://example.com/logo.svg#icon',
+    'https://example.com/scan.tiff;jsessionid=1',
+    'data:image/png;base64,iVBORw0KGgo=',
+])
+def test_definite_images(url):
+    assert classify_url(url) == DEFINITE_IMAGE
+
+
+@pytest.mark.parametrize('url', [
+    'https://cdn.example.com/resizer/abc123',
+    'https://example.com/media/12345',
+    'https://example.com/thumbnail?id=7',
+])
+def test_probable_images(url):
+    assert classify_url(url) == PROBABLE_IMAGE
+
+
+@pytest.mark.parametrize('url', [
+    'https://example.com/about',
+    'https://example.com/image-gallery.html',  # A hint, but a page
+    'https://cdn.example.com/app.js',
+    'javascript:void(0)',
+    'https://example.com/chart.png.html',  # The extension must end the path
+])
+def test_not_images(url):
+    assert classify_url(url) == NOT_IMAGE
+
+
+def test_classifier_memoises():
+    classifier = ImageURLClassifier()
+    assert classifier.is_candidate('https://example.com/img/1')
+    assert not classifier.is_candidate('https://example.com/about')
+    assert classifier._cache == {
+        'https://example.com/img/1': PROBABLE_IMAGE,
+        'https://example.com/about': NOT_IMAGE,
+    }
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the image download -> OCR pipeline (extract_image_texts)
+
+Downloads and OCR are stubbed, and OCR runs on a thread pool, so neither the
+network nor Tesseract is needed.
+
+    python -m pytest -q test_web_scraper.py
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import web_scraper
+from ocr_cache import OCRCache
+from ocr_pool import PsmPriors
+from web_scraper import EnhancedWebScraper
+
+URLS = [f'https://img{i % 2}.example.com/{name}.png' for i, name in enumerate(['alpha', 'beta', 'gamma', 'delta'])]
+
+
+def stub_ocr(image_bytes, **options):
+    """ocr_image_bytes stand-in: the 'text' of an image is its name in capitals"""
+    name = image_bytes.decode()
+    if name == 'photo':
+        return {'text': None, 'text_score': 0.0, 'skipped': True, 'psm': None, 'confidence': None}
+    return {'text': name.upper(), 'text_score': 0.05, 'skipped': False, 'psm': 6, 'confidence': 90.0}
+
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(web_scraper, 'get_ocr_pool', lambda: pool)
+    monkeypatch.setattr(web_scraper, 'pool_size', lambda: 2)
+    monkeypatch.setattr(web_scraper, 'ocr_image_bytes', stub_ocr)
+    scraper = EnhancedWebScraper()
+    scraper.ocr_cache = OCRCache(str(tmp_path / 'ocr.db'))
+    scraper.psm_priors = PsmPriors()
+    yield scraper
+    scraper.ocr_cache.close()
+    pool.shutdown(wait=False)
+
+
+def stub_downloads(scraper, delays, fail=()):
+    """download_image stand-in; later images finish first when delays decrease"""
+    async def download_image(image_url, timeout=None):
+        await asyncio.sleep(delays.get(image_url, 0))
+        if image_url in fail:
+            raise ValueError(f"HTTP 404 for {image_url}")
+        return image_url.rsplit('/', 1)[1][:-len('.png')].encode()
+    scraper.download_image = download_image
+
+
+def test_results_keep_page_order(scraper):
+    stub_downloads(scraper, {url: 0.02 * (len(URLS) - i) for i, url in enumerate(URLS)})
+    results, timings = asyncio.run(scraper.extract_image_texts(URLS))
+    assert [result['text'] for result in results] == ['ALPHA', 'BETA', 'GAMMA', 'DELTA']
+    assert [result['image_url'] for result in results] == URLS
+    assert not any(result['cached'] for result in results)
+    assert set(timings) == {'download', 'queue_wait', 'cache', 'ocr', 'wall'}
+    assert scraper.psm_priors.wins[6] == 4
+
+
+def test_failed_and_skipped_images_are_left_out(scraper):
+    urls = URLS[:2] + ['https://img0.example.com/photo.png']
+    stub_downloads(scraper, {}, fail={URLS[0]})
+    results, _ = asyncio.run(scraper.extract_image_texts(urls))
+    assert [result['text'] for result in results] == ['BETA']
+
+
+def test_second_run_is_served_from_the_cache(scraper, monkeypatch):
+    stub_downloads(scraper, {})
+    asyncio.run(scraper.extract_image_texts(URLS))
+    monkeypatch.setattr(web_scraper, 'ocr_image_bytes', lambda image_bytes, **options: pytest.fail("OCR ran"))
+    results, _ = asyncio.run(scraper.extract_image_texts(URLS))
+    assert [result['text'] for result in results] == ['ALPHA', 'BETA', 'GAMMA', 'DELTA']
+    assert all(result['cached'] == 'exact' for result in results)
+
+
+def test_budget_returns_what_finished_in_time(scraper, monkeypatch):
+    release = threading.Event()
+
+    def slow_on_gamma(image_bytes, **options):
+        if image_bytes == b'gamma':
+            release.wait(5)
+        return stub_ocr(image_bytes)
+    monkeypatch.setattr(web_scraper, 'ocr_image_bytes', slow_on_gamma)
+    stub_downloads(scraper, {URLS[2]: 0.05, URLS[3]: 0.1})
+    try:
+        results, timings = asyncio.run(scraper.extract_image_texts(URLS, ocr_budget=0.5))
+    finally:
+        release.set()
+    assert [result['text'] for result in results] == ['ALPHA', 'BETA', 'DELTA']
+    assert 0.5 <= timings['wall'] < 2
+
+
+def test_no_images(scraper):
+    assert asyncio.run(scraper.extract_image_texts([])) == ([], {
+        'download': 0.0, 'queue_wait': 0.0, 'cache': 0.0, 'ocr': 0.0, 'wall': 0.0})
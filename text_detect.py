@@ -0,0 +1,91 @@
+"""
+Fast text-presence scoring with OpenCV, so photos can skip Tesseract.
+Without OpenCV and NumPy text_score() returns None and every image goes to OCR.
+"""
+
+from PIL import Image
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+    np = None
+
+DETECT_MAX_SIDE = 640  # Images are scored at most this size
+CHAR_HEIGHT_MAX_PIXELS = 4_000_000  # Text lines are measured at most this area, so body text stays visible
+DEFAULT_TEXT_THRESHOLD = 0.003  # Fraction covered by text-like lines; one caption line scores ~0.008
+
+MIN_LINE_HEIGHT = 6
+MAX_LINE_HEIGHT_RATIO = 0.25  # Taller blobs are objects, not text lines
+MIN_LINE_ASPECT = 1.5
+MIN_LINE_FILL = 0.35
+
+
+def detector_available():
+    return cv2 is not None
+
+
+def text_line_boxes(img, max_pixels=None):
+    """Bounding boxes of line-shaped text blobs on a downscaled grayscale copy (requires OpenCV)
+
+    The copy is at most DETECT_MAX_SIDE on its longer side, or max_pixels in
+    area when given. Returns (boxes, scale, (width, height)) of that copy.
+    """
+    gray = img.convert('L')
+    if max_pixels is None:
+        gray.thumbnail((DETECT_MAX_SIDE, DETECT_MAX_SIDE))
+    elif img.width * img.height > max_pixels:
+        factor = (max_pixels / float(img.width * img.height)) ** 0.5
+        gray = gray.resize((max(1, int(img.width * factor)), max(1, int(img.height * factor))), Image.BICUBIC)
+    scale = gray.width / float(img.width)
+    pixels = np.asarray(gray, dtype=np.uint8)
+    height, width = pixels.shape
+    if height < MIN_LINE_HEIGHT or width < MIN_LINE_HEIGHT:
+        return [], scale, (width, height)
+
+    # Strong horizontal gradients are where glyph strokes start and end
+    gradient = cv2.morphologyEx(pixels, cv2.MORPH_GRADIENT, np.ones((3, 3), np.uint8))
+    _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+    # Merge the letters of a word or line into one blob
+    joined = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1)))
+    contours, _ = cv2.findContours(joined, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    boxes = []
+    max_line_height = max(MIN_LINE_HEIGHT, height * MAX_LINE_HEIGHT_RATIO)
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if h < MIN_LINE_HEIGHT or h > max_line_height or w < h * MIN_LINE_ASPECT:
+            continue
+        fill = cv2.countNonZero(binary[y:y + h, x:x + w]) / float(w * h)
+        if fill >= MIN_LINE_FILL:
+            boxes.append((x, y, w, h))
+    return boxes, scale, (width, height)
+
+
+def text_score(img):
+    """Score a PIL image for text presence (0 = none); None without OpenCV"""
+    if cv2 is None:
+        return None
+
+    boxes, _, (width, height) = text_line_boxes(img)
+    text_area = sum(w * h for _, _, w, h in boxes)
+    return round(text_area / float(width * height), 4)
+
+
+def estimate_char_height(img):
+    """Median height in original pixels of the text lines found, or None
+
+    Measured at up to CHAR_HEIGHT_MAX_PIXELS rather than on text_score's
+    thumbnail, where small body text falls below MIN_LINE_HEIGHT and only
+    headings are left.
+    """
+    if cv2 is None:
+        return None
+
+    boxes, scale, _ = text_line_boxes(img, CHAR_HEIGHT_MAX_PIXELS)
+    if not boxes:
+        return None
+    heights = sorted(h for _, _, _, h in boxes)
+    return heights[len(heights) // 2] / scale
@@ -0,0 +1,58 @@
+"""
+Precompiled image URL classifier: one regex pass per URL instead of
+is_image_url's extension loop and could_be_image's substring scans.
+"""
+
+import re
+
+DEFINITE_IMAGE = 'definite'
+PROBABLE_IMAGE = 'probable'
+NOT_IMAGE = 'not-image'
+
+_SIGNAL_RE = re.compile(
+    # Image file extension at the end of the path (before params, query or fragment)
+    r'(?P<ext>\.(?:jpe?g|png|gif|bmp|tiff|webp|svg)(?=[;?#]|$))'
+    # Obvious non-images
+    r'|(?P<skip>javascript:|data:text|\.css|\.js|\.html|\.php)'
+    # Common image service paths and words hinting at an image
+    r'|(?P<hint>/resizer/|/resize/|/thumb/|/media/|/assets/images/'
+    r'|image|img|photo|picture|thumbnail|avatar|resizer|cdn)'
+)
+
+
+def classify_url(url):
+    """Classify a URL as DEFINITE_IMAGE, PROBABLE_IMAGE or NOT_IMAGE"""
+    url_lower = url.lower()
+    if url_lower.startswith('data:image/'):
+        return DEFINITE_IMAGE
+
+    skip = hint = False
+    for match in _SIGNAL_RE.finditer(url_lower):
+        group = match.lastgroup
+        if group == 'ext':
+            return DEFINITE_IMAGE
+        if group == 'skip':
+            skip = True
+        else:
+            hint = True
+
+    if hint and not skip:
+        return PROBABLE_IMAGE
+    return NOT_IMAGE
+
+
+class ImageURLClassifier:
+    """Memoising classifier; create one per page"""
+
+    def __init__(self):
+        self._cache = {}
+
+    def classify(self, url):
+        category = self._cache.get(url)
+        if category is None:
+            category = self._cache[url] = classify_url(url)
+        return category
+
+    def is_candidate(self, url):
+        """True for definite and probable images"""
+        return self.classify(url) != NOT_IMAGE
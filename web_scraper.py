@@ -4,28 +4,81 @@ Enhanced Web Scraper with OCR Text Extraction for Assistant Bridge
 Scrapes web pages and extracts text from images (JPG, PNG, etc.)
 """
 
-import requests
-from bs4 import BeautifulSoup
-from PIL import Image
-import pytesseract
-from io import BytesIO
-import re
-from urllib.parse import urljoin, urlparse, unquote
+import httpx
+from urllib.parse import urlparse, unquote
 import time
 import json
 from datetime import datetime
 import base64
 import asyncio
-from playwright.async_api import async_playwright
+import functools
+import os
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from adaptive_timeouts import AdaptiveTimeouts
+from scraper_executors import run_blocking, run_parse
+from html_extract import extract_page
+from url_classifier import ImageURLClassifier, classify_url, DEFINITE_IMAGE, NOT_IMAGE
+from main_content import extract_main_content
+from embedded_data import extract_embedded_data, extract_from_payloads
+from api_replay import ApiProfileStore, origin_of
+from ocr_pool import (get_ocr_pool, pool_size, ocr_image, ocr_image_bytes, ocr_settings, PsmPriors,
+                      needs_tiling, split_bands, combine_band_outcomes,
+                      DEFAULT_OCR_CONFIG, DEFAULT_MIN_CONFIDENCE)
+from text_detect import detector_available, DEFAULT_TEXT_THRESHOLD
+from ocr_preprocess import preprocess_options
+from ocr_engine import tesseract_available
+from ocr_cache import OCRCache
+from image_probe import (decode_data_url, parse_image_header, rank_images,
+                         PROBE_CHUNK_BYTES, PROBE_MAX_BYTES)
+
+# Latency history is shared by every scraper instance in the process
+domain_timeouts = AdaptiveTimeouts()
+browser_timeouts = AdaptiveTimeouts(read_floor=10.0, read_ceiling=60.0, read_multiplier=2.0)
+
+# API calls recorded during browser renders, replayed for later pages on the same site
+api_profiles = ApiProfileStore(os.getenv('API_PROFILE_PATH'))
+
+# Page segmentation modes ordered by how often each produced the accepted OCR result
+psm_priors = PsmPriors()
+
+# OCR results keyed by image content, shared across pages and restarts
+ocr_cache = OCRCache(os.getenv('OCR_CACHE_PATH', 'ocr_cache.db'), max_mb=float(os.getenv('OCR_CACHE_MAX_MB', '64')),
+                     use_phash=os.getenv('OCR_CACHE_PHASH', '').lower() in ('1', 'true', 'yes'))
 
 class EnhancedWebScraper:
-    def __init__(self, delay=2, use_playwright=False):
+    def __init__(self, delay=0, use_playwright=False, parser_backend='auto'):
         self.delay = delay
         self.use_playwright = use_playwright
-        self.session = requests.Session()
+        self.parser_backend = parser_backend  # 'auto', 'lxml', 'selectolax' or 'bs4'
+        self.embedded_min_chars = 500  # Embedded JSON text needed to skip the browser
+        self.max_images = 10  # Images OCR'd per page
+        self.max_probe_images = 40  # Image headers probed per page to pick the OCR candidates
+        self.image_download_concurrency = 4  # Parallel image downloads per page
+        self.per_host_downloads = 2  # Parallel image downloads per image host
+        self.ocr_budget = 30.0  # Seconds of OCR wall time per page
+        self.text_threshold = DEFAULT_TEXT_THRESHOLD  # Text-presence score needed for OCR; None OCRs everything
+        self.preprocess = None  # Preprocessing option overrides (see ocr_preprocess.py); False disables it
+        self.multi_psm = True  # Try several page segmentation modes on low-confidence images
+        self.min_confidence = DEFAULT_MIN_CONFIDENCE  # Mean word confidence that stops the PSM search
+        self.psm_priors = psm_priors
+        self.max_browser_pages = 4  # Concurrent renders on the shared browser
+        self._client = None
+        self._client_loop = None
+        self._playwright = None
+        self._browser = None
+        self._browser_loop = None
+        self._browser_lock = None
+        self._browser_pages = None
+        self._next_request = {}  # Host -> earliest start of its next page request
+        
+        # Per-domain timeouts learned from observed latencies
+        self.timeouts = domain_timeouts
+        self.browser_timeouts = browser_timeouts
+        self.api_profiles = api_profiles
+        self.ocr_cache = ocr_cache
         
         # More comprehensive browser headers
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.9',
@@ -36,14 +89,35 @@ class EnhancedWebScraper:
             'Sec-Fetch-Mode': 'navigate',
             'Sec-Fetch-Site': 'none',
             'Sec-Fetch-User': '?1'
-        })
-        
-    async def fetch_with_playwright(self, url):
-        """Fetch page content using a headless browser with Playwright."""
-        print(f"  🤖 Using Playwright to fetch JavaScript-rendered content...")
-        try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(
+        }
+    
+    @property
+    def client(self):
+        """The async HTTP client, bound to the running event loop until aclose()"""
+        loop = asyncio.get_running_loop()
+        if self._client is None:
+            self._client = httpx.AsyncClient(headers=self.headers, follow_redirects=True)
+            self._client_loop = loop
+        elif self._client_loop is not loop:
+            raise RuntimeError("The scraper's HTTP client belongs to another event loop; "
+                               "await scraper.aclose() in that loop first")
+        return self._client
+    
+    async def browser(self):
+        """The shared headless browser, bound to the running event loop like the client"""
+        loop = asyncio.get_running_loop()
+        if self._playwright is not None and self._browser_loop is not loop:
+            raise RuntimeError("The scraper's browser belongs to another event loop; "
+                               "await scraper.aclose() in that loop first")
+        if self._browser_loop is not loop:
+            self._browser_lock = asyncio.Lock()
+            self._browser_pages = asyncio.Semaphore(self.max_browser_pages)
+            self._browser_loop = loop
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(
                     headless=True,
                     args=[
                         '--no-sandbox',
@@ -55,85 +129,167 @@ class EnhancedWebScraper:
                         '--disable-gpu'
                     ]
                 )
+        return self._browser
+    
+    async def aclose(self):
+        """Close the HTTP client's connections and the shared browser"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._browser = None
+        self._playwright = None
+        self._browser_loop = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+    
+    async def pace(self, url, delay=None):
+        """Space page requests to the same host at least delay seconds apart (default self.delay)"""
+        delay = self.delay if delay is None else delay
+        if not delay:
+            return
+        host = urlparse(url).netloc
+        now = time.monotonic()
+        if len(self._next_request) > 1024:
+            self._next_request = {h: t for h, t in self._next_request.items() if t > now}
+        start = max(now, self._next_request.get(host, now))
+        self._next_request[host] = start + delay
+        if start > now:
+            await asyncio.sleep(start - now)
+        
+    async def fetch(self, url, timeout=None, default_timeout=15, method='GET', stream=False, **kwargs):
+        """Request a URL with an adaptive per-domain timeout; with stream=True the caller reads and closes the body"""
+        connect_timeout, read_timeout = self.timeouts.get(url, default=default_timeout, override=timeout)
+        request = self.client.build_request(method, url, timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                                            **kwargs)
+        start = time.time()
+        try:
+            response = await self.client.send(request, stream=stream)
+        except httpx.ConnectTimeout:
+            self.timeouts.record_timeout(url, connect_timeout)
+            raise
+        except httpx.ReadTimeout:
+            self.timeouts.record_timeout(url, read_timeout)
+            raise
+        
+        self.timeouts.record(url, time.time() - start)
+        return response
+        
+    async def fetch_with_playwright(self, url, timeout=None):
+        """Fetch page content using a headless browser with Playwright."""
+        print(f"  🤖 Using Playwright to fetch JavaScript-rendered content...")
+        _, nav_timeout = self.browser_timeouts.get(url, default=30, override=timeout)
+        try:
+            browser = await self.browser()
+            async with self._browser_pages:
                 context = await browser.new_context(
                     user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
                     viewport={'width': 1920, 'height': 1080},
                     locale='en-US'
                 )
-                page = await context.new_page()
+                try:
+                    page = await context.new_page()
                 
-                # Set additional realistic properties to avoid bot detection
-                await page.add_init_script("""
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined,
-                    });
-                """)
+                    # Keep XHR/fetch responses so the site's content API can be replayed later
+                    api_responses = []
+                    page.on('response', lambda resp: api_responses.append(resp)
+                            if resp.request.resource_type in ('xhr', 'fetch') else None)
                 
-                # Navigate and wait for content to load
-                await page.goto(url, wait_until='networkidle', timeout=30000)
+                    # Set additional realistic properties to avoid bot detection
+                    await page.add_init_script("""
+                        Object.defineProperty(navigator, 'webdriver', {
+                            get: () => undefined,
+                        });
+                    """)
                 
-                # Wait a bit more for any late-loading content
-                await asyncio.sleep(3)
+                    # Navigate and wait for content to load
+                    nav_start = time.time()
+                    try:
+                        await page.goto(url, wait_until='networkidle', timeout=nav_timeout * 1000)
+                    except PlaywrightTimeoutError:
+                        self.browser_timeouts.record_timeout(url, nav_timeout)
+                        raise
+                    self.browser_timeouts.record(url, time.time() - nav_start)
                 
-                # Get the final URL after any redirects
-                final_url = page.url
+                    # Wait a bit more for any late-loading content
+                    await asyncio.sleep(3)
                 
-                # Get the rendered HTML content
-                content = await page.content()
+                    # Get the final URL after any redirects
+                    final_url = page.url
                 
-                await browser.close()
+                    # Get the rendered HTML content
+                    content = await page.content()
                 
-                print(f"  ✅ Playwright fetch successful! Content length: {len(content)} chars")
-                return content, final_url
+                    await self.record_api_calls(final_url, api_responses)
+                
+                    print(f"  ✅ Playwright fetch successful! Content length: {len(content)} chars")
+                    return content, final_url
+                finally:
+                    await context.close()
                 
         except Exception as e:
             print(f"  ❌ Playwright fetch failed: {e}")
             return None, None
 
+    async def record_api_calls(self, page_url, responses):
+        """Record same-origin JSON XHR/fetch responses from a render as replayable templates"""
+        captures = []
+        for resp in responses:
+            if not resp.ok or 'json' not in resp.headers.get('content-type', ''):
+                continue
+            if origin_of(resp.url) != origin_of(page_url):
+                continue
+            try:
+                payload = await resp.json()
+            except Exception:
+                continue
+            captures.append({
+                'method': resp.request.method,
+                'url': resp.url,
+                'headers': resp.request.headers,
+                'body': resp.request.post_data,
+                'payload': payload,
+            })
+        
+        if captures and self.api_profiles.record(page_url, captures):
+            await run_blocking(self.api_profiles.save)
+    
+    async def replay_api(self, page_url, timeout=None):
+        """Call the site's recorded content API over plain HTTP; (data, response), or (None, None)"""
+        for template, method, api_url, headers, body in self.api_profiles.requests_for(page_url):
+            data = None
+            try:
+                print(f"  📼 Replaying {method} {api_url}")
+                response = await self.fetch(api_url, timeout=timeout, method=method, headers=headers, content=body)
+                response.raise_for_status()
+                data = extract_from_payloads([('xhr-replay', response.json())], page_url)
+            except Exception as e:
+                print(f"  ❌ API replay failed: {e}")
+            
+            success = bool(data and len(data['text']) >= self.embedded_min_chars)
+            if self.api_profiles.mark(page_url, template, success):
+                await run_blocking(self.api_profiles.save)
+            if success:
+                return data, response
+        return None, None
+    
     def is_image_url(self, url):
         """Check if URL points to an image file"""
-        image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', '.svg']
-        
-        # Remove query parameters and fragments to check the actual file extension
-        from urllib.parse import urlparse
-        parsed = urlparse(url.lower())
-        path = parsed.path
-        
-        # Check if path ends with image extension
-        for ext in image_extensions:
-            if path.endswith(ext):
-                return True
-        
-        # Also check the full URL (for legacy compatibility)
-        return any(url.lower().endswith(ext) for ext in image_extensions)
+        return classify_url(url) == DEFINITE_IMAGE
     
     def could_be_image(self, url):
         """Check if URL could be an image (more permissive check)"""
-        # Some images might not have extensions or have query parameters
-        url_lower = url.lower()
-        
-        # Skip obvious non-images
-        skip_patterns = ['javascript:', 'data:text', '.css', '.js', '.html', '.php']
-        if any(pattern in url_lower for pattern in skip_patterns):
-            return False
-        
-        # Include data URIs that start with image
-        if url_lower.startswith('data:image/'):
-            return True
-            
-        # Include URLs that might be images but don't have clear extensions
-        image_indicators = ['image', 'img', 'photo', 'picture', 'thumbnail', 'avatar', 'resizer', 'cdn']
-        if any(indicator in url_lower for indicator in image_indicators):
-            return True
-            
-        # Check for common image service patterns
-        image_service_patterns = ['/resizer/', '/resize/', '/thumb/', '/media/', '/assets/images/']
-        if any(pattern in url_lower for pattern in image_service_patterns):
-            return True
-            
-        return False
+        return classify_url(url) != NOT_IMAGE
     
-    def try_multiple_strategies(self, url):
+    async def try_multiple_strategies(self, url, timeout=None):
         """Try multiple strategies to access blocked content"""
         strategies = [
             {
@@ -180,7 +336,7 @@ class EnhancedWebScraper:
         for strategy in strategies:
             try:
                 print(f"  🔄 Trying {strategy['name']}...")
-                response = self.session.get(url, headers=strategy['headers'], timeout=15, allow_redirects=True)
+                response = await self.fetch(url, timeout=timeout, headers=strategy['headers'])
                 
                 # Check if this response is better (longer content, not an error page)
                 is_error_page = (
@@ -197,7 +353,7 @@ class EnhancedWebScraper:
                 else:
                     print(f"    ❌ {strategy['name']} blocked or minimal content")
                     
-                time.sleep(1)  # Be respectful between attempts
+                await asyncio.sleep(1)  # Be respectful between attempts
                 
             except Exception as e:
                 print(f"    ❌ {strategy['name']} failed: {e}")
@@ -242,162 +398,249 @@ class EnhancedWebScraper:
         except Exception as e:
             print(f"❌ Error resolving redirect: {e}")
             return url
-    def extract_text_from_image(self, image_url, base_url):
-        """Extract text from an image using OCR"""
+    async def probe_image(self, image_url, timeout=None):
+        """(format, width, height) from an image's first few KB, or None; raises on download errors"""
+        if image_url.startswith('data:'):
+            data = decode_data_url(image_url)
+            return parse_image_header(data) if data else None
+        
+        response = await self.fetch(image_url, timeout=timeout, stream=True,
+                                    headers={'Range': f'bytes=0-{PROBE_MAX_BYTES - 1}'})
         try:
-            print(f"  📷 Processing image: {image_url}")
-            
-            # Download image
-            response = self.session.get(image_url, timeout=15)
             response.raise_for_status()
+            if 'svg' in response.headers.get('content-type', ''):
+                return 'SVG', None, None
             
-            # Open and process image
-            img = Image.open(BytesIO(response.content))
-            
-            # Convert to RGB if necessary
-            if img.mode not in ['RGB', 'L']:
-                img = img.convert('RGB')
-            
-            # Extract text using OCR
-            text = pytesseract.image_to_string(img, config='--psm 6')
-            
-            # Clean up extracted text
-            cleaned_text = re.sub(r'\s+', ' ', text).strip()
-            
-            if cleaned_text and len(cleaned_text) > 3:
-                return cleaned_text
-            else:
-                return None
-                
-        except Exception as e:
-            print(f"    ❌ Error processing image: {e}")
-            return None
+            # Servers that ignore Range send the whole file; stop reading once the header parses
+            data = b''
+            async for chunk in response.aiter_bytes(PROBE_CHUNK_BYTES):
+                data += chunk
+                probe = parse_image_header(data)
+                if probe or len(data) >= PROBE_MAX_BYTES:
+                    return probe
+            return parse_image_header(data)
+        finally:
+            await response.aclose()
     
-    def find_images_on_page(self, soup, page_url):
-        """Find all images on a page and return their URLs"""
-        images = []
-        base_domain = urlparse(page_url).netloc
-        
-        # Look for img tags with src
-        img_tags = soup.find_all('img')
-        print(f"  🔍 Found {len(img_tags)} <img> tags total")
+    async def qualify_images(self, image_urls, timeout=None):
+        """Probe image headers concurrently and return the URLs worth OCR, largest first"""
+        probe_slots = asyncio.Semaphore(self.image_download_concurrency * 2)
+        probes = {}
         
-        for i, img_tag in enumerate(img_tags, 1):
-            src = img_tag.get('src')
-            data_src = img_tag.get('data-src')  # Lazy loading
-            srcset = img_tag.get('srcset')  # Responsive images
-            
-            print(f"    Image {i}: src='{src}', data-src='{data_src}', srcset='{srcset}'")
-            
-            # Try different src attributes
-            potential_srcs = [src, data_src]
-            
-            # Parse srcset if available
-            if srcset:
-                srcset_urls = [url.strip().split()[0] for url in srcset.split(',')]
-                potential_srcs.extend(srcset_urls)
-            
-            for potential_src in potential_srcs:
-                if potential_src:
-                    # Convert relative URLs to absolute
-                    full_url = urljoin(page_url, potential_src)
-                    
-                    # Check if it's a valid image URL (more permissive)
-                    if self.is_image_url(full_url) or self.could_be_image(full_url):
-                        images.append(full_url)
-                        print(f"      ✅ Added: {full_url}")
-                    else:
-                        print(f"      ❌ Skipped (not image): {full_url}")
+        async def probe(image_url):
+            async with probe_slots:
+                try:
+                    probes[image_url] = await self.probe_image(image_url, timeout)
+                except Exception as e:
+                    print(f"  ⚪ Skipping unreachable image {image_url}: {e}")
         
-        # Also look for CSS background images
-        for element in soup.find_all(style=True):
-            style = element.get('style', '')
-            if 'background-image' in style:
-                import re
-                matches = re.findall(r'background-image:\s*url\(["\']?([^"\')]+)["\']?\)', style)
-                for match in matches:
-                    full_url = urljoin(page_url, match)
-                    if self.is_image_url(full_url) or self.could_be_image(full_url):
-                        images.append(full_url)
-                        print(f"      ✅ Added CSS background: {full_url}")
+        await asyncio.gather(*(probe(image_url) for image_url in image_urls))
+        return rank_images(image_urls, probes)
+    
+    async def download_image(self, image_url, timeout=None):
+        """Download an image and return its bytes (data: URLs are decoded inline)"""
+        if image_url.startswith('data:'):
+            data = decode_data_url(image_url)
+            if data is None:
+                raise ValueError("Unsupported data URL")
+            return data
         
-        unique_images = list(set(images))  # Remove duplicates
-        print(f"  📷 Total unique images found: {len(unique_images)}")
-        return unique_images
+        response = await self.fetch(image_url, timeout=timeout)
+        response.raise_for_status()
+        return response.content
     
-    def find_meta_images(self, soup, page_url):
-        """Find images from OpenGraph and meta tags"""
-        images = []
+    def ocr_options(self, preprocess=None):
+        """Keyword arguments for ocr_image_bytes; preprocess (dict or False) overrides self.preprocess"""
+        return {
+            'config': DEFAULT_OCR_CONFIG,
+            'text_threshold': self.text_threshold if detector_available() else None,
+            'preprocess': preprocess_options(self.preprocess if preprocess is None else preprocess),
+            'psm_order': self.psm_priors.order() if self.multi_psm else None,
+            'min_confidence': self.min_confidence,
+        }
+    
+    async def ocr_bands(self, image_bytes, options):
+        """OCR a very large image as overlapping bands on the OCR pool; ocr_image_bytes' result plus tiles"""
+        loop = asyncio.get_running_loop()
+        pool = get_ocr_pool()
+        bands = await run_blocking(split_bands, image_bytes)  # Pillow releases the GIL while cropping
+        run_band = functools.partial(ocr_image, **options)
+        outcomes = await asyncio.gather(*(loop.run_in_executor(pool, run_band, band) for band in bands))
+        return combine_band_outcomes(outcomes)
+    
+    async def extract_image_texts(self, image_urls, timeout=None, ocr_budget=None, preprocess=None):
+        """OCR images through a bounded download -> OCR pipeline within ocr_budget seconds
+
+        Returns (results, timings): the images with text in page order, and seconds
+        spent per stage plus the pipeline's wall time.
+        """
+        timings = {'download': 0.0, 'queue_wait': 0.0, 'cache': 0.0, 'ocr': 0.0, 'wall': 0.0}
+        if not image_urls:
+            return [], timings
         
-        print(f"  🔍 Searching for meta images...")
+        loop = asyncio.get_running_loop()
+        pool = get_ocr_pool()
+        consumers_count = min(pool_size(), len(image_urls))
+        queue = asyncio.Queue(maxsize=consumers_count)
+        download_slots = asyncio.Semaphore(self.image_download_concurrency)
+        host_slots = {}
+        budget = self.ocr_budget if ocr_budget is None else ocr_budget
+        options = self.ocr_options(preprocess)
+        settings = ocr_settings(**options)
+        run_ocr = functools.partial(ocr_image_bytes, **options)
+        outcomes = {}  # index -> outcome dict or exception
         
-        # OpenGraph image (multiple attribute styles)
-        og_selectors = [
-            ('meta', {'property': 'og:image'}),
-            ('meta', {'property': 'og:image:url'}),
-            ('meta', {'name': 'og:image'})
-        ]
+        async def produce(index, image_url):
+            host_slot = host_slots.setdefault(urlparse(image_url).netloc,
+                                              asyncio.Semaphore(self.per_host_downloads))
+            try:
+                async with host_slot, download_slots:
+                    start = time.perf_counter()
+                    image_bytes = await self.download_image(image_url, timeout)
+                    timings['download'] += time.perf_counter() - start
+            except Exception as e:
+                outcomes[index] = e
+                return
+            # Blocks while the queue is full: backpressure from the OCR stage
+            await queue.put((index, image_bytes, time.perf_counter()))
         
-        for tag, attrs in og_selectors:
-            og_image = soup.find(tag, attrs)
-            if og_image and og_image.get('content'):
-                img_url = urljoin(page_url, og_image['content'])
-                if self.is_image_url(img_url) or self.could_be_image(img_url):
-                    images.append(img_url)
-                    print(f"      ✅ Added OpenGraph image: {img_url}")
+        async def consume():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                index, image_bytes, queued_at = item
+                timings['queue_wait'] += time.perf_counter() - queued_at
+                try:
+                    start = time.perf_counter()
+                    match, text, phash = await run_blocking(self.ocr_cache.get, image_bytes, settings)
+                    timings['cache'] += time.perf_counter() - start
+                    if match:
+                        outcomes[index] = {'text': text, 'text_score': None, 'skipped': False, 'psm': None,
+                                           'confidence': None, 'cached': match}
+                        continue
+                    
+                    start = time.perf_counter()
+                    probe = parse_image_header(image_bytes)
+                    if probe and probe[1] and needs_tiling(probe[1], probe[2]):
+                        outcome = await self.ocr_bands(image_bytes, options)
+                    else:
+                        outcome = await loop.run_in_executor(pool, run_ocr, image_bytes)
+                    timings['ocr'] += time.perf_counter() - start
+                    if outcome['text']:
+                        self.psm_priors.record(outcome['psm'])
+                    await run_blocking(self.ocr_cache.put, image_bytes, settings, outcome['text'], phash)
+                    outcomes[index] = dict(outcome, cached=False)
+                except Exception as e:
+                    outcomes[index] = e
         
-        # Twitter card images
-        twitter_selectors = [
-            ('meta', {'name': 'twitter:image'}),
-            ('meta', {'name': 'twitter:image:src'}),
-            ('meta', {'property': 'twitter:image'})
-        ]
+        async def pipeline():
+            consumers = [asyncio.ensure_future(consume()) for _ in range(consumers_count)]
+            try:
+                await asyncio.gather(*(produce(index, image_url) for index, image_url in enumerate(image_urls)))
+                for _ in consumers:
+                    await queue.put(None)
+                await asyncio.gather(*consumers)
+            finally:
+                for consumer in consumers:
+                    consumer.cancel()
         
-        for tag, attrs in twitter_selectors:
-            twitter_image = soup.find(tag, attrs)
-            if twitter_image and twitter_image.get('content'):
-                img_url = urljoin(page_url, twitter_image['content'])
-                if self.is_image_url(img_url) or self.could_be_image(img_url):
-                    images.append(img_url)
-                    print(f"      ✅ Added Twitter image: {img_url}")
+        wall_start = time.perf_counter()
+        try:
+            await asyncio.wait_for(pipeline(), timeout=budget)
+        except asyncio.TimeoutError:
+            print(f"  ⏱️  OCR budget of {budget:.0f}s spent, skipping {len(image_urls) - len(outcomes)} image(s)")
+        timings['wall'] = time.perf_counter() - wall_start
+        timings = {stage: round(seconds, 2) for stage, seconds in timings.items()}
         
-        # Generic meta images
-        meta_selectors = [
-            ('meta', {'name': 'image'}),
-            ('meta', {'name': 'thumbnail'}),
-            ('meta', {'property': 'image'})
-        ]
+        results = []
+        for i, image_url in enumerate(image_urls, 1):
+            outcome = outcomes.get(i - 1)
+            if outcome is None:
+                continue
+            if isinstance(outcome, Exception):
+                print(f"  ❌ Image {i} ({image_url}): {outcome}")
+            elif outcome['skipped']:
+                print(f"  ⚪ Image {i}: skipped, no text detected (score {outcome['text_score']})")
+            elif outcome['text']:
+                detail = f"cached, {outcome['cached']} match" if outcome['cached'] else f"psm {outcome['psm']}, confidence {outcome['confidence']}"
+                if outcome.get('tiles'):
+                    detail += f", {outcome['tiles']} bands"
+                print(f"  ✅ Image {i} OCR Text ({detail}): {outcome['text']}")
+                results.append({
+                    'image_url': image_url,
+                    'text': outcome['text'],
+                    'text_score': outcome['text_score'],
+                    'psm': outcome['psm'],
+                    'confidence': outcome['confidence'],
+                    'cached': outcome['cached']
+                })
+            else:
+                print(f"  ⚪ Image {i}: no readable text found")
+        return results, timings
+    
+    async def fetch_page(self, url, timeout=None):
+        """Fetch a page over plain HTTP, retrying with other browser profiles if blocked"""
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+            'Sec-Fetch-Dest': 'document',
+            'Sec-Fetch-Mode': 'navigate',
+            'Sec-Fetch-Site': 'none',
+            'Sec-Fetch-User': '?1',
+            'Cache-Control': 'max-age=0',
+            'DNT': '1'
+        }
+        
+        response = await self.fetch(url, timeout=timeout, headers=headers)
         
-        for tag, attrs in meta_selectors:
-            meta_images = soup.find_all(tag, attrs)
-            for meta in meta_images:
-                if meta.get('content'):
-                    img_url = urljoin(page_url, meta['content'])
-                    if self.is_image_url(img_url) or self.could_be_image(img_url):
-                        images.append(img_url)
-                        print(f"      ✅ Added meta image: {img_url}")
+        status_code = response.status_code
+        final_url = str(response.url)
+        print(f"✅ Status code: {status_code}")
+        print(f"🔗 Final URL: {final_url}")
         
-        # Look for any meta tag with image-like content
-        all_metas = soup.find_all('meta')
-        for meta in all_metas:
-            content = meta.get('content', '')
-            if content and (self.is_image_url(content) or self.could_be_image(content)):
-                img_url = urljoin(page_url, content)
-                if img_url not in images:  # Avoid duplicates
-                    images.append(img_url)
-                    print(f"      ✅ Added discovered meta image: {img_url}")
+        # Check for CloudFront blocking or error pages
+        is_blocked = (
+            response.status_code == 403 or 
+            'cloudfront' in response.text.lower() or 
+            'request could not be satisfied' in response.text.lower() or
+            'access denied' in response.text.lower() or
+            len(response.text) < 500  # Threshold for minimal content
+        )
+        
+        if is_blocked:
+            print(f"⚠️  Detected blocking/error page ({len(response.text)} chars). Trying multiple strategies...")
+            
+            # Try multiple strategies to bypass blocking
+            alt_response = await self.try_multiple_strategies(url, timeout=timeout)
+            
+            if alt_response and len(alt_response.text) > len(response.text):
+                print(f"✅ Multi-strategy approach successful! Using best response.")
+                response = alt_response
+            else:
+                print(f"🔴 All strategies blocked. Content may be JavaScript-rendered.")
+                print(f"💡 Consider setting force_playwright=True or use_playwright=True")
         
-        print(f"  📷 Meta images found: {len(images)}")
-        return images
+        return response
     
-    async def scrape_url(self, url, extract_images=True, force_playwright=False):
-        """Scrape a single URL for text and optionally extract text from images"""
+    async def scrape_url(self, url, extract_images=True, force_playwright=False, timeout=None, content_mode='full',
+                         ocr_budget=None, preprocess=None, delay=None):
+        """Scrape a single URL for text and optionally extract text from images
+
+        timeout, delay, ocr_budget and preprocess override the scraper's settings
+        for this call; content_mode='main' keeps only the article body.
+        """
         print(f"\n🔍 Scraping: {url}")
         print("-" * 80)
         
         try:
             clean_url = self.resolve_redirect(url)
             print(f"🔗 Resolved Clean URL: {clean_url}")
+            await self.pace(clean_url, delay)
 
             # Determine if we should use Playwright
             should_use_playwright = (
@@ -405,13 +648,45 @@ class EnhancedWebScraper:
                 force_playwright or 
                 'listcorp.com' in clean_url.lower()  # Known JavaScript-heavy site
             )
+            content = None
+            response = None
+            embedded = None
+            data_method = None
+            
+            if should_use_playwright and not force_playwright and self.api_profiles.has_profile(clean_url):
+                # A previous render on this site recorded its content API; call it directly
+                print("📼 Trying recorded API calls before rendering...")
+                embedded, api_response = await self.replay_api(clean_url, timeout=timeout)
+                if embedded:
+                    print(f"✅ API replay successful, skipping browser")
+                    data_method = 'xhr-replay'
+                    should_use_playwright = False
+                    status_code = api_response.status_code
+                    final_url = clean_url
+                    html_content = ''
+            
+            if should_use_playwright and not force_playwright:
+                # Many JS-heavy sites embed their content as JSON; try that before launching a browser
+                print("🧩 Checking plain HTTP response for embedded JSON data...")
+                try:
+                    response = await self.fetch_page(clean_url, timeout=timeout)
+                    embedded = await run_parse(extract_embedded_data, response.text, str(response.url))
+                except Exception as e:
+                    print(f"  ❌ Plain HTTP fetch failed: {e}")
+            
+                if embedded and len(embedded['text']) >= self.embedded_min_chars:
+                    print(f"✅ Embedded data found ({', '.join(embedded['sources'])}), skipping browser")
+                    data_method = 'embedded-json'
+                    should_use_playwright = False
+                else:
+                    embedded = None
             
             if should_use_playwright:
                 # Use Playwright for JavaScript-heavy sites
-                content, final_url = await self.fetch_with_playwright(clean_url)
+                content, final_url = await self.fetch_with_playwright(clean_url, timeout=timeout)
                 
                 if content:
-                    soup = BeautifulSoup(content, 'html.parser')
+                    html_content = content
                     status_code = 200  # Playwright successful
                     final_url = final_url or clean_url
                     print(f"✅ Status code: {status_code} (Playwright)")
@@ -421,65 +696,48 @@ class EnhancedWebScraper:
                     print("🔄 Playwright failed, falling back to traditional scraping...")
                     should_use_playwright = False
             
-            if not should_use_playwright or not content:
-                # Traditional scraping approach
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-                    'Accept-Language': 'en-US,en;q=0.9',
-                    'Accept-Encoding': 'gzip, deflate, br',
-                    'Connection': 'keep-alive',
-                    'Upgrade-Insecure-Requests': '1',
-                    'Sec-Fetch-Dest': 'document',
-                    'Sec-Fetch-Mode': 'navigate',
-                    'Sec-Fetch-Site': 'none',
-                    'Sec-Fetch-User': '?1',
-                    'Cache-Control': 'max-age=0',
-                    'DNT': '1'
-                }
-                
-                response = self.session.get(clean_url, headers=headers, allow_redirects=True, timeout=15)
-                
+            if data_method != 'xhr-replay' and (not should_use_playwright or not content):
+                # Traditional scraping approach (reusing the embedded-data probe's response)
+                if response is None:
+                    response = await self.fetch_page(clean_url, timeout=timeout)
                 status_code = response.status_code
                 final_url = str(response.url)
-                print(f"✅ Status code: {status_code}")
-                print(f"🔗 Final URL: {final_url}")
-                
-                # Check for CloudFront blocking or error pages
-                is_blocked = (
-                    response.status_code == 403 or 
-                    'cloudfront' in response.text.lower() or 
-                    'request could not be satisfied' in response.text.lower() or
-                    'access denied' in response.text.lower() or
-                    len(response.text) < 500  # Threshold for minimal content
-                )
-                
-                if is_blocked:
-                    print(f"⚠️  Detected blocking/error page ({len(response.text)} chars). Trying multiple strategies...")
-                    
-                    # Try multiple strategies to bypass blocking
-                    alt_response = self.try_multiple_strategies(clean_url)
-                    
-                    if alt_response and len(alt_response.text) > len(response.text):
-                        print(f"✅ Multi-strategy approach successful! Using best response.")
-                        response = alt_response
-                    else:
-                        print(f"🔴 All strategies blocked. Content may be JavaScript-rendered.")
-                        print(f"💡 Consider setting force_playwright=True or use_playwright=True")
-                
-                soup = BeautifulSoup(response.text, 'html.parser')
+                html_content = response.text
             
-            # Extract page title
-            title = soup.find('title')
-            title_text = title.get_text().strip() if title else "No title"
-            print(f"📄 Page Title: {title_text}")
+            # Title, visible text and image candidates in a single pass on the parsing pool;
+            # each distinct candidate URL is classified once per page
+            classifier = ImageURLClassifier()
+            page = await run_parse(
+                extract_page,
+                html_content,
+                final_url,
+                backend=self.parser_backend,
+                is_image=classifier.is_candidate
+            )
+            title_text = page['title']
+            clean_text = page['text']
+            if embedded:
+                # The embedded payload carries the real content; the HTML is mostly an app shell
+                title_text = embedded['title'] or title_text
+                clean_text = embedded['text']
+                page['images'] = list(dict.fromkeys(embedded['images'] + page['images']))
+            raw_text_length = len(clean_text)
+            print(f"📄 Page Title: {title_text} ({page['backend']} parser)")
             
-            # Extract visible page text
-            for script in soup(['script', 'style', 'meta', 'link']):
-                script.decompose()
+            # Optionally narrow text and images down to the article body
+            main_content = None
+            if content_mode == 'main' and not embedded:
+                try:
+                    main_content = await run_parse(extract_main_content, html_content, final_url,
+                                                   is_image=classifier.is_candidate)
+                except ImportError:
+                    print("⚠️  Main-content extraction needs lxml; returning the full page")
             
-            page_text = soup.get_text(separator=' ')
-            clean_text = re.sub(r'\s+', ' ', page_text).strip()
+                if main_content:
+                    clean_text = main_content['text']
+                    print(f"✂️  Main content: {len(clean_text)} of {raw_text_length} chars kept")
+                else:
+                    print("⚠️  No main content block found; returning the full page")
             
             print(f"\n📝 Page Text ({len(clean_text)} chars):")
             print(clean_text[:1000] + "..." if len(clean_text) > 1000 else clean_text)
@@ -492,41 +750,46 @@ class EnhancedWebScraper:
                 'timestamp': datetime.now().isoformat(),
                 'images_found': 0,
                 'image_texts': [],
-                'method': 'playwright' if should_use_playwright and content else 'traditional'
+                'method': data_method or ('playwright' if should_use_playwright and content else 'traditional'),
+                'content_mode': 'main' if main_content else 'full',
+                'raw_text_length': raw_text_length,
+                'main_text_length': len(clean_text) if main_content else None
             }
+            if embedded:
+                result['published_date'] = embedded['date']
+                result['embedded_sources'] = embedded['sources']
             
             # Process images if requested
             if extract_images:
-                # Find images in the HTML
-                images = self.find_images_on_page(soup, final_url)
-                
-                # Also check OpenGraph and meta tags for images
-                meta_images = self.find_meta_images(soup, final_url)
+                if main_content:
+                    # Only images inside the article body
+                    all_images = main_content['images']
+                    print(f"  📷 Main content images: {len(all_images)}")
+                else:
+                    # Images in the HTML plus OpenGraph and meta tag images
+                    images = page['images']
+                    meta_images = page['meta_images']
+                    print(f"  📷 Page images: {len(images)}, meta images: {len(meta_images)}")
                 
-                # Combine all images
-                all_images = list(set(images + meta_images))
+                    # Combine all images, keeping document order
+                    all_images = list(dict.fromkeys(images + meta_images))
                 result['images_found'] = len(all_images)
                 
                 if all_images:
-                    print(f"\n🖼️  Found {len(all_images)} image(s) to analyze:")
-                    
-                    for i, img_url in enumerate(all_images[:10], 1):  # Limit to first 10 images
-                        print(f"\n  Image {i}/{min(len(all_images), 10)}:")
-                        
-                        # Extract text from image
-                        ocr_text = self.extract_text_from_image(img_url, final_url)
+                    # Rank candidates by header-only probes so OCR slots go to large images
+                    candidates = all_images[:self.max_probe_images]
+                    ranked = await self.qualify_images(candidates, timeout=timeout)
+                    result['images_qualified'] = len(ranked)
+                    selected = ranked[:self.max_images]
+                    print(f"\n🖼️  Found {len(all_images)} image(s), {len(ranked)} of {len(candidates)} probed "
+                          f"qualify, analyzing {len(selected)}:")
                         
-                        if ocr_text:
-                            print(f"  ✅ OCR Text: {ocr_text}")
-                            result['image_texts'].append({
-                                'image_url': img_url,
-                                'text': ocr_text
-                            })
-                        else:
-                            print(f"  ⚪ No readable text found")
-                        
-                        # Be respectful to the server
-                        time.sleep(1)
+                    result['image_texts'], result['ocr_timings'] = await self.extract_image_texts(
+                        selected, timeout=timeout, ocr_budget=ocr_budget, preprocess=preprocess)
+                    timings = result['ocr_timings']
+                    print(f"  ⏱️  OCR pipeline took {timings['wall']:.1f}s (download {timings['download']:.1f}s, "
+                          f"queue wait {timings['queue_wait']:.1f}s, cache {timings['cache']:.1f}s, "
+                          f"OCR {timings['ocr']:.1f}s)")
                 else:
                     print("\n🖼️  No images found on this page")
             
@@ -541,12 +804,8 @@ class EnhancedWebScraper:
             }
 
 def check_tesseract_available():
-    """Check if Tesseract is available"""
-    try:
-        pytesseract.get_tesseract_version()
-        return True
-    except Exception:
-        return False
+    """Check if Tesseract is available (probed once per process, then cached)"""
+    return tesseract_available()
 
 def main():
     """Main function for testing"""
@@ -558,9 +817,6 @@ def main():
         print("On Railway: This is expected - OCR requires system dependencies")
         print("Locally: Install with 'brew install tesseract'")
     
-    # Example usage
-    scraper = EnhancedWebScraper(delay=2)
-    
     # Test URL - original ListCorp URL
     test_url = "https://www.listcorp.com/asx/alkane-researches-limited/news/tomingley-fy2025-production-achievements-guidance-3210664.html"
     
@@ -569,7 +825,11 @@ def main():
     print("=" * 80)
     
     # Scrape the URL
-    result = scraper.scrape_url(test_url, extract_images=True)
+    async def scrape():
+        async with EnhancedWebScraper(delay=2) as scraper:
+            return await scraper.scrape_url(test_url, extract_images=True)
+    
+    result = asyncio.run(scrape())
     
     # Save result to JSON file
     output_file = "scrape_result.json"